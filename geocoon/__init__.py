@@ -26,7 +26,12 @@ __version__ = '0.2.0'
 
 from .core import GeoDataFrame, PointSeries, LineStringSeries, \
     PolygonSeries
-from .sql import read_sql
-from .factory import from_shapes, from_wkb, as_line_string, as_polygon
+from .sql import read_sql, read_sql_partitioned, read_sql_async, to_sql
+from .cache import SQLCache
+from .join import sjoin
+from .native import read_geocoon
+from .arrow import read_parquet, from_arrow
+from .factory import from_shapes, from_wkb, from_xy, from_line_coords, \
+    from_polygon_coords, as_line_string, as_polygon
 
 # vim: sw=4:et:ai
@@ -0,0 +1,554 @@
+#
+# GeoCoon - GIS data analysis library based on Pandas and Shapely
+#
+# Copyright (C) 2014 by Artur Wroblewski <wrobell@pld-linux.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Apache Arrow and Parquet interchange of GIS data frames.
+
+The GIS series are stored as Arrow columns using GeoArrow geometry
+encoding, i.e. WKB binary column or native nested lists of coordinates
+
+- point, fixed size list of coordinates
+- line string, list of points
+- polygon, list of rings, each ring is list of points
+
+The geometry columns are described with GeoParquet `geo` metadata of
+Arrow schema. The Parquet files contain bounding box column for each GIS
+series, so row groups can be filtered using the column statistics.
+
+The null geometries are stored as null values, except null points of
+native encoding, which are stored as points with NaN coordinates. The
+points with NaN coordinates are read as null values.
+
+The SRID of GIS series is stored as PROJJSON `crs` of GeoParquet metadata.
+The PROJJSON is created with `pyproj` library, if it is available,
+otherwise only identifier of the spatial reference system is stored. When
+reading, the SRID is taken from EPSG identifier of the `crs`. If the `crs`
+is not specified, then the SRID is 4326, as defined by GeoParquet.
+
+The `pyarrow` library is required.
+"""
+
+import json
+
+import numpy
+import shapely.wkb
+
+from .core import GeoDataFrame, PointSeries, LineStringSeries, \
+    PolygonSeries
+from .factory import from_shapes, from_xy, from_line_coords, \
+    from_polygon_coords, _FROM_COORDS
+from .wkb import decode_buffer
+
+GEO_VERSION = '1.1.0'
+
+# GIS series class of each geometry type
+GEOMETRY_TYPES = {
+    'Point': PointSeries,
+    'LineString': LineStringSeries,
+    'Polygon': PolygonSeries,
+}
+
+# native encoding of each GIS series class
+ENCODINGS = {
+    PointSeries: 'point',
+    LineStringSeries: 'linestring',
+    PolygonSeries: 'polygon',
+}
+
+BBOX = ('xmin', 'ymin', 'xmax', 'ymax')
+
+# default `crs` of GeoParquet geometry column
+CRS84 = {'id': {'authority': 'OGC', 'code': 'CRS84'}}
+
+
+def to_arrow(data, encoding='wkb', index=None):
+    """
+    Convert GIS data frame into Arrow table.
+
+    The GIS series are encoded as WKB data or with native GeoArrow
+    encoding.
+
+    :param data: GIS data frame.
+    :param encoding: Geometry encoding, `wkb` or `native`.
+    :param index: Store data frame index, see `pyarrow.Table.from_pandas`.
+    """
+    return _to_arrow(data, encoding, index, False)
+
+
+def to_parquet(data, path, encoding='wkb', index=None, row_group_size=None):
+    """
+    Write GIS data frame into Parquet file.
+
+    Bounding box column `<name>_bbox` is stored for each GIS series, so
+    row groups can be filtered with bounding box when reading the file.
+
+    The data frame index is stored as a column, including range index, so
+    the index labels are kept when rows are filtered on read. Use
+    `index=False` to not store the index.
+
+    :param data: GIS data frame.
+    :param path: Parquet file path.
+    :param encoding: Geometry encoding, `wkb` or `native`.
+    :param index: Store data frame index, see `pyarrow.Table.from_pandas`.
+    :param row_group_size: Maximum number of rows in each row group.
+
+    .. seealso:: :py:func:`to_arrow`
+    """
+    _import_pyarrow()
+    import pyarrow.parquet as pq
+
+    index = True if index is None else index
+    table = _to_arrow(data, encoding, index, True)
+    pq.write_table(table, path, row_group_size=row_group_size)
+
+
+def from_arrow(table):
+    """
+    Convert Arrow table into GIS data frame.
+
+    The geometry columns are determined with GeoParquet `geo` metadata of
+    the table schema. Other columns are converted with
+    `pyarrow.Table.to_pandas` method.
+
+    :param table: Arrow table.
+    """
+    geo = _geo_metadata(table.schema)
+    columns = geo['columns']
+    bbox = {_bbox_column(meta) for meta in columns.values()}
+
+    names = table.column_names
+    drop = [n for n in names if n in columns or n in bbox]
+    frame = table.drop(drop).to_pandas()
+
+    data = {}
+    for name in names:
+        if name in columns:
+            data[name] = _read_geometry(
+                table.column(name), columns[name], frame.index
+            )
+        elif name in frame.columns:
+            data[name] = frame[name]
+    return GeoDataFrame(data, index=frame.index)
+
+
+def read_parquet(path, columns=None, bbox=None):
+    """
+    Read GIS data frame from Parquet file.
+
+    If bounding box is specified, then the row groups, which statistics of
+    primary geometry column bounding box do not intersect the bounding
+    box, are not read. Then, the rows, which geometry bounding box does
+    not intersect the bounding box, are removed.
+
+    :param path: Parquet file path.
+    :param columns: Collection of column names to read.
+    :param bbox: Bounding box `(minx, miny, maxx, maxy)`.
+
+    .. seealso:: :py:func:`from_arrow`
+    """
+    _import_pyarrow()
+    import pyarrow
+    import pyarrow.parquet as pq
+
+    f = pq.ParquetFile(path)
+    columns = None if columns is None else list(columns)
+    row_groups = range(f.num_row_groups)
+
+    if bbox is not None:
+        geo = _geo_metadata(f.schema_arrow)
+        name = _bbox_column(geo['columns'][geo['primary_column']])
+        if name is None:
+            raise ValueError('Bounding box column not found')
+        if columns is not None and name not in columns:
+            columns.append(name)
+        meta = f.metadata
+        row_groups = [
+            i for i in row_groups
+            if _intersects(_row_group_bbox(meta.row_group(i), name), bbox)
+        ]
+
+    table = f.read_row_groups(
+        row_groups, columns=columns, use_pandas_metadata=True
+    )
+    if bbox is not None:
+        data = table.column(name).combine_chunks()
+        box = [data.field(k).to_numpy() for k in BBOX]
+        mask = _intersects(box, bbox)
+        table = table.filter(pyarrow.array(mask))
+
+    return from_arrow(table)
+
+
+def _to_arrow(data, encoding, index, covering):
+    """
+    Convert GIS data frame into Arrow table.
+
+    :param data: GIS data frame.
+    :param encoding: Geometry encoding, `wkb` or `native`.
+    :param index: Store data frame index.
+    :param covering: Add bounding box column for each GIS series if true.
+    """
+    pa = _import_pyarrow()
+    if encoding not in ('wkb', 'native'):
+        raise ValueError('Unknown geometry encoding: {}'.format(encoding))
+
+    cols = list(data.columns)
+    geom_columns = getattr(data, '_geom_columns', {})
+    geoms = [c for c in cols if c in geom_columns]
+    frame = data[[c for c in cols if c not in geom_columns]]
+    table = pa.Table.from_pandas(frame, preserve_index=index)
+
+    meta = {}
+    for name in geoms:
+        series = data[name]
+        cls = geom_columns[name]
+        series = series if isinstance(series, cls) else cls(series)
+
+        if encoding == 'wkb':
+            array = pa.array(series.to_wkb().values, type=pa.binary())
+        else:
+            array = _native_array(pa, series)
+        table = table.add_column(cols.index(name), name, array)
+        meta[name] = _column_metadata(series, encoding)
+
+        if covering:
+            bbox = _bbox_array(pa, series)
+            table = table.append_column(name + '_bbox', bbox)
+            meta[name]['covering'] = {
+                'bbox': {k: [name + '_bbox', k] for k in BBOX}
+            }
+
+    geo = {
+        'version': GEO_VERSION,
+        'primary_column': geoms[0] if geoms else None,
+        'columns': meta,
+    }
+    metadata = dict(table.schema.metadata or {})
+    metadata[b'geo'] = json.dumps(geo).encode()
+    return table.replace_schema_metadata(metadata)
+
+
+def _native_array(pa, series):
+    """
+    Create Arrow array of GIS series with native GeoArrow encoding.
+
+    The null values of line string and polygon series are null values of
+    the array. The null values of point series are points with NaN
+    coordinates, as Parquet files do not support null values of fixed size
+    lists.
+
+    :param pa: The `pyarrow` module.
+    :param series: GIS series.
+    """
+    if isinstance(series, PointSeries):
+        return _point_array(pa, series._coords().T)
+
+    data = series.to_coords()
+    array = _point_array(pa, data[0])
+    null = series.isna().values
+    mask = pa.array(null) if null.any() else None
+    for offsets in data[1:-1]:
+        array = pa.ListArray.from_arrays(offsets.astype(numpy.int32), array)
+    return pa.ListArray.from_arrays(
+        data[-1].astype(numpy.int32), array, mask=mask
+    )
+
+
+def _point_array(pa, coords):
+    """
+    Create Arrow array of points.
+
+    :param pa: The `pyarrow` module.
+    :param coords: Array of coordinates of `(m, ndim)` shape.
+    """
+    values = pa.array(numpy.ascontiguousarray(coords).ravel())
+    return pa.FixedSizeListArray.from_arrays(values, coords.shape[1])
+
+
+def _bbox_array(pa, series):
+    """
+    Create Arrow array of bounding boxes of geometries of GIS series.
+
+    :param pa: The `pyarrow` module.
+    :param series: GIS series.
+    """
+    bounds = series._bounds()
+    values = [pa.array(bounds[:, i]) for i in range(4)]
+    return pa.StructArray.from_arrays(values, names=BBOX)
+
+
+def _column_metadata(series, encoding):
+    """
+    Create GeoParquet metadata of GIS series.
+
+    :param series: GIS series.
+    :param encoding: Geometry encoding, `wkb` or `native`.
+    """
+    cls = type(series)
+    geom_type = cls.__name__[:-len('Series')]
+    if cls not in ENCODINGS:
+        raise ValueError('Unsupported GIS series {}'.format(cls))
+
+    if isinstance(series, PointSeries):
+        ndim = len(series._coords())
+    else:
+        ndim = series.to_coords()[0].shape[1]
+
+    meta = {
+        'encoding': 'WKB' if encoding == 'wkb' else ENCODINGS[cls],
+        'geometry_types': [geom_type + (' Z' if ndim == 3 else '')],
+        'crs': _crs(series.srid),
+    }
+    bounds = series._bounds()
+    if len(bounds) and not numpy.isnan(bounds).all():
+        meta['bbox'] = [
+            float(numpy.nanmin(bounds[:, 0])),
+            float(numpy.nanmin(bounds[:, 1])),
+            float(numpy.nanmax(bounds[:, 2])),
+            float(numpy.nanmax(bounds[:, 3])),
+        ]
+    return meta
+
+
+def _read_geometry(column, meta, index):
+    """
+    Create GIS series from Arrow geometry column.
+
+    The null values of the column are `None` values of the GIS series.
+
+    :param column: Arrow chunked array.
+    :param meta: GeoParquet metadata of the column.
+    :param index: Index of the GIS series.
+    """
+    pa = _import_pyarrow()
+    array = column.combine_chunks()
+    if not array.null_count:
+        series = _read_array(array, meta, index)
+    else:
+        null = array.is_null().to_numpy(zero_copy_only=False)
+        array = array.filter(pa.array(~null))
+        series = _read_array(array, meta, index[~null])
+        series = _expand_null(series, null, index)
+
+    series.srid = _srid(meta.get('crs', CRS84))
+    return series
+
+
+def _read_array(array, meta, index):
+    """
+    Create GIS series from Arrow geometry array without null values.
+
+    :param array: Arrow array.
+    :param meta: GeoParquet metadata of the column.
+    :param index: Index of the GIS series.
+    """
+    encoding = meta['encoding']
+    if encoding == 'WKB':
+        series = _read_wkb(array, meta, index)
+    elif encoding == 'point':
+        coords = _read_points(array)
+        null = numpy.isnan(coords).all(axis=1)
+        series = from_xy(*coords[~null].T, index=index[~null])
+        if null.any():
+            series = _expand_null(series, null, index)
+    elif encoding == 'linestring':
+        offsets, points = _read_list(array)
+        series = from_line_coords(
+            _read_points(points), offsets, index=index
+        )
+    elif encoding == 'polygon':
+        offsets, rings = _read_list(array)
+        ring_offsets, points = _read_list(rings)
+        series = from_polygon_coords(
+            _read_points(points), ring_offsets, offsets, index=index
+        )
+    else:
+        raise ValueError('Unsupported geometry encoding: {}'.format(encoding))
+    return series
+
+
+def _expand_null(series, null, index):
+    """
+    Create GIS series with null values inserted into GIS series.
+
+    :param series: GIS series without null values.
+    :param null: Mask of null values.
+    :param index: Index of created GIS series.
+    """
+    values = numpy.empty(len(index), dtype=object)
+    values[~null] = series.values
+    return type(series)(values, index=index)
+
+
+def _read_wkb(array, meta, index):
+    """
+    Create GIS series from Arrow binary array of WKB data.
+
+    The WKB data is decoded from the array buffers with NumPy. If this is
+    not possible, then Shapely is used.
+
+    :param array: Arrow binary array.
+    :param meta: GeoParquet metadata of the column.
+    :param index: Index of the GIS series.
+    """
+    pa = _import_pyarrow()
+    _, offsets, data = array.buffers()
+    dtype = numpy.int64 if pa.types.is_large_binary(array.type) \
+        else numpy.int32
+    offsets = numpy.frombuffer(offsets, dtype=dtype)
+    offsets = offsets[array.offset:array.offset + len(array) + 1]
+    buff = numpy.frombuffer(data, dtype=numpy.uint8) if data is not None \
+        else numpy.empty(0, dtype=numpy.uint8)
+
+    decoded = decode_buffer(buff, offsets)
+    if decoded is None:
+        types = meta.get('geometry_types', [])
+        cls = GEOMETRY_TYPES.get(types[0].split()[0]) if len(types) == 1 \
+            else None
+        shapes = [shapely.wkb.loads(v) for v in array.to_pylist()]
+        return from_shapes(shapes, index=index, cls=cls)
+
+    geom_type, coords, _ = decoded
+    return _FROM_COORDS[geom_type](*coords, index=index)
+
+
+def _read_list(array):
+    """
+    Get offsets and values of Arrow list array.
+
+    :param array: Arrow list array.
+    """
+    offsets = array.offsets.to_numpy().astype(numpy.int64)
+    values = array.values.slice(offsets[0], offsets[-1] - offsets[0])
+    return offsets - offsets[0], values
+
+
+def _read_points(array):
+    """
+    Get coordinates array of `(m, ndim)` shape of Arrow array of points.
+
+    :param array: Arrow fixed size list array.
+    """
+    ndim = array.type.list_size
+    return array.flatten().to_numpy().reshape(-1, ndim)
+
+
+def _crs(srid):
+    """
+    Create PROJJSON `crs` of GeoParquet metadata for SRID.
+
+    :param srid: SRID of GIS series or `None` if unknown.
+    """
+    if srid is None:
+        return None
+    try:
+        from pyproj import CRS
+    except ImportError:
+        return {'id': {'authority': 'EPSG', 'code': srid}}
+    return CRS.from_epsg(srid).to_json_dict()
+
+
+def _srid(crs):
+    """
+    Get SRID from PROJJSON `crs` of GeoParquet metadata.
+
+    The SRID is `None` if the `crs` is not defined with EPSG identifier.
+
+    :param crs: PROJJSON object.
+    """
+    crs_id = crs.get('id', {}) if isinstance(crs, dict) else {}
+    key = crs_id.get('authority'), crs_id.get('code')
+    if key == ('OGC', 'CRS84'):
+        return 4326
+    elif key[0] == 'EPSG':
+        return int(key[1])
+    else:
+        return None
+
+
+def _geo_metadata(schema):
+    """
+    Get GeoParquet metadata of Arrow schema.
+
+    :param schema: Arrow schema.
+    """
+    metadata = schema.metadata or {}
+    if b'geo' in metadata:
+        return json.loads(metadata[b'geo'])
+    else:
+        return {'primary_column': None, 'columns': {}}
+
+
+def _bbox_column(meta):
+    """
+    Get name of bounding box column of geometry column.
+
+    :param meta: GeoParquet metadata of geometry column.
+    """
+    covering = meta.get('covering', {}).get('bbox')
+    return covering['xmin'][0] if covering else None
+
+
+def _row_group_bbox(row_group, name):
+    """
+    Get bounding box of row group using statistics of bounding box column.
+
+    Infinite bounding box is returned if the statistics are not available.
+
+    :param row_group: Parquet row group metadata.
+    :param name: Name of bounding box column.
+    """
+    stats = {}
+    for i in range(row_group.num_columns):
+        column = row_group.column(i)
+        stats[column.path_in_schema] = column.statistics
+
+    result = []
+    for k, f, default in zip(BBOX, ('min', 'min', 'max', 'max'), (-1, -1, 1, 1)):
+        s = stats.get(name + '.' + k)
+        value = getattr(s, f) if s is not None and s.has_min_max else None
+        result.append(default * numpy.inf if value is None else value)
+    return result
+
+
+def _intersects(box, bbox):
+    """
+    Check if bounding boxes intersect a bounding box.
+
+    :param box: Bounding boxes `(xmin, ymin, xmax, ymax)`.
+    :param bbox: Bounding box `(minx, miny, maxx, maxy)`.
+    """
+    xmin, ymin, xmax, ymax = box
+    return (xmin <= bbox[2]) & (xmax >= bbox[0]) \
+        & (ymin <= bbox[3]) & (ymax >= bbox[1])
+
+
+def _import_pyarrow():
+    """
+    Import `pyarrow` module.
+    """
+    try:
+        import pyarrow
+    except ImportError as ex:
+        raise ImportError('pyarrow is required for Apache Arrow support') \
+            from ex
+    return pyarrow
+
+
+# vim: sw=4:et:ai
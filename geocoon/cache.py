@@ -0,0 +1,208 @@
+#
+# GeoCoon - GIS data analysis library based on Pandas and Shapely
+#
+# Copyright (C) 2014 by Artur Wroblewski <wrobell@pld-linux.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Redis cache of SQL query results.
+
+The GIS data frames are stored in compact binary form, i.e. coordinates
+arrays of GIS series and NumPy arrays of other columns, see
+:py:func:`geocoon.native.encode`. Nothing is pickled, so reading a cache
+entry cannot execute code, even if the cache is shared. The strings of
+object columns are stored as UTF-8 data with array of offsets. Object
+columns with other values are not supported and GIS data frames with
+such columns are not stored in the cache.
+
+The cache entries expire after TTL. If total size of the entries exceeds
+maximum size, then the oldest entries are removed. The cache can be
+shared by multiple processes.
+"""
+
+import hashlib
+import io
+import json
+import logging
+import time
+
+import numpy
+
+from . import native
+
+logger = logging.getLogger(__name__)
+
+
+class SQLCache(object):
+    """
+    Redis cache of SQL query results.
+
+    :var client: Redis client, i.e. `redis.Redis` object.
+    :var ttl: Time to live of cache entries in seconds.
+    :var maxsize: Maximum total size of cache entries in bytes.
+    :var prefix: Prefix of Redis keys.
+    """
+    def __init__(self, client, ttl=3600, maxsize=2 ** 28, prefix='geocoon:'):
+        """
+        Create Redis cache of SQL query results.
+
+        :param client: Redis client, i.e. `redis.Redis` object.
+        :param ttl: Time to live of cache entries in seconds.
+        :param maxsize: Maximum total size of cache entries in bytes.
+        :param prefix: Prefix of Redis keys.
+        """
+        self.client = client
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.prefix = prefix
+        # sorted set of cache entries keys scored by creation time and
+        # hash of cache entries sizes
+        self._index = prefix + 'index'
+        self._size = prefix + 'size'
+
+
+    def key(self, sql, params=None, geom_col=(), index_col=None):
+        """
+        Create cache key of SQL query.
+
+        The key depends on version of the serialization format, so entries
+        of other versions are not read.
+
+        :param sql: SQL query.
+        :param params: SQL query parameters.
+        :param geom_col: Collection of GIS column names.
+        :param index_col: Index column.
+        """
+        query = repr((
+            native.VERSION, str(sql), params, tuple(geom_col), index_col
+        ))
+        return self.prefix + hashlib.sha256(query.encode()).hexdigest()
+
+
+    def get(self, key):
+        """
+        Get GIS data frame from the cache.
+
+        If there is no GIS data frame for the key, then `None` is returned.
+
+        :param key: Cache key.
+        """
+        data = self.client.get(key)
+        return None if data is None else loads(data)
+
+
+    def set(self, key, data):
+        """
+        Store GIS data frame in the cache.
+
+        The GIS data frame is not stored if its size exceeds maximum size
+        of the cache or if it cannot be serialized.
+
+        :param key: Cache key.
+        :param data: GIS data frame.
+        """
+        try:
+            data = dumps(data)
+        except ValueError as ex:
+            logger.warning('GIS data frame not cached: {}'.format(ex))
+            return
+        if len(data) > self.maxsize:
+            return
+
+        now = time.time()
+        pipe = self.client.pipeline()
+        pipe.set(key, data, ex=self.ttl)
+        pipe.zadd(self._index, {key: now})
+        pipe.hset(self._size, key, len(data))
+        pipe.execute()
+        self._evict(now)
+
+
+    def clear(self):
+        """
+        Remove all entries from the cache.
+        """
+        keys = self.client.zrange(self._index, 0, -1)
+        self._remove(keys)
+
+
+    def _evict(self, now):
+        """
+        Remove expired entries and the oldest entries exceeding maximum
+        size of the cache.
+
+        :param now: Current time.
+        """
+        expired = self.client.zrangebyscore(self._index, '-inf', now - self.ttl)
+        self._remove(expired)
+
+        total = sum(int(v) for v in self.client.hvals(self._size))
+        while total > self.maxsize:
+            items = self.client.zpopmin(self._index)
+            if not items:
+                break
+            key = items[0][0]
+            size = self.client.hget(self._size, key)
+            self._remove([key])
+            total -= int(size or 0)
+
+
+    def _remove(self, keys):
+        """
+        Remove cache entries.
+
+        :param keys: Collection of cache keys.
+        """
+        if keys:
+            pipe = self.client.pipeline()
+            pipe.delete(*keys)
+            pipe.zrem(self._index, *keys)
+            pipe.hdel(self._size, *keys)
+            pipe.execute()
+
+
+def dumps(data):
+    """
+    Serialize GIS data frame into compact binary form.
+
+    The coordinates arrays of GIS series and arrays of other columns are
+    stored in NumPy `.npz` format. The strings of object columns are
+    stored as UTF-8 data, offsets and mask of null values arrays.
+
+    `ValueError` is raised if an object column contains values other than
+    strings and null values.
+
+    :param data: GIS data frame.
+    """
+    header, arrays = native.encode(data)
+    header = numpy.frombuffer(json.dumps(header).encode(), dtype=numpy.uint8)
+    f = io.BytesIO()
+    numpy.savez(f, header, **arrays)
+    return f.getvalue()
+
+
+def loads(data):
+    """
+    Deserialize GIS data frame from compact binary form.
+
+    :param data: Binary string created with :py:func:`dumps`.
+    """
+    arrays = numpy.load(io.BytesIO(data), allow_pickle=False)
+    header = json.loads(arrays['arr_0'].tobytes())
+    return native.decode(header, arrays.__getitem__)
+
+
+# vim: sw=4:et:ai
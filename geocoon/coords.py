@@ -0,0 +1,500 @@
+#
+# GeoCoon - GIS data analysis library based on Pandas and Shapely
+#
+# Copyright (C) 2014 by Artur Wroblewski <wrobell@pld-linux.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Coordinate arrays of GIS geometries.
+
+The functions convert collections of Shapely geometries into contiguous
+arrays of float numbers and vice versa, so GIS series calculations can be
+performed with NumPy.
+
+Coordinates of points are stored in array of `(ndim, n)` shape.
+
+Coordinates of line strings are packed into single array of `(m, ndim)`
+shape. The array of offsets of `(n + 1,)` shape points to the first
+coordinate of each line string, i.e. coordinates of line string `i` are
+`coords[offsets[i]:offsets[i + 1]]`.
+
+Coordinates of polygons are packed into single array of rings
+coordinates. The array of ring offsets points to the first coordinate of
+each ring and the array of offsets points to the first ring of each
+polygon. The first ring of a polygon is its exterior ring.
+"""
+
+import numpy
+import pandas
+from shapely.geometry import Point, LineString, Polygon
+
+
+def is_empty(geom):
+    """
+    Check if geometry is null value or empty geometry.
+
+    Both `None` and Pandas' missing value, i.e. `NaN` created by
+    reindexing, are null values.
+
+    :param geom: Shapely geometry or null value.
+    """
+    return pandas.isna(geom) or geom.is_empty
+
+
+def point_coords(points):
+    """
+    Create array of coordinates of collection of points.
+
+    The array has `(ndim, n)` shape, where `ndim` is 3 if all points have
+    `z` coordinate, otherwise it is 2. Each coordinate is stored in
+    contiguous row of the array.
+
+    The coordinates of null values and empty geometries are NaN.
+
+    :param points: Collection of Shapely points.
+    """
+    data = [None if is_empty(p) else p.coords[0] for p in points]
+    ndim = min((len(c) for c in data if c is not None), default=2)
+    empty = (numpy.nan,) * ndim
+    data = [empty if c is None else c[:ndim] for c in data]
+    coords = numpy.array(data, dtype=numpy.float64).reshape(-1, ndim)
+    return numpy.ascontiguousarray(coords.T)
+
+
+def shape_bounds(shapes):
+    """
+    Create array of bounds of collection of geometries.
+
+    The array has `(n, 4)` shape and each row contains `minx`, `miny`,
+    `maxx` and `maxy` values. The bounds of null values and empty
+    geometries are NaN.
+
+    :param shapes: Collection of Shapely geometries.
+    """
+    empty = (numpy.nan,) * 4
+    data = [empty if is_empty(g) else g.bounds for g in shapes]
+    return numpy.array(data, dtype=numpy.float64).reshape(-1, 4)
+
+
+def packed_bounds(coords, offsets):
+    """
+    Create array of bounds of packed geometries.
+
+    The array has `(n, 4)` shape and each row contains `minx`, `miny`,
+    `maxx` and `maxy` values. The bounds of empty geometries are NaN.
+
+    :param coords: Array of coordinates of `(m, ndim)` shape.
+    :param offsets: Array of offsets of geometries.
+    """
+    bounds = numpy.full((len(offsets) - 1, 4), numpy.nan)
+    idx = numpy.flatnonzero(offsets[:-1] < offsets[1:])
+    if len(idx):
+        start = offsets[idx]
+        for i, f in enumerate((numpy.minimum, numpy.maximum)):
+            bounds[idx, 2 * i] = f.reduceat(coords[:, 0], start)
+            bounds[idx, 2 * i + 1] = f.reduceat(coords[:, 1], start)
+    return bounds
+
+
+def point_shapes(coords):
+    """
+    Create Shapely points from array of coordinates.
+
+    :param coords: Array of coordinates of `(ndim, n)` shape.
+    """
+    return shape_array(Point(c) for c in coords.T.tolist())
+
+
+def line_coords(lines):
+    """
+    Create packed array of coordinates of collection of line strings.
+
+    Tuple of coordinates array and offsets array is returned. The
+    coordinates have 3 dimensions if all line strings have `z`
+    coordinate.
+
+    Null values and empty geometries, i.e. empty geometry collection, have
+    no coordinates.
+
+    :param lines: Collection of Shapely line strings.
+    """
+    empty = numpy.empty((0, 2), dtype=numpy.float64)
+    data = [
+        empty if is_empty(g)
+        else numpy.array(g.coords, dtype=numpy.float64)
+        for g in lines
+    ]
+    return pack_coords(data)
+
+
+def line_shapes(coords, offsets):
+    """
+    Create Shapely line strings from packed array of coordinates.
+
+    :param coords: Array of coordinates of `(m, ndim)` shape.
+    :param offsets: Array of offsets of line strings.
+    """
+    bounds = zip(offsets[:-1], offsets[1:])
+    return shape_array(
+        LineString(coords[s:e]) if s < e else LineString() for s, e in bounds
+    )
+
+
+def pack_coords(data):
+    """
+    Pack collection of coordinates arrays into single array.
+
+    Tuple of coordinates array and offsets array is returned.
+
+    :param data: Collection of coordinates arrays of `(k, ndim)` shape.
+    """
+    data = [c.reshape(-1, c.shape[-1] if c.size else 2) for c in data]
+    ndim = min((c.shape[1] for c in data if len(c)), default=2)
+    counts = [len(c) for c in data]
+
+    offsets = numpy.zeros(len(data) + 1, dtype=numpy.int64)
+    numpy.cumsum(counts, out=offsets[1:])
+    if data:
+        coords = numpy.concatenate([c[:, :ndim] for c in data])
+    else:
+        coords = numpy.empty((0, ndim), dtype=numpy.float64)
+    return coords, offsets
+
+
+def concat_packed(data):
+    """
+    Concatenate packed coordinates of multiple collections of geometries.
+
+    Each item of the collection is a tuple of coordinates array and
+    offsets arrays, i.e. `(coords, offsets)` of line strings or `(coords,
+    ring_offsets, offsets)` of polygons. The offsets are shifted, so they
+    point into the concatenated arrays.
+
+    :param data: Collection of tuples of packed coordinates arrays.
+    """
+    data = list(data)
+    result = [numpy.concatenate([item[0] for item in data])]
+    for k in range(1, len(data[0])):
+        shift = 0
+        parts = [numpy.zeros(1, dtype=numpy.int64)]
+        for item in data:
+            parts.append(item[k][1:] + shift)
+            # number of items of the previous level
+            shift += len(item[k - 1]) - (k > 1)
+        result.append(numpy.concatenate(parts))
+    return tuple(result)
+
+
+def segment_ids(offsets):
+    """
+    Create array of identifiers of packed geometries for each coordinate.
+
+    :param offsets: Array of offsets of packed geometries.
+    """
+    counts = numpy.diff(offsets)
+    return numpy.repeat(numpy.arange(len(counts)), counts)
+
+
+def segment_lengths(coords, offsets):
+    """
+    Calculate 2D length of each packed line.
+
+    :param coords: Array of coordinates of `(m, ndim)` shape.
+    :param offsets: Array of offsets of lines.
+    """
+    ids = segment_ids(offsets)
+    d = numpy.hypot(numpy.diff(coords[:, 0]), numpy.diff(coords[:, 1]))
+    # ignore segments between last and first point of consecutive lines
+    d[ids[1:] != ids[:-1]] = 0
+    return numpy.bincount(ids[1:], weights=d, minlength=len(offsets) - 1)
+
+
+def is_closed(coords, offsets):
+    """
+    Check if each packed line is closed.
+
+    :param coords: Array of coordinates of `(m, ndim)` shape.
+    :param offsets: Array of offsets of lines.
+    """
+    start = offsets[:-1]
+    end = offsets[1:] - 1
+    closed = start < end
+    idx = numpy.flatnonzero(closed)
+    xy = coords[:, :2]
+    closed[idx] = (xy[start[idx]] == xy[end[idx]]).all(axis=1)
+    return closed
+
+
+def simplify_lines(coords, offsets, tolerance):
+    """
+    Simplify packed lines with Douglas-Peucker algorithm.
+
+    The sections of all lines are simplified at once. The farthest point
+    of each section is found with NumPy, then the sections with the point
+    farther than the tolerance are split at the point. Each iteration
+    processes only the points of sections split in previous iteration.
+    The 2D distance is used and, as in GEOS, repeated points are removed
+    from simplified lines, so the result is the same as of Shapely.
+
+    Tuple of coordinates array and offsets array of simplified lines is
+    returned.
+
+    :param coords: Array of coordinates of `(m, ndim)` shape.
+    :param offsets: Array of offsets of lines.
+    :param tolerance: Maximum distance of removed point from simplified
+        line.
+    """
+    counts = numpy.diff(offsets)
+    nonempty = counts > 0
+    keep = numpy.zeros(len(coords), dtype=bool)
+    keep[offsets[:-1][nonempty]] = True
+    keep[offsets[1:][nonempty] - 1] = True
+
+    # the inner points of sections and start and end of their sections
+    x = numpy.ascontiguousarray(coords[:, 0])
+    y = numpy.ascontiguousarray(coords[:, 1])
+    pos = numpy.flatnonzero(~keep)
+    ids = segment_ids(offsets)[pos]
+    start = offsets[:-1][ids]
+    end = offsets[1:][ids] - 1
+    while len(pos):
+        d = _segment_distance(x, y, pos, start, end)
+
+        # first farthest point of each section
+        new = numpy.r_[True, start[1:] != start[:-1]]
+        sid = numpy.cumsum(new) - 1
+        d_max = numpy.maximum.reduceat(d, numpy.flatnonzero(new))
+        k = numpy.flatnonzero(d == d_max[sid])
+        k = k[numpy.r_[True, sid[k[1:]] != sid[k[:-1]]]]
+
+        split = numpy.where(d_max > tolerance, pos[k], -1)
+        keep[split[split >= 0]] = True
+
+        split = split[sid]
+        left = pos < split
+        active = (split >= 0) & (pos != split)
+        end = numpy.where(left, split, end)[active]
+        start = numpy.where(left, start, split)[active]
+        pos = pos[active]
+
+    pos = numpy.flatnonzero(keep)
+    ids = segment_ids(offsets)[pos]
+    repeated = numpy.r_[
+        False,
+        (x[pos[1:]] == x[pos[:-1]]) & (y[pos[1:]] == y[pos[:-1]])
+            & (ids[1:] == ids[:-1])
+    ]
+    # line collapsed into single point keeps its last point
+    size = numpy.bincount(ids[~repeated], minlength=len(counts))
+    last = numpy.r_[ids[1:] != ids[:-1], True]
+    repeated[last & (size[ids] == 1)] = False
+
+    new_offsets = numpy.zeros_like(offsets)
+    numpy.cumsum(
+        numpy.bincount(ids[~repeated], minlength=len(counts)),
+        out=new_offsets[1:]
+    )
+    return coords[pos[~repeated]], new_offsets
+
+
+def polygon_coords(polygons):
+    """
+    Create packed array of coordinates of collection of polygons.
+
+    Tuple of coordinates array, ring offsets array and offsets array is
+    returned.
+
+    :param polygons: Collection of Shapely polygons.
+    """
+    to_array = lambda r: numpy.array(r.coords, dtype=numpy.float64)
+    rings = [
+        [] if is_empty(g) else [g.exterior] + list(g.interiors)
+        for g in polygons
+    ]
+    coords, ring_offsets = pack_coords([to_array(r) for g in rings for r in g])
+
+    offsets = numpy.zeros(len(rings) + 1, dtype=numpy.int64)
+    numpy.cumsum([len(g) for g in rings], out=offsets[1:])
+    return coords, ring_offsets, offsets
+
+
+def polygon_shapes(coords, ring_offsets, offsets):
+    """
+    Create Shapely polygons from packed array of coordinates.
+
+    :param coords: Array of coordinates of `(m, ndim)` shape.
+    :param ring_offsets: Array of offsets of rings.
+    :param offsets: Array of offsets of polygons.
+    """
+    rings = [coords[s:e] for s, e in zip(ring_offsets[:-1], ring_offsets[1:])]
+    return shape_array(
+        Polygon(rings[s], rings[s + 1:e]) if s < e else Polygon()
+        for s, e in zip(offsets[:-1], offsets[1:])
+    )
+
+
+def shape_array(shapes):
+    """
+    Create object array of Shapely geometries.
+
+    The geometries are stored in the array one by one. Assigning
+    collection of geometries to an array at once is very slow as NumPy
+    inspects array interface of each geometry.
+
+    :param shapes: Collection of Shapely geometries.
+    """
+    shapes = list(shapes)
+    data = numpy.empty(len(shapes), dtype=object)
+    for i, g in enumerate(shapes):
+        data[i] = g
+    return data
+
+
+def ring_areas(coords, ring_offsets):
+    """
+    Calculate signed area of each packed ring.
+
+    The area is positive for clockwise rings. The shoelace formula is
+    calculated relative to first point of a ring, in the same way as it is
+    done by GEOS library.
+
+    :param coords: Array of coordinates of `(m, ndim)` shape.
+    :param ring_offsets: Array of offsets of rings.
+    """
+    n = len(ring_offsets) - 1
+    ids = segment_ids(ring_offsets)
+    x = coords[:, 0]
+    y = coords[:, 1]
+
+    # for each ring point i, but first and last one, the term is
+    # (x[i] - x[0]) * (y[i - 1] - y[i + 1])
+    k = numpy.arange(len(coords)) - ring_offsets[ids]
+    idx = numpy.flatnonzero((k > 0) & (k < numpy.diff(ring_offsets)[ids] - 1))
+    x0 = x[ring_offsets[ids[idx]]]
+    terms = (x[idx] - x0) * (y[idx - 1] - y[idx + 1])
+    return numpy.bincount(ids[idx], weights=terms, minlength=n) / 2.0
+
+
+def polygon_areas(coords, ring_offsets, offsets):
+    """
+    Calculate area of each packed polygon.
+
+    :param coords: Array of coordinates of `(m, ndim)` shape.
+    :param ring_offsets: Array of offsets of rings.
+    :param offsets: Array of offsets of polygons.
+    """
+    area = numpy.abs(ring_areas(coords, ring_offsets))
+    # subtract area of interior rings
+    area[_is_interior(offsets)] *= -1
+    ids = segment_ids(offsets)
+    return numpy.bincount(ids, weights=area, minlength=len(offsets) - 1)
+
+
+def polygon_centroids(coords, ring_offsets, offsets):
+    """
+    Calculate centroid of each packed polygon.
+
+    The centroid is calculated using triangles formed by first point of
+    exterior ring and each segment of polygon rings, in the same way as it
+    is done by GEOS library.
+
+    Array of centroids coordinates of `(2, n)` shape is returned. The
+    coordinates of centroids of polygons with zero area are NaN.
+
+    :param coords: Array of coordinates of `(m, ndim)` shape.
+    :param ring_offsets: Array of offsets of rings.
+    :param offsets: Array of offsets of polygons.
+    """
+    n = len(offsets) - 1
+    ring_ids = segment_ids(ring_offsets)
+    poly_ids = segment_ids(offsets)
+
+    # exterior rings are positive if clockwise, interior rings if
+    # counter-clockwise
+    cw = ring_areas(coords, ring_offsets) > 0
+    sign = numpy.where(cw != _is_interior(offsets), 1.0, -1.0)
+
+    # segment i is (p[i], p[i + 1]) of the same ring
+    idx = numpy.flatnonzero(ring_ids[1:] == ring_ids[:-1])
+    ring = ring_ids[idx]
+    poly = poly_ids[ring]
+    p0 = coords[ring_offsets[offsets[poly]]]
+    p1 = coords[idx]
+    p2 = coords[idx + 1]
+
+    c3x = p0[:, 0] + p1[:, 0] + p2[:, 0]
+    c3y = p0[:, 1] + p1[:, 1] + p2[:, 1]
+    area2 = (p1[:, 0] - p0[:, 0]) * (p2[:, 1] - p0[:, 1]) \
+        - (p2[:, 0] - p0[:, 0]) * (p1[:, 1] - p0[:, 1])
+    s_area2 = sign[ring] * area2
+
+    cg3x = numpy.bincount(poly, weights=s_area2 * c3x, minlength=n)
+    cg3y = numpy.bincount(poly, weights=s_area2 * c3y, minlength=n)
+    area_sum2 = numpy.bincount(poly, weights=s_area2, minlength=n)
+
+    result = numpy.full((2, n), numpy.nan)
+    valid = area_sum2 != 0
+    result[0, valid] = cg3x[valid] / 3 / area_sum2[valid]
+    result[1, valid] = cg3y[valid] / 3 / area_sum2[valid]
+    return result
+
+
+def _segment_distance(x, y, pos, start, end):
+    """
+    Calculate 2D distance between points and segments.
+
+    The distance is calculated in the same way as in GEOS, so the same
+    farthest points are found by Douglas-Peucker algorithm.
+
+    :param x: Array of `x` coordinates.
+    :param y: Array of `y` coordinates.
+    :param pos: Positions of the points.
+    :param start: Positions of start points of the segments.
+    :param end: Positions of end points of the segments.
+    """
+    ax = x[start]
+    ay = y[start]
+    dx = x[end] - ax
+    dy = y[end] - ay
+    px = x[pos] - ax
+    py = y[pos] - ay
+    len2 = dx * dx + dy * dy
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        r = (px * dx + py * dy) / len2
+        d = numpy.abs((py * dx - px * dy) / len2) * numpy.sqrt(len2)
+
+    # distance to start or end point of the segment
+    to_a = (r <= 0) | (len2 == 0)
+    d[to_a] = numpy.sqrt(px[to_a] ** 2 + py[to_a] ** 2)
+    to_b = (r >= 1) & ~to_a
+    qx = x[pos[to_b]] - x[end[to_b]]
+    qy = y[pos[to_b]] - y[end[to_b]]
+    d[to_b] = numpy.sqrt(qx * qx + qy * qy)
+    return d
+
+
+def _is_interior(offsets):
+    """
+    Create mask of interior rings of packed polygons.
+
+    :param offsets: Array of offsets of polygons.
+    """
+    mask = numpy.ones(offsets[-1], dtype=bool)
+    mask[offsets[:-1][offsets[:-1] < offsets[1:]]] = False
+    return mask
+
+
+# vim: sw=4:et:ai
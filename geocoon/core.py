@@ -26,14 +26,33 @@ geometries.
 
 from functools import partial
 import logging
+import weakref
 
+import numpy
 import pandas
 from shapely.geometry import Point, LineString, Polygon
+from shapely.geometry.base import BaseGeometry
+from shapely.prepared import prep, PreparedGeometry
+import shapely.ops
+import shapely.wkb
+import shapely.wkt
 
-from .meta import META_POINT, META_LINE_STRING, META_POLYGON
+from . import parallel
+from . import prepared
+from . import coords
+from . import geodesic
+from . import wkb
+from . import wkt
+from .sindex import SpatialIndex
+from .meta import META_POINT, META_LINE_STRING, META_POLYGON, \
+    CONVERSE_PREDICATES
 
 logger = logging.getLogger(__name__)
 
+# maximum average number of vertices of line strings simplified with
+# packed coordinates; Shapely is faster for longer line strings
+SIMPLIFY_MAX_VERTICES = 50
+
  
 #
 # GIS data frame and series definitions
@@ -42,11 +61,265 @@ logger = logging.getLogger(__name__)
 class GeoSeries(pandas.Series):
     """
     Base implementation of GIS series based on Pandas' series.
+
+    The values of vectorized properties are cached. The cache is cleared
+    when GIS series is modified.
+
+    The SRID of geometries is stored in `srid` attribute. It is `None` if
+    spatial reference of geometries is unknown. If not specified, the SRID
+    is taken from `data` parameter when it is GIS series.
     """
+    _metadata = pandas.Series._metadata + ['srid']
+    srid = None
+
+    def __init__(self, *args, srid=None, **kw):
+        super().__init__(*args, **kw)
+        if srid is None:
+            data = args[0] if args else kw.get('data')
+            srid = getattr(data, 'srid', None)
+        self.srid = srid
+
+
+    def clear_cache(self):
+        """
+        Clear cache of values calculated for the GIS series.
+
+        The caches of all GIS series sharing the data, i.e. slices of the
+        GIS series, are cleared as well.
+        """
+        root = _root_array(self.values)
+        for ref, cache in list(_SERIES_CACHE.values()):
+            values = ref()
+            if values is not None and _root_array(values) is root:
+                cache.clear()
+
+
+    @property
+    def sindex(self):
+        """
+        Spatial index of the GIS series.
+
+        The spatial index is created on first access and cached.
+
+        .. seealso:: :py:class:`geocoon.sindex.SpatialIndex`
+        """
+        f = lambda series: SpatialIndex(series.values, series._bounds())
+        return cached_value(self, 'sindex', f)
+
+
+    @property
+    def bounds(self):
+        """
+        Data frame with bounds of geometries of the GIS series.
+
+        The data frame has `minx`, `miny`, `maxx` and `maxy` columns. The
+        bounds of empty geometries are NaN.
+
+        The bounds are calculated on first access and cached.
+        """
+        return pandas.DataFrame(
+            self._bounds(), index=self.index,
+            columns=['minx', 'miny', 'maxx', 'maxy'], copy=True
+        )
+
+
+    @property
+    def cx(self):
+        """
+        Bounding box indexer of the GIS series.
+
+        The indexer selects geometries, which bounding boxes intersect
+        the box specified with coordinates slices, i.e.::
+
+            series.cx[xmin:xmax, ymin:ymax]
+
+        Any of the coordinates can be omitted. GIS series of the same
+        class is returned.
+        """
+        return CoordinateIndexer(self)
+
+
+    def query(self, geom, predicate=None):
+        """
+        Find geometries of the GIS series, which bounding boxes intersect
+        bounding box of the query geometry.
+
+        If predicate is specified, then only the geometries for which the
+        predicate is true are found, i.e. `within` predicate finds
+        geometries within the query geometry.
+
+        Index labels of the geometries are returned.
+
+        :param geom: Query geometry.
+        :param predicate: Optional predicate name.
+        """
+        return self.index[self.sindex.query(self.values, geom, predicate)]
+
+
+    def nearest(self, geom, k=1):
+        """
+        Find `k` geometries of the GIS series nearest to the query
+        geometry.
+
+        Index labels of the geometries ordered by distance are returned.
+
+        :param geom: Query geometry.
+        :param k: Number of geometries to find.
+        """
+        return self.index[self.sindex.nearest(self.values, geom, k)]
+
+
+    def prepare(self, maxsize=None):
+        """
+        Use prepared geometries of the GIS series to evaluate predicates.
+
+        The geometries are prepared on first use and cached. If maximum
+        number of prepared geometries is specified, then least recently
+        used prepared geometries are removed from the cache.
+
+        The prepared geometries are removed when GIS series is modified or
+        its cache is cleared, then the method has to be called again.
+
+        The GIS series is returned.
+
+        :param maxsize: Maximum number of prepared geometries.
+
+        .. seealso:: :py:class:`geocoon.prepared.PreparedCache`
+        """
+        cache = series_cache(self)
+        cache['prepared'] = prepared.PreparedCache(maxsize)
+        return self
+
+
+    def to_wkb(self, hex=False, srid=None):
+        """
+        Create WKB data of geometries of the GIS series.
+
+        The WKB data is created for all geometries at once with NumPy
+        using coordinates arrays of points, line strings and polygons (if
+        packed coordinates of polygons are available).
+
+        Series of WKB binary strings or hex strings is returned.
+
+        :param hex: Create hex strings if true.
+        :param srid: Create EWKB data with SRID if specified.
+        """
+        data = self._encode_wkb(hex, srid)
+        return pandas.Series(data, index=self.index, copy=False)
+
+
+    def to_wkt(self, precision=None):
+        """
+        Create WKT data of geometries of the GIS series.
+
+        The WKT data is created for all geometries at once with NumPy
+        using coordinates arrays of points, line strings and polygons (if
+        packed coordinates of polygons are available). The numbers are
+        formatted with the shortest representation, which reads back to
+        the same value.
+
+        Series of WKT strings is returned.
+
+        :param precision: Number of decimal places of coordinates.
+
+        .. seealso:: :py:func:`geocoon.wkt.format_values`
+        """
+        data = self._encode_wkt(precision)
+        return pandas.Series(data, index=self.index, copy=False)
+
+
+    def to_srid(self, srid):
+        """
+        Transform geometries of the GIS series into another spatial
+        reference system.
+
+        The coordinates of point series, line string series and polygon
+        series are transformed at once with `pyproj` library using
+        coordinates arrays. The geometries of other GIS series are
+        transformed one by one.
+
+        GIS series with `srid` attribute set to the target SRID is returned.
+        Null values of the GIS series are null values of the returned GIS
+        series.
+
+        :param srid: Target SRID.
+        """
+        if self.srid is None:
+            raise ValueError('SRID of GIS series is unknown')
+        transform = _transformer(self.srid, srid)
+        series = self._transform(transform)
+        # geometries created from coordinates arrays are empty for null
+        # values; the coordinates of empty and null geometries are the
+        # same, so the cached coordinates are still valid
+        null = self.isna().values
+        if null.any():
+            series.values[null] = None
+        series.srid = srid
+        return series
+
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.clear_cache()
+
+
+    def _bounds(self):
+        """
+        Get array of bounds of geometries of the GIS series.
+
+        The array is calculated on first access and cached.
+
+        .. seealso:: :py:func:`geocoon.coords.shape_bounds`
+        """
+        return cached_value(self, 'bounds', type(self)._calc_bounds)
+
+
+    def _calc_bounds(self):
+        """
+        Calculate array of bounds of geometries of the GIS series.
+        """
+        return coords.shape_bounds(self.values)
+
+
+    def _encode_wkb(self, hex, srid):
+        """
+        Create array of WKB data of geometries of the GIS series.
+        """
+        return _dumps_wkb(self.values, hex, srid)
+
+
+    def _transform(self, transform):
+        """
+        Transform geometries of the GIS series with Shapely.
+
+        :param transform: Coordinates transformation function.
+        """
+        f = lambda *xyz: transform(numpy.array(xyz))
+        data = [
+            None if pandas.isna(g) else shapely.ops.transform(f, g)
+            for g in self.values
+        ]
+        return self._constructor(data, index=self.index)
+
+
+    def _encode_wkt(self, precision):
+        """
+        Create array of WKT data of geometries of the GIS series.
+        """
+        return _dumps_wkt(self.values, precision)
+
+
+    def _maybe_update_cacher(self, *args, **kw):
+        # called by Pandas when series data is modified in place, i.e. by
+        # indexers or methods with `inplace` parameter
+        super()._maybe_update_cacher(*args, **kw)
+        self.clear_cache()
+
+
     def __getitem__(self, key):
         value = super().__getitem__(key)
         if isinstance(value, pandas.Series):
-            return self._constructor(value)
+            return self._constructor(value, srid=self.srid)
         else:
             return value
 
@@ -54,7 +327,7 @@ class GeoSeries(pandas.Series):
     def __getslice__(self, slice):
         print(slice)
         value = super().__getslice__(slice)
-        return self._constructor(value)
+        return self._constructor(value, srid=self.srid)
 
 
     @property
@@ -66,21 +339,527 @@ class GeoSeries(pandas.Series):
 class PointSeries(GeoSeries):
     """
     GIS point series.
+
+    The coordinates of points are kept in contiguous arrays of float
+    numbers, so access to `x`, `y` and `z` properties is cheap once the
+    arrays are created.
+
+    .. seealso:: :py:func:`geocoon.from_xy`
     """
+    @property
+    def x(self):
+        """
+        Series of `x` coordinates of the points.
+        """
+        return self._coord(0, 'x')
+
+
+    @property
+    def y(self):
+        """
+        Series of `y` coordinates of the points.
+        """
+        return self._coord(1, 'y')
+
+
+    @property
+    def z(self):
+        """
+        Series of `z` coordinates of the points.
+        """
+        return self._coord(2, 'z')
+
+
+    def distance(self, other, n_jobs=None):
+        """
+        Vectorized version of :py:meth:`Point.distance` method.
+
+        The distance between two point series or between point series and
+        a point is calculated with NumPy using arrays of points
+        coordinates. The distance of null value or empty point is `NaN`.
+        Otherwise, the distance is calculated with Shapely.
+
+        The method returns Series object.
+
+        :param other: Point series, geometry or GIS series.
+        :param n_jobs: Number of worker processes used to calculate the
+            distance with Shapely.
+        """
+        if isinstance(other, PointSeries) and len(self) == len(other):
+            c1 = self._coords()
+            c2 = other._coords()
+            data = numpy.hypot(c1[0] - c2[0], c1[1] - c2[1])
+            return pandas.Series(data, index=self.index)
+        elif isinstance(other, Point) and not other.is_empty:
+            c = self._coords()
+            data = numpy.hypot(c[0] - other.x, c[1] - other.y)
+            return pandas.Series(data, index=self.index)
+        else:
+            return _point_distance(self, other, n_jobs=n_jobs)
+
+
+    def geodesic_distance(self, other, method='haversine'):
+        """
+        Calculate geodesic distance in meters between points.
+
+        The coordinates of points are longitude and latitude in degrees,
+        i.e. `SRID 4326`. The distance is calculated with NumPy using
+        arrays of points coordinates.
+
+        The method returns Series object.
+
+        .. seealso:: :py:mod:`geocoon.geodesic`
+
+        :param other: Point series of the same length or a point.
+        :param method: Distance calculation method, `haversine` or `vincenty`.
+        """
+        c1 = self._coords()
+        if isinstance(other, PointSeries) and len(self) == len(other):
+            c2 = other._coords()
+        elif isinstance(other, Point):
+            c2 = numpy.array(other.coords[0][:2]).reshape(2, 1)
+        else:
+            raise ValueError('Point series or point expected')
+        data = geodesic.distance(c1[0], c1[1], c2[0], c2[1], method)
+        return pandas.Series(data, index=self.index)
+
+
+    def step_distance(self, by=None):
+        """
+        Calculate distance between each point and its previous point.
+
+        The distance is calculated with NumPy using array of points
+        coordinates. The distance of first point is `NaN`.
+
+        If grouping is specified with `by` parameter, then previous point
+        is looked up within the group of a point and the distance of first
+        point of each group is `NaN`, i.e. trajectories of multiple
+        vehicles can be processed at once.
+
+        The method returns Series object.
+
+        :param by: Grouping as accepted by :py:meth:`pandas.Series.groupby`.
+        """
+        dx, dy = _step_diff(self, self._coords()[:2], by)
+        return pandas.Series(numpy.hypot(dx, dy), index=self.index)
+
+
+    def step_bearing(self, by=None):
+        """
+        Calculate bearing from previous point to each point.
+
+        The bearing is angle in degrees in `[0, 360)` range measured
+        clockwise from the direction of `y` axis, i.e. north for
+        geographic coordinates. The bearing of first point is `NaN`.
+
+        The method returns Series object.
+
+        .. seealso:: :py:meth:`PointSeries.step_distance`
+
+        :param by: Grouping as accepted by :py:meth:`pandas.Series.groupby`.
+        """
+        dx, dy = _step_diff(self, self._coords()[:2], by)
+        data = numpy.degrees(numpy.arctan2(dx, dy)) % 360
+        return pandas.Series(data, index=self.index)
+
+
+    def speed(self, time_index=None, by=None):
+        """
+        Calculate speed between previous point and each point.
+
+        The speed is step distance divided by time difference between the
+        points. The time difference of date and time values is calculated
+        in seconds. The speed of first point is `NaN`.
+
+        The method returns Series object.
+
+        .. seealso:: :py:meth:`PointSeries.step_distance`
+
+        :param time_index: Time of the points, index of the series by default.
+        :param by: Grouping as accepted by :py:meth:`pandas.Series.groupby`.
+        """
+        time = pandas.Index(self.index if time_index is None else time_index)
+        if len(time) != len(self):
+            raise ValueError('Time index and series length differ')
+
+        if time.dtype.kind in 'mM' or isinstance(time, pandas.DatetimeIndex):
+            values = time.asi8 * 1e-9
+            values[time.isna()] = numpy.nan
+        else:
+            values = time.values.astype(numpy.float64)
+
+        dx, dy = _step_diff(self, self._coords()[:2], by)
+        dt = _step_diff(self, values, by)
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            data = numpy.hypot(dx, dy) / dt
+        return pandas.Series(data, index=self.index)
+
+
+    def _calc_bounds(self):
+        """
+        Calculate array of bounds of points using points coordinates.
+        """
+        xy = self._coords()[:2]
+        return numpy.concatenate([xy, xy]).T
+
+
+    def _encode_wkb(self, hex, srid):
+        """
+        Create array of WKB data of points using points coordinates.
+        """
+        coords = self._coords()
+        data = wkb.encode_points(coords, srid, hex)
+        return _encode_nan(self, data, coords, _dumps_wkb, hex, srid)
+
+
+    def _encode_wkt(self, precision):
+        """
+        Create array of WKT data of points using points coordinates.
+        """
+        coords = self._coords()
+        data = wkt.encode_points(coords, precision)
+        return _encode_nan(self, data, coords, _dumps_wkt, precision)
+
+
+    def _transform(self, transform):
+        """
+        Transform points using points coordinates.
+        """
+        from .factory import from_xy
+        return from_xy(*transform(self._coords()), index=self.index)
+
+
+    def _coords(self):
+        """
+        Get array of points coordinates.
+
+        The array is created on first access and cached.
+
+        .. seealso:: :py:func:`geocoon.coords.point_coords`
+        """
+        return cached_value(self, 'coords', coords.point_coords)
+
+
+    def _coord(self, dim, name):
+        """
+        Create series for specific coordinate of the points.
+
+        The series data is a view of the coordinates array.
+
+        :param dim: Coordinate dimension.
+        :param name: Coordinate name.
+        """
+        coords = self._coords()
+        if dim < len(coords):
+            return pandas.Series(coords[dim], index=self.index, copy=False)
+        else:
+            return cached_attr(self, name)
+
 
 
 
 class LineStringSeries(GeoSeries):
     """
     GIS line string series.
+
+    The coordinates of line strings are packed into single array of float
+    numbers with array of offsets pointing to first coordinate of each
+    line string. The arrays are used to calculate `length`, `is_ring` and
+    `wkb` properties with NumPy.
+
+    .. seealso::
+
+        :py:func:`geocoon.from_line_coords`
+        :py:mod:`geocoon.coords`
     """
+    @property
+    def length(self):
+        """
+        Vectorized version of :py:attr:`LineString.length` property.
+
+        The length is calculated with NumPy using packed coordinates of
+        line strings.
+        """
+        f = lambda series: coords.segment_lengths(*series.to_coords())
+        data = cached_value(self, 'length', f)
+        return pandas.Series(data, index=self.index, copy=True)
+
+
+    @property
+    def is_ring(self):
+        """
+        Vectorized version of :py:attr:`LineString.is_ring` property.
+
+        The closed line strings are found with NumPy using packed
+        coordinates of line strings, then only closed line strings are
+        checked if they are simple.
+        """
+        data = cached_value(self, 'is_ring', _line_is_ring)
+        return pandas.Series(data, index=self.index, copy=True)
+
+
+    @property
+    def wkb(self):
+        """
+        Vectorized version of :py:attr:`LineString.wkb` property.
+
+        The WKB data is created with NumPy using packed coordinates of
+        line strings.
+        """
+        data = cached_value(self, 'wkb', _line_wkb)
+        return pandas.Series(data, index=self.index, copy=True)
+
+
+    def geodesic_length(self, method='haversine'):
+        """
+        Calculate geodesic length in meters of line strings.
+
+        The coordinates of line strings are longitude and latitude in
+        degrees, i.e. `SRID 4326`. The length is calculated with NumPy
+        using packed coordinates of line strings.
+
+        .. seealso:: :py:mod:`geocoon.geodesic`
+
+        :param method: Distance calculation method, `haversine` or `vincenty`.
+        """
+        data = geodesic.line_lengths(*self.to_coords(), method=method)
+        return pandas.Series(data, index=self.index)
+
+
+    def simplify(self, tolerance, preserve_topology=True, n_jobs=None):
+        """
+        Vectorized version of :py:meth:`LineString.simplify` method.
+
+        If topology is not preserved and line strings are short, then all
+        line strings are simplified at once with Douglas-Peucker algorithm
+        using packed coordinates of line strings. The result is the same as
+        of Shapely. Shapely is used for long line strings, i.e. when
+        average number of vertices is greater than
+        :py:data:`SIMPLIFY_MAX_VERTICES`. The vertices are counted without
+        creating packed coordinates, unless the coordinates are cached
+        already.
+
+        The method returns LineStringSeries object.
+
+        .. seealso:: :py:func:`geocoon.coords.simplify_lines`
+
+        :param tolerance: Maximum distance of removed point from
+            simplified line string.
+        :param preserve_topology: Preserve topology of line strings.
+        :param n_jobs: Number of worker processes used to simplify line
+            strings with Shapely.
+        """
+        n = SIMPLIFY_MAX_VERTICES * len(self)
+        if not preserve_topology and _line_vertices(self) <= n:
+            from .factory import from_line_coords
+            line_coords, offsets = coords.simplify_lines(
+                *self.to_coords(), tolerance
+            )
+            series = from_line_coords(line_coords, offsets, index=self.index)
+            series.srid = self.srid
+            return series
+
+        return _line_simplify(
+            self, tolerance, preserve_topology=preserve_topology,
+            n_jobs=n_jobs
+        )
+
+
+    def to_coords(self):
+        """
+        Get packed coordinates of line strings.
+
+        Tuple of coordinates array of `(m, ndim)` shape and offsets array
+        is returned. The arrays are created on first access and cached.
+
+        .. seealso:: :py:func:`geocoon.coords.line_coords`
+        """
+        return cached_value(self, 'coords', coords.line_coords)
+
+
+    def _calc_bounds(self):
+        """
+        Calculate array of bounds of line strings.
+
+        Packed coordinates of line strings are used if available.
+        """
+        if 'coords' in series_cache(self):
+            return coords.packed_bounds(*self.to_coords())
+        else:
+            return super()._calc_bounds()
+
+
+    def _encode_wkb(self, hex, srid):
+        """
+        Create array of WKB data of line strings using packed coordinates.
+        """
+        line_coords, offsets = self.to_coords()
+        data = wkb.encode_lines(line_coords, offsets, srid, hex)
+        return _encode_empty(self, data, offsets, _dumps_wkb, hex, srid)
+
+
+    def _encode_wkt(self, precision):
+        """
+        Create array of WKT data of line strings using packed coordinates.
+        """
+        line_coords, offsets = self.to_coords()
+        data = wkt.encode_lines(line_coords, offsets, precision)
+        return _encode_empty(self, data, offsets, _dumps_wkt, precision)
+
+
+    def _transform(self, transform):
+        """
+        Transform line strings using packed coordinates.
+        """
+        from .factory import from_line_coords
+        line_coords, offsets = self.to_coords()
+        line_coords = transform(line_coords.T).T
+        return from_line_coords(line_coords, offsets, index=self.index)
+
 
 
 
 class PolygonSeries(GeoSeries):
     """
     GIS polygon series.
+
+    If packed coordinates of polygons are available, then `area` and
+    `centroid` properties are calculated with NumPy.
+
+    .. seealso::
+
+        :py:func:`geocoon.from_polygon_coords`
+        :py:mod:`geocoon.coords`
     """
+    @property
+    def area(self):
+        """
+        Vectorized version of :py:attr:`Polygon.area` property.
+
+        The area is calculated with NumPy if packed coordinates of
+        polygons are available.
+        """
+        if 'coords' in series_cache(self):
+            f = lambda series: coords.polygon_areas(*series.to_coords())
+            data = cached_value(self, 'area', f)
+            return pandas.Series(data, index=self.index, copy=True)
+        else:
+            return cached_attr(self, 'area')
+
+
+    @property
+    def centroid(self):
+        """
+        Vectorized version of :py:attr:`Polygon.centroid` property.
+
+        The centroids are calculated with NumPy if packed coordinates of
+        polygons are available.
+        """
+        if 'coords' in series_cache(self):
+            data = cached_value(self, 'centroid', _polygon_centroid)
+            return pandas.Series(data, index=self.index, copy=True)
+        else:
+            return cached_attr(self, 'centroid')
+
+
+    def to_coords(self):
+        """
+        Get packed coordinates of polygons.
+
+        Tuple of coordinates array of `(m, ndim)` shape, ring offsets
+        array and offsets array is returned. The arrays are created on
+        first access and cached.
+
+        .. seealso:: :py:func:`geocoon.coords.polygon_coords`
+        """
+        return cached_value(self, 'coords', coords.polygon_coords)
+
+
+    def _calc_bounds(self):
+        """
+        Calculate array of bounds of polygons.
+
+        Packed coordinates of polygons are used if available.
+        """
+        if 'coords' in series_cache(self):
+            poly_coords, ring_offsets, offsets = self.to_coords()
+            return coords.packed_bounds(poly_coords, ring_offsets[offsets])
+        else:
+            return super()._calc_bounds()
+
+
+    def _encode_wkb(self, hex, srid):
+        """
+        Create array of WKB data of polygons.
+
+        Packed coordinates of polygons are used if available.
+        """
+        if 'coords' in series_cache(self):
+            packed = self.to_coords()
+            data = wkb.encode_polygons(*packed, srid, hex)
+            f = _dumps_wkb
+            return _encode_empty(self, data, packed[2], f, hex, srid)
+        else:
+            return super()._encode_wkb(hex, srid)
+
+
+    def _encode_wkt(self, precision):
+        """
+        Create array of WKT data of polygons.
+
+        Packed coordinates of polygons are used if available.
+        """
+        if 'coords' in series_cache(self):
+            packed = self.to_coords()
+            data = wkt.encode_polygons(*packed, precision)
+            f = _dumps_wkt
+            return _encode_empty(self, data, packed[2], f, precision)
+        else:
+            return super()._encode_wkt(precision)
+
+
+    def _transform(self, transform):
+        """
+        Transform polygons using packed coordinates.
+        """
+        from .factory import from_polygon_coords
+        poly_coords, ring_offsets, offsets = self.to_coords()
+        poly_coords = transform(poly_coords.T).T
+        return from_polygon_coords(
+            poly_coords, ring_offsets, offsets, index=self.index
+        )
+
+
+
+
+class CoordinateIndexer(object):
+    """
+    Bounding box indexer of GIS series.
+
+    .. seealso:: :py:attr:`GeoSeries.cx`
+    """
+    def __init__(self, series):
+        """
+        Create bounding box indexer.
+
+        :param series: GIS series.
+        """
+        self.series = series
+
+
+    def __getitem__(self, key):
+        xs, ys = key
+        if not isinstance(xs, slice) or not isinstance(ys, slice):
+            raise TypeError('Coordinates slices expected')
+
+        bounds = self.series._bounds()
+        mask = numpy.ones(len(bounds), dtype=bool)
+        for s, i in ((xs, 0), (ys, 1)):
+            if s.start is not None:
+                mask &= bounds[:, i + 2] >= s.start
+            if s.stop is not None:
+                mask &= bounds[:, i] <= s.stop
+        return self.series[mask]
 
 
 
@@ -95,7 +874,8 @@ class GeoDataFrame(pandas.DataFrame):
         Create GIS data frame.
 
         Overrides Pandas' data frame constructor to determine, which
-        columns are GIS series.
+        columns are GIS series and what is SRID of their geometries. The
+        cache of each GIS series is kept, see :py:meth:`_copy_cache`.
 
         .. seealso:: `pandas.DataFrame`
 
@@ -103,11 +883,14 @@ class GeoDataFrame(pandas.DataFrame):
         super().__init__(data, *args, **kw)
 
         self._geom_columns = {}
+        self._geom_srid = {}
 
         if isinstance(data, dict):
             for k, col in data.items():
                 if isinstance(col, GeoSeries):
                     self._geom_columns[k] = type(col)
+                    self._geom_srid[k] = col.srid
+                    self._copy_cache(k, col)
         else:
             logger.warn('Non-dictionary data argument, cannot detect GIS data')
 
@@ -120,7 +903,76 @@ class GeoDataFrame(pandas.DataFrame):
         super().__setitem__(key, value)
         if isinstance(value, GeoSeries):
             self._geom_columns[key] = type(value)
- 
+            self._geom_srid[key] = value.srid
+            self._copy_cache(key, value)
+
+
+    def _copy_cache(self, key, series):
+        """
+        Copy cache of GIS series to the GIS series of data frame column.
+
+        Pandas copies data of a series stored in a data frame, so the
+        cache, i.e. coordinates arrays, would be lost. The cache is copied
+        only if the column has the same index as the GIS series, so the
+        column contains the same geometries in the same order.
+
+        :param key: Column name.
+        :param series: GIS series stored in the column.
+        """
+        cache = series_cache(series)
+        if cache:
+            col = self[key]
+            if isinstance(col, GeoSeries) and col.index.equals(series.index):
+                series_cache(col).update(cache)
+
+
+    def to_sql(self, name, con, schema=None, if_exists='fail', index=True,
+            index_label=None, chunksize=10000, srid=None):
+        """
+        Write GIS data frame into PostgreSQL table using binary COPY.
+
+        .. seealso:: `geocoon.sql.to_sql`
+        """
+        from .sql import to_sql
+        to_sql(
+            self, name, con, schema=schema, if_exists=if_exists, index=index,
+            index_label=index_label, chunksize=chunksize, srid=srid
+        )
+
+
+    def to_geocoon(self, path):
+        """
+        Write GIS data frame in native columnar file format.
+
+        .. seealso:: `geocoon.native.to_geocoon`
+        """
+        from .native import to_geocoon
+        to_geocoon(self, path)
+
+
+    def to_arrow(self, encoding='wkb', index=None):
+        """
+        Convert GIS data frame into Arrow table.
+
+        .. seealso:: `geocoon.arrow.to_arrow`
+        """
+        from .arrow import to_arrow
+        return to_arrow(self, encoding=encoding, index=index)
+
+
+    def to_parquet(self, path, encoding='wkb', index=None,
+            row_group_size=None):
+        """
+        Write GIS data frame into Parquet file.
+
+        .. seealso:: `geocoon.arrow.to_parquet`
+        """
+        from .arrow import to_parquet
+        to_parquet(
+            self, path, encoding=encoding, index=index,
+            row_group_size=row_group_size
+        )
+
 
     @property
     def _constructor(self):
@@ -132,6 +984,7 @@ class GeoDataFrame(pandas.DataFrame):
             obj = self.__class__(*args, **kw)
             # copy the geometry columns information
             obj._geom_columns = self._geom_columns.copy()
+            obj._geom_srid = self._geom_srid.copy()
             # do we need the below?
             #for col in obj.columns:
             #    if col not in obj.columns:
@@ -145,6 +998,42 @@ class GeoDataFrame(pandas.DataFrame):
 # GIS data frames and series adaptation functions
 #
 
+# cache of data calculated for GIS series; the key is identity of series
+# values array, so all series sharing the data share the cache
+_SERIES_CACHE = {}
+
+def series_cache(series):
+    """
+    Get cache of data calculated for GIS series.
+
+    The cache is a dictionary, which is removed when values array of the
+    GIS series is garbage collected.
+
+    :param series: GIS series.
+    """
+    values = series.values
+    key = id(values)
+    item = _SERIES_CACHE.get(key)
+    if item is None or item[0]() is not values:
+        def remove(ref):
+            if _SERIES_CACHE.get(key, (None,))[0] is ref:
+                del _SERIES_CACHE[key]
+
+        item = _SERIES_CACHE[key] = (weakref.ref(values, remove), {})
+    return item[1]
+
+
+def _root_array(values):
+    """
+    Get array owning the data of values array of GIS series.
+
+    :param values: Values array of GIS series.
+    """
+    while isinstance(values.base, numpy.ndarray):
+        values = values.base
+    return values
+
+
 def wrap_df_method(method):
     """
     Wrap GeoDataFrame method to support GIS data frames and series.
@@ -154,10 +1043,11 @@ def wrap_df_method(method):
         if isinstance(v, pandas.DataFrame):
             df = GeoDataFrame(v, index=v.index)
             df._geom_columns = self._geom_columns.copy()
+            df._geom_srid = self._geom_srid.copy()
             return df
         elif isinstance(key, str) and key in self._geom_columns:
             cls = self._geom_columns[key]
-            return cls(v, index=self.index)
+            return cls(v, index=self.index, srid=self._geom_srid.get(key))
         else:
             return v
     return f
@@ -176,8 +1066,112 @@ def fetch_attr(series, name):
     """
     data = [getattr(obj, name) for obj in series]
     return pandas.Series(data, index=series.index)
+
+
+def cached_value(series, name, f):
+    """
+    Get value calculated for GIS series and cache it.
+
+    The value is calculated on first access only.
+
+    :param series: GIS series.
+    :param name: Name of the value.
+    :param f: Function calculating the value for GIS series.
+    """
+    value = series_cache(series).get(name)
+    if value is None:
+        value = set_cached_value(series, name, f(series))
+    return value
+
+
+def set_cached_value(series, name, value):
+    """
+    Store value calculated for GIS series in its cache.
+
+    The cached arrays are made read-only, so they cannot be modified by
+    accident, i.e. via views of the arrays. The value is returned.
+
+    :param series: GIS series.
+    :param name: Name of the value.
+    :param value: Array or tuple of arrays.
+    """
+    series_cache(series)[name] = value
+    for v in (value if isinstance(value, tuple) else (value,)):
+        if isinstance(v, numpy.ndarray):
+            v.flags.writeable = False
+    return value
+
+
+def cached_attr(series, name):
+    """
+    Create series using attribute value of each object stored in the
+    GIS series and cache the values.
+
+    The values are fetched on first access only.
+
+    :param series: GIS series.
+    :param name: Attribute name.
+
+    .. seealso:: :py:func:`fetch_attr`
+    """
+    f = lambda series: fetch_attr(series, name).values
+    data = cached_value(series, name, f)
+    return pandas.Series(data, index=series.index, copy=True)
  
  
+def call_method(gis, method, shapes, other, args, kw):
+    """
+    Call Shapely geometry method for each geometry in a collection.
+
+    If the `other` parameter is a geometry, then it is used as first
+    parameter of each method call. Prepared geometry is used in such case
+    for predicates supported by prepared geometries.
+
+    List of values returned by the method calls is returned.
+
+    :param gis: Shapely geometry class.
+    :param method: Method name.
+    :param shapes: Collection of geometries.
+    :param other: Null, geometry or collection of geometries being first
+        parameter of the method.
+    :param args: Method positional parameters.
+    :param kw: Method keyword parameters.
+    """
+    mcall = getattr(gis, method)
+    if other is None:
+        return [mcall(s, *args, **kw) for s in shapes]
+    elif isinstance(other, BaseGeometry):
+        # s.predicate(other) is equivalent of other.converse(s)
+        converse = CONVERSE_PREDICATES.get(method)
+        if converse and hasattr(PreparedGeometry, converse) \
+                and not args and not kw:
+            pcall = getattr(prep(other), converse)
+            return [pcall(s) for s in shapes]
+        else:
+            return [mcall(s, other, *args, **kw) for s in shapes]
+    else:
+        return [mcall(s, o, *args, **kw) for s, o in zip(shapes, other)]
+
+
+def as_wkb(shapes):
+    """
+    Create WKB data of geometries.
+
+    The cached `wkb` property is used for GIS series. WKB binary string is
+    returned for single geometry.
+
+    :param shapes: GIS series, collection of geometries or geometry.
+    """
+    if isinstance(shapes, GeoSeries):
+        return shapes.wkb.values
+    elif isinstance(shapes, BaseGeometry):
+        return shapes.wkb
+    else:
+        data = numpy.empty(len(shapes), dtype=object)
+        data[:] = [g.wkb for g in shapes]
+        return data
+
+ 
 def adapt_attr(cls, gis, name):
     """
     Adapt GIS series to return series using attribute value of each object
@@ -187,10 +1181,11 @@ def adapt_attr(cls, gis, name):
     :param gis: Shapely geometry class.
     :param name: Attribute name.
     """
-    f = partial(fetch_attr, name=name)
+    f = partial(cached_attr, name=name)
     f.__doc__ = 'Vectorized version of :py:attr:`{}.{}` property.'.format(
         gis.__qualname__, name
     )
+    f.__doc__ += '\n\nThe property value is cached.'
     setattr(cls, name, property(f))
 
  
@@ -221,15 +1216,38 @@ def create_series_method(cls, gis, method, meta):
         series_cls = MAP_GEOM[meta.returns_geom]
 
     # Shapely geometry method call to be adapted
-    mcall = getattr(gis, method)
+    mcall = partial(call_method, gis, method)
 
-    def f_geom(self, other, *args, **kw):
-        data = (mcall(s, o, *args, **kw) for s, o in zip(self, other))
-        return series_cls(data, index=self.index)
+    # GIS series returned by method keeps SRID of the GIS series
+    keep_srid = issubclass(series_cls, GeoSeries)
 
-    def f_non_geom(self, *args, **kw):
-        data = (mcall(s, *args, **kw) for s in self)
-        return series_cls(data, index=self.index)
+    def f_geom(self, other, *args, n_jobs=None, **kw):
+        n_jobs = parallel.get_n_jobs(n_jobs)
+        if n_jobs > 1:
+            data = parallel.call(
+                mcall, self.wkb.values, as_wkb(other), args, kw,
+                bool(returns_geom), n_jobs
+            )
+        elif method in prepared.PREDICATES and not args and not kw \
+                and 'prepared' in series_cache(self):
+            cache = series_cache(self)['prepared']
+            data = cache.call(self.values, method, other)
+        else:
+            data = mcall(self, other, args, kw)
+        srid = {'srid': self.srid} if keep_srid else {}
+        return series_cls(data, index=self.index, **srid)
+
+    def f_non_geom(self, *args, n_jobs=None, **kw):
+        n_jobs = parallel.get_n_jobs(n_jobs)
+        if n_jobs > 1:
+            data = parallel.call(
+                mcall, self.wkb.values, None, args, kw, bool(returns_geom),
+                n_jobs
+            )
+        else:
+            data = mcall(self, None, args, kw)
+        srid = {'srid': self.srid} if keep_srid else {}
+        return series_cls(data, index=self.index, **srid)
 
     doc = 'Vectorized version of :py:meth:`{}.{}` method.'.format(
         gis.__qualname__, method
@@ -237,7 +1255,8 @@ def create_series_method(cls, gis, method, meta):
     if first_is_geom:
         f = f_geom
         f.__doc__ = doc + '\n\n' \
-            + 'The `other` parameter of the method is GIS series object.'
+            + 'The `other` parameter of the method is GIS series object' \
+            + ' or a geometry, which is used for each object in the series.'
     else:
         f = f_non_geom
         f.__doc__ = doc
@@ -245,6 +1264,9 @@ def create_series_method(cls, gis, method, meta):
     f.__doc__ += '\n\nThe method returns {} object.'.format(
         series_cls.__qualname__
     )
+    f.__doc__ += '\n\nThe `n_jobs` parameter is number of worker' \
+        ' processes used to execute the method.' \
+        '\n\n.. seealso:: :py:mod:`geocoon.parallel`'
     return f
  
  
@@ -257,7 +1279,9 @@ def adapt_series(cls, gis, gis_meta):
     :param gis_meta: GIS object class metadata.
     """
     for name, meta in gis_meta.items():
-        attr = getattr(gis, name)
+        if name in cls.__dict__:
+            # GIS series class provides its own implementation
+            continue
         if meta.is_property:
             adapt_attr(cls, gis, name)
         else:
@@ -287,6 +1311,206 @@ MAP_GEOM = {
 adapt_series(PointSeries, Point, META_POINT)
 adapt_series(LineStringSeries, LineString, META_LINE_STRING)
 adapt_series(PolygonSeries, Polygon, META_POLYGON)
+
+def _line_is_ring(series):
+    """
+    Check if each line string of GIS series is a ring.
+
+    :param series: GIS line string series.
+    """
+    data = coords.is_closed(*series.to_coords())
+    idx = numpy.flatnonzero(data)
+    data[idx] = [g.is_simple for g in series.values[idx]]
+    return data
+
+
+def _line_vertices(series):
+    """
+    Get number of vertices of line strings of GIS series.
+
+    The number of vertices is counted with Shapely if packed coordinates
+    of line strings are not cached.
+
+    :param series: GIS line string series.
+    """
+    value = series_cache(series).get('coords')
+    if value is None:
+        values = series.values
+        return sum(0 if coords.is_empty(g) else len(g.coords) for g in values)
+    return len(value[0])
+
+
+def _line_wkb(series):
+    """
+    Create WKB data of line strings of GIS series.
+
+    :param series: GIS line string series.
+    """
+    return series._encode_wkb(False, None)
+
+
+def _encode_empty(series, data, offsets, f, *args):
+    """
+    Encode empty geometries of GIS series with Shapely.
+
+    The array of encoded geometries is returned.
+
+    :param series: GIS series.
+    :param data: Array of encoded geometries.
+    :param offsets: Array of offsets of packed geometries.
+    :param f: Shapely based encoder.
+    :param args: Encoder parameters.
+    """
+    idx = numpy.flatnonzero(offsets[:-1] == offsets[1:])
+    if len(idx):
+        data[idx] = f(series.values[idx], *args)
+    return data
+
+
+def _encode_nan(series, data, coords, f, *args):
+    """
+    Encode null values and empty geometries of GIS point series with
+    Shapely.
+
+    The points with NaN coordinates are encoded with Shapely, null values
+    are encoded as `None`. The array of encoded geometries is returned.
+
+    :param series: GIS point series.
+    :param data: Array of encoded points.
+    :param coords: Array of points coordinates.
+    :param f: Shapely based encoder.
+    :param args: Encoder parameters.
+    """
+    idx = numpy.flatnonzero(numpy.isnan(coords).any(axis=0))
+    if len(idx):
+        data[idx] = f(series.values[idx], *args)
+    return data
+
+
+def _dumps_wkb(shapes, hex, srid):
+    """
+    Create array of WKB data of geometries with Shapely.
+
+    :param shapes: Collection of geometries.
+    :param hex: Create hex strings if true.
+    :param srid: Create EWKB data with SRID if specified.
+    """
+    data = numpy.empty(len(shapes), dtype=object)
+    data[:] = [
+        None if pandas.isna(g) else shapely.wkb.dumps(g, hex=hex, srid=srid)
+        for g in shapes
+    ]
+    return data
+
+
+def _dumps_wkt(shapes, precision):
+    """
+    Create array of WKT data of geometries with Shapely.
+
+    :param shapes: Collection of geometries.
+    :param precision: Number of decimal places of coordinates.
+    """
+    rp = -1 if precision is None else precision
+    data = numpy.empty(len(shapes), dtype=object)
+    data[:] = [
+        None if pandas.isna(g)
+        else shapely.wkt.dumps(g, rounding_precision=rp, trim=True)
+        for g in shapes
+    ]
+    return data
+
+
+def _polygon_centroid(series):
+    """
+    Calculate centroid of each polygon of GIS series.
+
+    Centroids of polygons with zero area are calculated by Shapely.
+
+    :param series: GIS polygon series.
+    """
+    centroids = coords.polygon_centroids(*series.to_coords())
+    data = coords.point_shapes(centroids)
+    idx = numpy.flatnonzero(numpy.isnan(centroids[0]))
+    data[idx] = [g.centroid for g in series.values[idx]]
+    return data
+
+
+def _previous_points(series, by):
+    """
+    Find position of previous point of each point of GIS point series.
+
+    The position of a point without previous point is `-1`. If grouping
+    is specified, then the previous point is looked up within the group of
+    a point, using order of points in the series.
+
+    :param series: GIS point series.
+    :param by: Grouping as accepted by :py:meth:`pandas.Series.groupby`.
+    """
+    n = len(series)
+    if by is None:
+        return numpy.arange(-1, n - 1)
+
+    ids = series.groupby(by, sort=False).ngroup().values
+    valid = ~numpy.isnan(ids)
+    pos = numpy.flatnonzero(valid)
+    pos = pos[numpy.argsort(ids[valid], kind='stable')]
+
+    # points of a group are contiguous in `pos` array
+    same = ids[pos[1:]] == ids[pos[:-1]]
+    prev = numpy.full(n, -1)
+    prev[pos[1:][same]] = pos[:-1][same]
+    return prev
+
+
+def _step_diff(series, values, by):
+    """
+    Calculate difference between values of each point of GIS point series
+    and values of its previous point.
+
+    The difference for a point without previous point is `NaN`.
+
+    :param series: GIS point series.
+    :param values: Array of values with last dimension of series length.
+    :param by: Grouping as accepted by :py:meth:`pandas.Series.groupby`.
+    """
+    prev = _previous_points(series, by)
+    data = values - values[..., prev]
+    data[..., prev == -1] = numpy.nan
+    return data
+
+
+def _transformer(source, target):
+    """
+    Create function transforming coordinates between spatial reference
+    systems with `pyproj` library.
+
+    The function accepts and returns array of coordinates of `(ndim, n)`
+    shape.
+
+    :param source: Source SRID.
+    :param target: Target SRID.
+    """
+    try:
+        from pyproj import Transformer
+    except ImportError as ex:
+        raise ImportError('pyproj is required for coordinates transformation') \
+            from ex
+
+    transformer = Transformer.from_crs(
+        'EPSG:{:d}'.format(source), 'EPSG:{:d}'.format(target), always_xy=True
+    )
+    return lambda xyz: numpy.array(transformer.transform(*xyz))
+
+
+# generic implementation of point distance for non-point series
+_point_distance = create_series_method(
+    PointSeries, Point, 'distance', META_POINT['distance']
+)
+
+# implementation of line string simplification preserving topology
+_line_simplify = create_series_method(
+    LineStringSeries, LineString, 'simplify', META_LINE_STRING['simplify']
+)
  
 
 # vim: sw=4:et:ai
@@ -23,44 +23,217 @@ WKB data.
 """
 
 from functools import partial
+from itertools import islice
 
+import numpy
 import pandas
 from pandas.core.groupby import SeriesGroupBy
 import shapely.wkb
 import shapely.geometry
+from shapely.geometry import GeometryCollection
+from shapely.geometry.base import BaseGeometry
 
 import geocoon.core
+from .coords import point_shapes, line_shapes, polygon_shapes, is_closed, \
+    segment_ids, shape_array
+from .wkb import WKB_POINT, WKB_LINE_STRING, WKB_POLYGON, to_bytes, decode, \
+    read_srid
  
-def from_shapes(shapes, index=None, cls=None):
+# number of geometries processed at once by `from_shapes` function
+CHUNK_SIZE = 2 ** 16
+
+def from_shapes(shapes, index=None, cls=None, mixed='raise'):
     """
     Create a GIS series from collection of GIS shapes.
 
+    The collection is consumed in chunks of geometries, so an iterator of
+    geometries is not loaded into memory at once before the GIS series
+    data is created.
+
     If GIS series class is not specified, then it is determined from the
-    class of first geometry in the collection.
+    class of first geometry in the collection. The class of each geometry
+    is checked while the collection is consumed. If there are geometries
+    of different classes, then `ValueError` is raised or, if `mixed`
+    parameter is `generic`, generic GIS series is created, see
+    :py:class:`geocoon.core.GeoSeries`. Null values and empty geometry
+    collections are allowed in GIS series of any class.
+
+    Generic GIS series is created for empty collection if GIS series
+    class is not specified.
 
     :param shapes: Collection of shapes.
     :param index: Series index.
     :param cls: GIS series class.
+    :param mixed: Action on geometries of different classes, `raise` or
+        `generic`.
     """
-    if not cls:
-        shapes = tuple(shapes)
-        n = shapes[0].__class__.__name__
+    if mixed not in ('raise', 'generic'):
+        raise ValueError('Invalid mixed geometries action: {}'.format(mixed))
+
+    generic = cls is geocoon.core.GeoSeries
+    geom_cls = None
+    if cls is not None and not generic:
+        geom_cls = getattr(shapely.geometry, cls.__name__[:-len('Series')])
+
+    shapes = iter(shapes)
+    chunks = []
+    while True:
+        chunk = list(islice(shapes, CHUNK_SIZE))
+        if not chunk:
+            break
+
+        types = set(map(type, chunk))
+        types.discard(type(None))
+        # Shapely creates empty geometry collection for empty geometries
+        # of any type, i.e. when loading WKB data
+        if GeometryCollection in types and all(
+                g.is_empty for g in chunk if type(g) is GeometryCollection):
+            types.discard(GeometryCollection)
+        invalid = [t for t in types if not issubclass(t, BaseGeometry)]
+        if invalid:
+            raise ValueError('Not a geometry: {}'.format(invalid[0].__name__))
+
+        if geom_cls is None and types:
+            geom_cls = next(type(g) for g in chunk if type(g) in types)
+        if not generic and types - {geom_cls}:
+            if mixed == 'raise' or cls is not None:
+                names = sorted(t.__name__ for t in types | {geom_cls})
+                raise ValueError(
+                    'Mixed geometries: {}'.format(', '.join(names))
+                )
+            generic = True
+        chunks.append(shape_array(chunk))
+
+    data = numpy.concatenate(chunks) if chunks \
+        else numpy.empty(0, dtype=object)
+
+    if cls is None and (generic or geom_cls is None):
+        cls = geocoon.core.GeoSeries
+    elif cls is None:
+        n = geom_cls.__name__
         name = n + 'Series'
-        if not hasattr(geocoon.core, name):
+        if hasattr(geocoon.core, name):
+            cls = getattr(geocoon.core, name)
+        elif mixed == 'generic':
+            cls = geocoon.core.GeoSeries
+        else:
             raise ValueError('The {} geometry not supported yet'.format(n))
-        cls = getattr(geocoon.core, name)
-    return cls(shapes, index=index)
-    
+    return cls(data, index=index)
+
 
-def from_wkb(wkb, index=None):
+def from_wkb(wkb, index=None, mixed='raise'):
     """
     Create a GIS series from collection of WKB binary strings.
-    
-    :param wkb: Collection of WKB binary strings.
+
+    The WKB data of points, line strings and polygons is decoded into
+    coordinate arrays with NumPy at once, see
+    :py:func:`geocoon.wkb.decode`. The data of other geometries is loaded
+    with Shapely.
+
+    The SRID of GIS series is set if all EWKB binary strings have the same
+    SRID.
+
+    If there are geometries of different classes, then `ValueError` is
+    raised or, if `mixed` parameter is `generic`, generic GIS series is
+    created, see :py:func:`from_shapes`.
+
+    :param wkb: Collection of WKB binary strings or hex strings.
+    :param index: Series index.
+    :param mixed: Action on geometries of different classes, `raise` or
+        `generic`.
+    """
+    data = to_bytes(wkb)
+    decoded = decode(data)
+    if decoded is None:
+        shapes = (shapely.wkb.loads(v) for v in data)
+        series = from_shapes(shapes, index=index, mixed=mixed)
+        series.srid = _common_srid(read_srid(data))
+        return series
+
+    geom_type, coords, srid = decoded
+    f = _FROM_COORDS[geom_type]
+    series = f(*coords, index=index)
+    series.srid = _common_srid(srid)
+    return series
+
+
+def from_xy(x, y, z=None, index=None):
+    """
+    Create a GIS point series from arrays of coordinates.
+
+    The coordinates are stored as contiguous arrays of float numbers and
+    are used by the point series for vectorized calculations.
+
+    :param x: Collection of `x` coordinates.
+    :param y: Collection of `y` coordinates.
+    :param z: Optional collection of `z` coordinates.
     :param index: Series index.
     """
-    shapes = (shapely.wkb.loads(v, isinstance(v, str)) for v in wkb)
-    return from_shapes(shapes, index=index)
+    data = (x, y) if z is None else (x, y, z)
+    coords = numpy.array(data, dtype=numpy.float64)
+    if coords.ndim != 2:
+        raise ValueError('Coordinates have to be one dimensional arrays')
+
+    series = geocoon.core.PointSeries(point_shapes(coords), index=index)
+    geocoon.core.set_cached_value(series, 'coords', coords)
+    return series
+
+
+def from_line_coords(coords, offsets, index=None):
+    """
+    Create a GIS line string series from packed array of coordinates.
+
+    The coordinates of line string `i` are `coords[offsets[i]:offsets[i +
+    1]]`. The arrays are used by the line string series for vectorized
+    calculations.
+
+    :param coords: Array of coordinates of `(m, ndim)` shape.
+    :param offsets: Array of offsets of line strings.
+    :param index: Series index.
+
+    .. seealso:: :py:mod:`geocoon.coords`
+    """
+    coords = numpy.ascontiguousarray(coords, dtype=numpy.float64)
+    offsets = numpy.asarray(offsets, dtype=numpy.int64)
+    if coords.ndim != 2 or not _valid_offsets(offsets, len(coords)):
+        raise ValueError('Invalid packed coordinates')
+
+    series = geocoon.core.LineStringSeries(
+        line_shapes(coords, offsets), index=index
+    )
+    geocoon.core.set_cached_value(series, 'coords', (coords, offsets))
+    return series
+
+
+def from_polygon_coords(coords, ring_offsets, offsets, index=None):
+    """
+    Create a GIS polygon series from packed array of coordinates.
+
+    The coordinates of ring `i` are `coords[ring_offsets[i]:ring_offsets[i
+    + 1]]`. The rings of polygon `j` are `ring_offsets[offsets[j]:offsets[j
+    + 1]]`, the first ring is exterior ring of the polygon. The arrays are
+    used by the polygon series for vectorized calculations.
+
+    :param coords: Array of coordinates of `(m, ndim)` shape.
+    :param ring_offsets: Array of offsets of rings.
+    :param offsets: Array of offsets of polygons.
+    :param index: Series index.
+
+    .. seealso:: :py:mod:`geocoon.coords`
+    """
+    coords = numpy.ascontiguousarray(coords, dtype=numpy.float64)
+    ring_offsets = numpy.asarray(ring_offsets, dtype=numpy.int64)
+    offsets = numpy.asarray(offsets, dtype=numpy.int64)
+    if coords.ndim != 2 or not _valid_offsets(ring_offsets, len(coords)) \
+            or not _valid_offsets(offsets, len(ring_offsets) - 1):
+        raise ValueError('Invalid packed coordinates')
+
+    series = geocoon.core.PolygonSeries(
+        polygon_shapes(coords, ring_offsets, offsets), index=index
+    )
+    packed = coords, ring_offsets, offsets
+    geocoon.core.set_cached_value(series, 'coords', packed)
+    return series
 
 
 def as_line_string(series):
@@ -70,10 +243,16 @@ def as_line_string(series):
     The method works for grouped GIS series - for each grouping key
     a line string is created.
 
+    The line strings of grouped point series are created from points
+    coordinates array at once.
+
     :param series: GIS series.
     """
     cls = shapely.geometry.LineString
-    if isinstance(series, SeriesGroupBy):
+    if _is_point_group(series):
+        coords, offsets, index = _group_coords(series)
+        return from_line_coords(coords, offsets, index=index)
+    elif isinstance(series, SeriesGroupBy):
         lines = series.apply(partial(_shape_from_coords, shape_cls=cls))
         return geocoon.core.LineStringSeries(lines)
     else:
@@ -87,16 +266,106 @@ def as_polygon(series):
     The method works for grouped GIS series - for each grouping key
     a polygon is created.
 
+    The polygons of grouped point series are created from points
+    coordinates array at once. The rings are closed if necessary.
+
     :param series: GIS series.
     """
     cls = shapely.geometry.Polygon
-    if isinstance(series, SeriesGroupBy):
+    if _is_point_group(series):
+        coords, ring_offsets, index = _group_coords(series)
+        coords, ring_offsets = _close_rings(coords, ring_offsets)
+        offsets = numpy.arange(len(ring_offsets), dtype=numpy.int64)
+        return from_polygon_coords(coords, ring_offsets, offsets, index=index)
+    elif isinstance(series, SeriesGroupBy):
         lines = series.apply(partial(_shape_from_coords, shape_cls=cls))
         return geocoon.core.PolygonSeries(lines)
     else:
         return _shape_from_coords(series, cls)
 
 
+def _valid_offsets(offsets, n):
+    """
+    Check if array of offsets is valid for collection of `n` items.
+
+    :param offsets: Array of offsets.
+    :param n: Number of items.
+    """
+    return offsets.ndim == 1 and len(offsets) > 0 and offsets[0] == 0 \
+        and offsets[-1] == n and (numpy.diff(offsets) >= 0).all()
+
+
+def _common_srid(srid):
+    """
+    Get SRID common to all geometries.
+
+    `None` is returned if geometries have no SRID or SRIDs of geometries
+    differ.
+
+    :param srid: Array of SRID of geometries, zero if no SRID.
+    """
+    values = numpy.unique(srid)
+    return int(values[0]) if len(values) == 1 and values[0] != 0 else None
+
+
+def _is_point_group(series):
+    """
+    Check if series is grouped GIS point series.
+
+    :param series: Series or grouped series.
+    """
+    return isinstance(series, SeriesGroupBy) \
+        and isinstance(series.obj, geocoon.core.PointSeries)
+
+
+def _group_coords(series):
+    """
+    Create packed coordinates of points of each group of grouped point
+    series.
+
+    The group number of each point is calculated once, then points
+    coordinates are sorted by the group number, so coordinates of each
+    group are contiguous. The order of points within a group is kept.
+
+    Tuple of coordinates array, offsets array and index of group keys is
+    returned.
+
+    :param series: Grouped GIS point series.
+    """
+    ids = series.ngroup().values
+    index = series.size().index
+    valid = ~numpy.isnan(ids)
+    ids = ids[valid].astype(numpy.int64)
+    pos = numpy.flatnonzero(valid)[numpy.argsort(ids, kind='stable')]
+
+    coords = series.obj._coords()[:, pos].T
+    offsets = numpy.zeros(len(index) + 1, dtype=numpy.int64)
+    numpy.cumsum(numpy.bincount(ids, minlength=len(index)), out=offsets[1:])
+    return numpy.ascontiguousarray(coords), offsets, index
+
+
+def _close_rings(coords, offsets):
+    """
+    Close packed rings by adding first point of each ring, which is not
+    closed.
+
+    Tuple of coordinates array and offsets array is returned.
+
+    :param coords: Array of coordinates of `(m, ndim)` shape.
+    :param offsets: Array of offsets of rings.
+    """
+    add = ~is_closed(coords, offsets)
+    new_offsets = numpy.zeros_like(offsets)
+    numpy.cumsum(numpy.diff(offsets) + add, out=new_offsets[1:])
+
+    result = numpy.empty((new_offsets[-1], coords.shape[1]))
+    shift = new_offsets[:-1] - offsets[:-1]
+    result[numpy.arange(len(coords)) + shift[segment_ids(offsets)]] = coords
+    idx = numpy.flatnonzero(add)
+    result[new_offsets[idx + 1] - 1] = coords[offsets[idx]]
+    return result, new_offsets
+
+
 def _shape_from_coords(data, shape_cls):
     """
     Create shape from a coordinates taken from collection of geometries.
@@ -107,4 +376,10 @@ def _shape_from_coords(data, shape_cls):
     return shape_cls(c for g in data for c in g.coords)
 
 
+_FROM_COORDS = {
+    WKB_POINT: from_xy,
+    WKB_LINE_STRING: from_line_coords,
+    WKB_POLYGON: from_polygon_coords,
+}
+
 # vim: sw=4:et:ai
@@ -0,0 +1,187 @@
+#
+# GeoCoon - GIS data analysis library based on Pandas and Shapely
+#
+# Copyright (C) 2014 by Artur Wroblewski <wrobell@pld-linux.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Geodesic distance calculations with NumPy.
+
+The coordinates are longitude and latitude in degrees, i.e. of `SRID 4326`
+geometries. The distances are in meters.
+
+The following methods are supported
+
+haversine
+    Great-circle distance on a sphere with Earth mean radius. Fast, but
+    error can reach 0.5%.
+vincenty
+    Vincenty's inverse formula on WGS84 ellipsoid. Accurate to less than
+    millimeter, but iterative and slower. The distance of nearly antipodal
+    points, for which the formula does not converge, is `NaN`.
+"""
+
+import numpy
+
+from .coords import segment_ids
+
+# Earth mean radius in meters
+EARTH_RADIUS = 6371008.8
+
+# WGS84 ellipsoid
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_B = WGS84_A * (1 - WGS84_F)
+
+# convergence threshold and maximum number of iterations of Vincenty's
+# formula
+VINCENTY_EPS = 1e-12
+VINCENTY_MAX_ITER = 200
+
+
+def distance(lon1, lat1, lon2, lat2, method='haversine'):
+    """
+    Calculate geodesic distance between points.
+
+    :param lon1: Longitude of first points.
+    :param lat1: Latitude of first points.
+    :param lon2: Longitude of second points.
+    :param lat2: Latitude of second points.
+    :param method: Distance calculation method, `haversine` or `vincenty`.
+    """
+    if method == 'haversine':
+        f = haversine
+    elif method == 'vincenty':
+        f = vincenty
+    else:
+        raise ValueError('Unknown geodesic method: {}'.format(method))
+    return f(lon1, lat1, lon2, lat2)
+
+
+def haversine(lon1, lat1, lon2, lat2):
+    """
+    Calculate great-circle distance between points with haversine formula.
+
+    :param lon1: Longitude of first points.
+    :param lat1: Latitude of first points.
+    :param lon2: Longitude of second points.
+    :param lat2: Latitude of second points.
+    """
+    lon1, lat1, lon2, lat2 = map(numpy.radians, (lon1, lat1, lon2, lat2))
+    h = numpy.sin((lat2 - lat1) / 2) ** 2 \
+        + numpy.cos(lat1) * numpy.cos(lat2) * numpy.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS * numpy.arcsin(numpy.sqrt(numpy.minimum(h, 1)))
+
+
+def vincenty(lon1, lat1, lon2, lat2):
+    """
+    Calculate distance between points on WGS84 ellipsoid with Vincenty's
+    inverse formula.
+
+    The iteration continues only for the points, which did not converge
+    yet.
+
+    :param lon1: Longitude of first points.
+    :param lat1: Latitude of first points.
+    :param lon2: Longitude of second points.
+    :param lat2: Latitude of second points.
+    """
+    lon1, lat1, lon2, lat2 = numpy.broadcast_arrays(
+        *map(numpy.radians, (lon1, lat1, lon2, lat2))
+    )
+    f = WGS84_F
+    L = (lon2 - lon1).ravel()
+    U1 = numpy.arctan((1 - f) * numpy.tan(lat1)).ravel()
+    U2 = numpy.arctan((1 - f) * numpy.tan(lat2)).ravel()
+    sin_u1, cos_u1 = numpy.sin(U1), numpy.cos(U1)
+    sin_u2, cos_u2 = numpy.sin(U2), numpy.cos(U2)
+
+    n = len(L)
+    lmb = L.copy()
+    sin_sigma = numpy.zeros(n)
+    cos_sigma = numpy.ones(n)
+    sigma = numpy.zeros(n)
+    cos2_alpha = numpy.ones(n)
+    cos_2sm = numpy.zeros(n)
+
+    idx = numpy.arange(n)
+    for _ in range(VINCENTY_MAX_ITER):
+        sin_l, cos_l = numpy.sin(lmb[idx]), numpy.cos(lmb[idx])
+        s1, c1, s2, c2 = sin_u1[idx], cos_u1[idx], sin_u2[idx], cos_u2[idx]
+
+        ss = numpy.hypot(c2 * sin_l, c1 * s2 - s1 * c2 * cos_l)
+        cs = s1 * s2 + c1 * c2 * cos_l
+        sg = numpy.arctan2(ss, cs)
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            sin_alpha = numpy.where(ss == 0, 0, c1 * c2 * sin_l / ss)
+            c2a = 1 - sin_alpha ** 2
+            # equatorial line has zero cos2_alpha
+            c2sm = numpy.where(c2a == 0, 0, cs - 2 * s1 * s2 / c2a)
+
+        C = f / 16 * c2a * (4 + f * (4 - 3 * c2a))
+        prev = lmb[idx]
+        new = L[idx] + (1 - C) * f * sin_alpha * (
+            sg + C * ss * (c2sm + C * cs * (-1 + 2 * c2sm ** 2))
+        )
+
+        lmb[idx] = new
+        sin_sigma[idx] = ss
+        cos_sigma[idx] = cs
+        sigma[idx] = sg
+        cos2_alpha[idx] = c2a
+        cos_2sm[idx] = c2sm
+
+        idx = idx[numpy.abs(new - prev) > VINCENTY_EPS]
+        if not len(idx):
+            break
+
+    u2 = cos2_alpha * (WGS84_A ** 2 - WGS84_B ** 2) / WGS84_B ** 2
+    A = 1 + u2 / 16384 * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
+    B = u2 / 1024 * (256 + u2 * (-128 + u2 * (74 - 47 * u2)))
+    delta_sigma = B * sin_sigma * (
+        cos_2sm + B / 4 * (
+            cos_sigma * (-1 + 2 * cos_2sm ** 2)
+            - B / 6 * cos_2sm * (-3 + 4 * sin_sigma ** 2)
+            * (-3 + 4 * cos_2sm ** 2)
+        )
+    )
+    result = WGS84_B * A * (sigma - delta_sigma)
+    result[idx] = numpy.nan
+    return result.reshape(lon1.shape)
+
+
+def line_lengths(coords, offsets, method='haversine'):
+    """
+    Calculate geodesic length of each packed line.
+
+    :param coords: Array of coordinates of `(m, ndim)` shape.
+    :param offsets: Array of offsets of lines.
+    :param method: Distance calculation method, `haversine` or `vincenty`.
+    """
+    ids = segment_ids(offsets)
+    # skip segments between last and first point of consecutive lines
+    idx = numpy.flatnonzero(ids[1:] == ids[:-1])
+    d = distance(
+        coords[idx, 0], coords[idx, 1],
+        coords[idx + 1, 0], coords[idx + 1, 1],
+        method
+    )
+    return numpy.bincount(
+        ids[idx], weights=d, minlength=len(offsets) - 1
+    )
+
+
+# vim: sw=4:et:ai
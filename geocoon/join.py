@@ -0,0 +1,94 @@
+#
+# GeoCoon - GIS data analysis library based on Pandas and Shapely
+#
+# Copyright (C) 2014 by Artur Wroblewski <wrobell@pld-linux.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Spatial join of GIS data frames.
+"""
+
+import numpy
+
+from .core import GeoDataFrame
+from .sindex import PREDICATES
+
+
+def sjoin(left, right, left_geom, right_geom, predicate='intersects',
+        lsuffix='_left', rsuffix='_right'):
+    """
+    Join two GIS data frames using spatial relationship of their
+    geometries.
+
+    A row of left data frame is joined with each row of right data frame
+    for which the predicate is true, i.e. `within` predicate joins left
+    geometries with right geometries containing them.
+
+    The candidate pairs of rows are found with spatial index of right GIS
+    series, then the predicate is evaluated for the candidates only.
+
+    The resulting GIS data frame contains left and right data frames
+    columns and `index_right` column with right data frame index labels.
+    The index of the data frame is left data frame index. Columns existing
+    in both data frames are renamed with suffixes.
+
+    :param left: Left GIS data frame.
+    :param right: Right GIS data frame.
+    :param left_geom: Name of left GIS series column.
+    :param right_geom: Name of right GIS series column.
+    :param predicate: Predicate name.
+    :param lsuffix: Suffix of left data frame overlapping columns.
+    :param rsuffix: Suffix of right data frame overlapping columns.
+    """
+    if predicate not in PREDICATES:
+        raise ValueError('Predicate {} not supported'.format(predicate))
+
+    # left.predicate(right) is equivalent of right.converse(left)
+    converse = PREDICATES[predicate]
+    series = right[right_geom]
+    sindex = series.sindex
+    shapes = series.values
+    pairs = [
+        (i, sindex.query(shapes, g, converse))
+        for i, g in enumerate(left[left_geom].values)
+    ]
+    li = numpy.repeat(
+        numpy.arange(len(pairs), dtype=numpy.intp),
+        [len(j) for _, j in pairs]
+    )
+    ri = numpy.concatenate([j for _, j in pairs] + [li[:0]])
+
+    index = left.index[li]
+    common = set(left.columns) & set(right.columns)
+    data = {}
+    columns = []
+    for df, idx, suffix in ((left, li, lsuffix), (right, ri, rsuffix)):
+        for col in df.columns:
+            name = '{}{}'.format(col, suffix) if col in common else col
+            cls = df._geom_columns.get(col)
+            values = df[col].values[idx]
+            if cls is not None:
+                srid = df._geom_srid.get(col)
+                values = cls(values, index=index, srid=srid)
+            data[name] = values
+            columns.append(name)
+
+    data['index_right'] = right.index[ri]
+    columns.append('index_right')
+    return GeoDataFrame(data, index=index, columns=columns)
+
+
+# vim: sw=4:et:ai
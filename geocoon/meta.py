@@ -108,6 +108,20 @@ META_GEOMETRY = {
 }
 
 
+# converse of binary predicates, i.e. `a.within(b)` is equivalent of
+# `b.contains(a)`
+CONVERSE_PREDICATES = {
+    'equals': 'equals',
+    'disjoint': 'disjoint',
+    'intersects': 'intersects',
+    'touches': 'touches',
+    'crosses': 'crosses',
+    'within': 'contains',
+    'contains': 'within',
+    'overlaps': 'overlaps',
+}
+
+
 META_POINT = META_GEOMETRY.copy()
 META_POINT.update({
     'x': meta(is_property=True),
@@ -124,6 +138,7 @@ META_CURVE.update({
     # 'end_point': meta(returns_geom=True, is_property=True),
     # 'is_closed': meta(is_property=True),
     'is_ring': meta(is_property=True),
+    'simplify': meta(returns_geom=True),
 })
 
 
@@ -149,6 +164,7 @@ META_SURFACE.update({
     'centroid': meta(is_property=True, returns_geom=True), # TODO: returns point
     # 'point_on_surface': meta(is_property=True, returns_geom=True), # TODO: returns point
     # 'boundary': TODO: override with MultiCurve
+    'simplify': meta(returns_geom=True),
 })
 
 
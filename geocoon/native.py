@@ -0,0 +1,358 @@
+#
+# GeoCoon - GIS data analysis library based on Pandas and Shapely
+#
+# Copyright (C) 2014 by Artur Wroblewski <wrobell@pld-linux.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Native columnar file format of GIS data frames.
+
+GIS data frame is stored in a directory. The `header.json` file describes
+the index and the columns of the data frame, including geometry type and
+SRID of each GIS series. Each array is stored in a NumPy `.npy` file
+
+- coordinates array of points, `column-<i>-coords.npy`
+- packed coordinates and offsets arrays of line strings,
+  `column-<i>-coords.npy` and `column-<i>-offsets.npy`
+- packed coordinates, ring offsets and offsets arrays of polygons,
+  `column-<i>-coords.npy`, `column-<i>-ring_offsets.npy` and
+  `column-<i>-offsets.npy`
+- values of other columns, `column-<i>.npy`
+- strings of object columns, UTF-8 data, offsets and mask of null values
+  arrays, `column-<i>-data.npy`, `column-<i>-offsets.npy` and
+  `column-<i>-null.npy`
+
+The header records format of each column, so only the files of the
+header are read. Nothing is pickled, therefore object columns can
+contain strings and null values only.
+
+The arrays are loaded with `numpy.memmap`, so data of non-GIS columns is
+read from disk only when accessed. The coordinates arrays are memory
+mapped as well and used by GIS series for vectorized calculations.
+
+.. seealso:: :py:mod:`geocoon.coords`
+"""
+
+import json
+import os.path
+
+import numpy
+import pandas
+
+from .coords import point_shapes, line_shapes, polygon_shapes
+from .core import GeoDataFrame, GeoSeries, PointSeries, LineStringSeries, \
+    PolygonSeries, set_cached_value
+
+VERSION = 2
+
+HEADER = 'header.json'
+
+# suffixes of names of arrays of strings of object column
+STRING_ARRAYS = ('-data', '-offsets', '-null')
+
+# GIS series class and names of its coordinates arrays for each geometry
+# type
+GEOMETRIES = {
+    'Point': (PointSeries, ('coords',)),
+    'LineString': (LineStringSeries, ('coords', 'offsets')),
+    'Polygon': (PolygonSeries, ('coords', 'ring_offsets', 'offsets')),
+}
+
+
+def to_geocoon(data, path):
+    """
+    Write GIS data frame in native columnar file format.
+
+    The directory is created if it does not exist. Existing files are
+    overwritten.
+
+    The GIS series of points, line strings and polygons are stored as
+    coordinates arrays. Other columns are stored as NumPy arrays. The
+    strings of object columns are stored as UTF-8 data.
+
+    :param data: GIS data frame.
+    :param path: Directory path.
+    """
+    os.makedirs(path, exist_ok=True)
+    header, arrays = encode(data)
+    for name, values in arrays.items():
+        numpy.save(os.path.join(path, name + '.npy'), values)
+
+    with open(os.path.join(path, HEADER), 'w') as f:
+        json.dump(header, f, indent=2)
+
+
+def read_geocoon(path, mmap=True):
+    """
+    Read GIS data frame stored in native columnar file format.
+
+    If memory mapping is enabled, then arrays are loaded with
+    `numpy.memmap` in copy-on-write mode, so opening the data frame is
+    fast and data is read from disk only when accessed. Modifications of
+    the data frame are not written to the files.
+
+    The GIS series are created from coordinates arrays, which requires
+    creation of Shapely geometries.
+
+    :param path: Directory path.
+    :param mmap: Use memory mapping if true.
+
+    .. seealso:: :py:func:`to_geocoon`
+    """
+    with open(os.path.join(path, HEADER)) as f:
+        header = json.load(f)
+
+    mode = 'c' if mmap else None
+    def load(name):
+        fn = os.path.join(path, name + '.npy')
+        return numpy.load(fn, mmap_mode=mode, allow_pickle=False)
+
+    return decode(header, load)
+
+
+def encode(data):
+    """
+    Encode GIS data frame as header and collection of arrays.
+
+    Tuple of header and dictionary of arrays is returned. The header
+    describes the index and the columns of the data frame and can be
+    serialized with JSON. The arrays are not object arrays, so they can
+    be stored without pickling.
+
+    `ValueError` is raised if an object column contains values other than
+    strings and null values.
+
+    :param data: GIS data frame.
+
+    .. seealso:: :py:func:`decode`
+    """
+    geom_columns = getattr(data, '_geom_columns', {})
+    geom_srid = getattr(data, '_geom_srid', {})
+    arrays = {}
+
+    columns = []
+    for i, col in enumerate(data.columns):
+        series = data.iloc[:, i]
+        cls = geom_columns.get(col)
+        name = 'column-{}'.format(i)
+        if cls is not None:
+            srid = geom_srid.get(col)
+            series = cls(series, srid=srid, copy=False)
+            item = _encode_geometry(arrays, name, series)
+        else:
+            item = _encode_array(arrays, name, series)
+        item['name'] = col
+        columns.append(item)
+
+    header = {
+        'version': VERSION,
+        'length': len(data),
+        'index': _encode_index(arrays, data.index),
+        'columns': columns,
+        '_geom_columns': {
+            str(c['name']): c['geometry'] for c in columns if 'geometry' in c
+        },
+    }
+    return header, arrays
+
+
+def decode(header, load):
+    """
+    Decode GIS data frame from header and collection of arrays.
+
+    :param header: Description of the GIS data frame.
+    :param load: Function to load an array by its name.
+
+    .. seealso:: :py:func:`encode`
+    """
+    if header.get('version') != VERSION:
+        raise ValueError('Unsupported file format version')
+
+    index = _decode_index(header['index'], load)
+    data = {}
+    for item in header['columns']:
+        col = item['name']
+        if 'geometry' in item:
+            cls, names = GEOMETRIES[item['geometry']]
+            arrays = tuple(load(item['file'] + '-' + n) for n in names)
+            series = data[col] = cls(
+                _SHAPES[cls](*arrays), index=index, srid=item.get('srid')
+            )
+            set_cached_value(
+                series, 'coords', arrays[0] if len(arrays) == 1 else arrays
+            )
+        else:
+            data[col] = _decode_array(item, load, index)
+
+    return GeoDataFrame(data, index=index, copy=False)
+
+
+def _encode_geometry(arrays, name, series):
+    """
+    Encode coordinates arrays of GIS series.
+
+    Description of the GIS series is returned.
+
+    :param arrays: Dictionary of arrays.
+    :param name: Name of the series arrays.
+    :param series: GIS series.
+    """
+    geom_type = type(series).__name__[:-len('Series')]
+    if geom_type not in GEOMETRIES:
+        raise ValueError('Unsupported GIS series {}'.format(type(series)))
+
+    _, names = GEOMETRIES[geom_type]
+    data = series._coords() if isinstance(series, PointSeries) \
+        else series.to_coords()
+    data = (data,) if len(names) == 1 else data
+    for n, a in zip(names, data):
+        arrays[name + '-' + n] = a
+    return {'geometry': geom_type, 'file': name, 'srid': series.srid}
+
+
+def _encode_array(arrays, name, series):
+    """
+    Encode values of a column.
+
+    Description of the column is returned.
+
+    :param arrays: Dictionary of arrays.
+    :param name: Name of the column array.
+    :param series: Data frame column.
+    """
+    if isinstance(series, GeoSeries):
+        raise ValueError('Unsupported GIS series {}'.format(type(series)))
+
+    item = {'file': name, 'format': 'array'}
+    dtype = series.dtype
+    if isinstance(dtype, pandas.DatetimeTZDtype):
+        item['tz'] = str(dtype.tz)
+        values = series.dt.tz_convert('UTC').dt.tz_localize(None).values
+    elif isinstance(dtype, numpy.dtype) and dtype.kind == 'O':
+        item['format'] = 'strings'
+        values = _encode_strings(series.values)
+        arrays.update(zip((name + s for s in STRING_ARRAYS), values))
+        return item
+    elif isinstance(dtype, numpy.dtype):
+        values = series.values
+    else:
+        raise ValueError('Unsupported column type {}'.format(dtype))
+
+    arrays[name] = values
+    return item
+
+
+def _decode_array(item, load, index):
+    """
+    Decode values of a column.
+
+    :param item: Description of the column.
+    :param load: Function to load an array.
+    :param index: Data frame index.
+    """
+    name = item['file']
+    if item['format'] == 'strings':
+        values = _decode_strings(*(load(name + s) for s in STRING_ARRAYS))
+    else:
+        values = load(name)
+
+    series = pandas.Series(values, index=index, copy=False)
+    if 'tz' in item:
+        series = series.dt.tz_localize('UTC').dt.tz_convert(item['tz'])
+    return series
+
+
+def _encode_index(arrays, index):
+    """
+    Encode data frame index.
+
+    Description of the index is returned.
+
+    :param arrays: Dictionary of arrays.
+    :param index: Data frame index.
+    """
+    if isinstance(index, pandas.RangeIndex):
+        item = {'range': [index.start, index.stop, index.step]}
+    elif isinstance(index, pandas.MultiIndex):
+        raise ValueError('Multi-index is not supported')
+    else:
+        item = _encode_array(arrays, 'index', index.to_series())
+    item['name'] = index.name
+    return item
+
+
+def _decode_index(item, load):
+    """
+    Decode data frame index.
+
+    :param item: Description of the index.
+    :param load: Function to load an array.
+    """
+    if 'range' in item:
+        index = pandas.RangeIndex(*item['range'], name=item['name'])
+    else:
+        series = _decode_array(item, load, None)
+        index = pandas.Index(series, name=item['name'], copy=False)
+    return index
+
+
+def _encode_strings(values):
+    """
+    Encode array of strings as UTF-8 data.
+
+    Tuple of UTF-8 data array, offsets array and mask of null values is
+    returned.
+
+    :param values: Array of strings and null values.
+    """
+    null = pandas.isna(values)
+    items = values[~null]
+    if not all(isinstance(v, str) for v in items):
+        raise ValueError('Unsupported values of object column')
+
+    data = [v.encode('utf-8') for v in items]
+    size = numpy.zeros(len(values), dtype=numpy.int64)
+    size[~null] = [len(v) for v in data]
+    offsets = numpy.zeros(len(values) + 1, dtype=numpy.int64)
+    numpy.cumsum(size, out=offsets[1:])
+    buff = numpy.frombuffer(b''.join(data), dtype=numpy.uint8)
+    return buff, offsets, null
+
+
+def _decode_strings(buff, offsets, null):
+    """
+    Decode array of strings from UTF-8 data.
+
+    The null values are decoded as `None`.
+
+    :param buff: UTF-8 data array.
+    :param offsets: Offsets of strings in UTF-8 data.
+    :param null: Mask of null values.
+    """
+    data = buff.tobytes()
+    bounds = zip(offsets[:-1].tolist(), offsets[1:].tolist(), null.tolist())
+    values = numpy.empty(len(null), dtype=object)
+    values[:] = [None if n else data[s:e].decode('utf-8') for s, e, n in bounds]
+    return values
+
+
+_SHAPES = {
+    PointSeries: point_shapes,
+    LineStringSeries: line_shapes,
+    PolygonSeries: polygon_shapes,
+}
+
+# vim: sw=4:et:ai
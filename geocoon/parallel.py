@@ -0,0 +1,141 @@
+#
+# GeoCoon - GIS data analysis library based on Pandas and Shapely
+#
+# Copyright (C) 2014 by Artur Wroblewski <wrobell@pld-linux.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Parallel execution of vectorized methods of GIS series.
+
+GIS series is split into chunks and the geometries of each chunk are sent
+to a worker process as WKB data. Geometries returned by the workers are
+sent back as WKB data as well.
+
+The number of worker processes is set globally with :py:func:`set_n_jobs`
+function or for each method call with `n_jobs` parameter.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+import numpy
+import shapely.wkb
+
+# default number of worker processes; no parallel execution by default
+N_JOBS = 1
+
+# number of chunks processed by each worker process
+CHUNKS_PER_JOB = 4
+
+
+def set_n_jobs(n_jobs):
+    """
+    Set default number of worker processes used to execute vectorized
+    methods of GIS series.
+
+    If number of processes is `-1`, then number of CPUs is used.
+
+    :param n_jobs: Number of worker processes.
+    """
+    global N_JOBS
+    N_JOBS = n_jobs
+
+
+def get_n_jobs(n_jobs=None):
+    """
+    Get number of worker processes.
+
+    :param n_jobs: Number of worker processes, use default if null.
+    """
+    if n_jobs is None:
+        n_jobs = N_JOBS
+    if n_jobs == -1:
+        n_jobs = os.cpu_count()
+    if n_jobs < 1:
+        raise ValueError(
+            'Invalid number of worker processes: {}'.format(n_jobs)
+        )
+    return n_jobs
+
+
+def call(func, wkb, other_wkb, args, kw, returns_geom, n_jobs):
+    """
+    Call Shapely geometry method for each geometry in worker processes.
+
+    The method is called with function
+
+        func(shapes, other, args, kw)
+
+    where `shapes` is list of geometries of a chunk and `other` is null,
+    geometry or list of geometries being first parameter of the method.
+    The function has to be picklable.
+
+    List of values returned by method calls is returned.
+
+    :param func: Function calling the method.
+    :param wkb: Array of geometries in WKB format.
+    :param other_wkb: Null, geometry in WKB format or array of geometries
+        in WKB format.
+    :param args: Method positional parameters.
+    :param kw: Method keyword parameters.
+    :param returns_geom: True if method returns geometry.
+    :param n_jobs: Number of worker processes.
+
+    .. seealso:: :py:func:`geocoon.core.call_method`
+    """
+    n = max(1, min(len(wkb), n_jobs * CHUNKS_PER_JOB))
+    chunks = numpy.array_split(numpy.arange(len(wkb)), n)
+    if other_wkb is None or isinstance(other_wkb, bytes):
+        others = (other_wkb for idx in chunks)
+    else:
+        others = (other_wkb[idx] for idx in chunks)
+    tasks = (
+        (func, wkb[idx], other, args, kw, returns_geom)
+        for idx, other in zip(chunks, others)
+    )
+    with ProcessPoolExecutor(n_jobs) as executor:
+        result = executor.map(_call_chunk, tasks)
+        data = [v for chunk in result for v in chunk]
+
+    if returns_geom:
+        data = [shapely.wkb.loads(v) for v in data]
+    return data
+
+
+def _call_chunk(task):
+    """
+    Call Shapely geometry method for each geometry of a chunk of GIS
+    series.
+
+    :param task: Tuple of :py:func:`call` function parameters.
+    """
+    func, wkb, other_wkb, args, kw, returns_geom = task
+    shapes = [shapely.wkb.loads(v) for v in wkb]
+    if other_wkb is None:
+        other = None
+    elif isinstance(other_wkb, bytes):
+        other = shapely.wkb.loads(other_wkb)
+    else:
+        other = [shapely.wkb.loads(v) for v in other_wkb]
+
+    data = func(shapes, other, args, kw)
+
+    if returns_geom:
+        data = [g.wkb for g in data]
+    return data
+
+
+# vim: sw=4:et:ai
@@ -0,0 +1,308 @@
+#
+# GeoCoon - GIS data analysis library based on Pandas and Shapely
+#
+# Copyright (C) 2014 by Artur Wroblewski <wrobell@pld-linux.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Encoding of GIS data frames in PostgreSQL binary COPY format.
+
+The data is encoded with NumPy in batches of rows. Each batch is single
+buffer of bytes, so memory usage is bounded by the batch size.
+
+The geometry columns are encoded as EWKB data, which is accepted by
+PostGIS `geometry` type.
+"""
+
+import struct
+
+import numpy
+import pandas
+
+from .coords import is_empty
+from .core import GeoSeries
+
+# header of binary COPY data: signature, flags and header extension length
+HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('>ii', 0, 0)
+
+# end of binary COPY data
+TRAILER = struct.pack('>h', -1)
+
+# PostgreSQL epoch in microseconds since Unix epoch
+PG_EPOCH = 946684800000000
+
+# PostgreSQL types and binary formats of NumPy types
+TYPES = {
+    'b': ('boolean', '>?'),
+    'i1': ('smallint', '>i2'),
+    'i2': ('smallint', '>i2'),
+    'i4': ('integer', '>i4'),
+    'i8': ('bigint', '>i8'),
+    'u1': ('smallint', '>i2'),
+    'u2': ('integer', '>i4'),
+    'u4': ('bigint', '>i8'),
+    'f4': ('real', '>f4'),
+    'f8': ('double precision', '>f8'),
+}
+
+
+def column_type(series, srid=None):
+    """
+    Get PostgreSQL type of column of a data frame.
+
+    :param series: Column of a data frame.
+    :param srid: Optional SRID of geometries, SRID of GIS series by default.
+    """
+    if isinstance(series, GeoSeries):
+        srid = series.srid if srid is None else srid
+        return 'geometry' if srid is None \
+            else 'geometry(Geometry, {:d})'.format(srid)
+    elif isinstance(series.dtype, pandas.DatetimeTZDtype):
+        return 'timestamp with time zone'
+    elif series.dtype.kind == 'M':
+        return 'timestamp'
+    elif series.dtype.kind == 'O':
+        return 'text'
+    else:
+        return _type(series.dtype)[0]
+
+
+def encode(data, srid=None, batchsize=10000, index=False):
+    """
+    Encode data frame in PostgreSQL binary COPY format.
+
+    Iterator of binary strings is returned. Each binary string, except
+    header and trailer, contains a batch of rows.
+
+    The GIS series are encoded as EWKB data with SRID, if SRID is
+    specified. The NaN values, NaT values, `None` values, missing values of
+    Pandas' nullable types and empty geometries are encoded as NULL values.
+
+    If `index` is true, then the levels of data frame index are encoded
+    as the first columns of each batch, so the data frame is not copied
+    to reset its index.
+
+    :param data: Data frame.
+    :param srid: Optional SRID of geometries, SRID of GIS series by default.
+    :param batchsize: Maximum number of rows in a batch.
+    :param index: Encode index of the data frame if true.
+    """
+    yield HEADER
+    for i in range(0, len(data), batchsize):
+        batch = data.iloc[i:i + batchsize]
+        columns = [column(batch, col) for col in data.columns]
+        if index:
+            columns = index_columns(batch) + columns
+        fields = [_encode_column(series, srid) for series in columns]
+        yield _join(fields, len(batch))
+    yield TRAILER
+
+
+def column(data, col):
+    """
+    Get column of a data frame.
+
+    If the column is known to be GIS series of GIS data frame, then GIS
+    series is returned.
+
+    :param data: Data frame.
+    :param col: Column name.
+    """
+    series = data[col]
+    cls = getattr(data, '_geom_columns', {}).get(col)
+    if cls is not None and not isinstance(series, GeoSeries):
+        srid = getattr(data, '_geom_srid', {}).get(col)
+        series = cls(series, srid=srid)
+    return series
+
+
+def index_columns(data):
+    """
+    Get levels of index of a data frame as columns.
+
+    :param data: Data frame.
+    """
+    index = data.index
+    return [
+        pandas.Series(index.get_level_values(i), index=index, copy=False)
+        for i in range(index.nlevels)
+    ]
+
+
+def _encode_column(series, srid):
+    """
+    Encode column of a data frame.
+
+    Tuple of bytes buffer, offsets of values in the buffer and mask of
+    NULL values is returned.
+
+    :param series: Column of a data frame.
+    :param srid: Optional SRID of geometries, SRID of GIS series by default.
+    """
+    if isinstance(series, GeoSeries):
+        srid = series.srid if srid is None else srid
+        null = numpy.fromiter(map(is_empty, series.values), bool, len(series))
+        if null.any():
+            series = series[~null]
+        buff, offsets, _ = _encode_bytes(series.to_wkb(srid=srid).values)
+        return _expand(buff, offsets, null)
+
+    dtype = series.dtype
+    if isinstance(dtype, pandas.DatetimeTZDtype):
+        series = series.dt.tz_convert('UTC').dt.tz_localize(None)
+        dtype = series.dtype
+
+    if dtype.kind == 'M':
+        null = series.isna().values
+        us = series.values.astype('datetime64[us]').astype(numpy.int64)
+        return _encode_fixed(us - PG_EPOCH, '>i8', null)
+    elif dtype.kind == 'O':
+        null = series.isna().values
+        values = [str(v).encode('utf-8') for v in series.values[~null]]
+        buff, offsets, _ = _encode_bytes(values)
+        return _expand(buff, offsets, null)
+    else:
+        fmt = _type(dtype)[1]
+        null = series.isna().values
+        if isinstance(dtype, numpy.dtype):
+            values = series.values
+        else:
+            # nullable type of Pandas
+            values = series.to_numpy(dtype=dtype.numpy_dtype, na_value=0)
+        return _encode_fixed(values, fmt, null)
+
+
+def _encode_fixed(values, fmt, null):
+    """
+    Encode array of fixed size values.
+
+    :param values: Array of values.
+    :param fmt: NumPy binary format of values.
+    :param null: Mask of NULL values.
+    """
+    data = numpy.ascontiguousarray(values, dtype=fmt)
+    size = data.dtype.itemsize
+    offsets = size * numpy.arange(len(data) + 1)
+    return data.view(numpy.uint8), offsets, null
+
+
+def _encode_bytes(values):
+    """
+    Encode collection of binary strings.
+
+    :param values: Collection of binary strings.
+    """
+    n = len(values)
+    offsets = numpy.zeros(n + 1, dtype=numpy.int64)
+    numpy.cumsum(numpy.fromiter(map(len, values), numpy.int64, n), out=offsets[1:])
+    buff = numpy.frombuffer(b''.join(values), dtype=numpy.uint8)
+    return buff, offsets, numpy.zeros(n, dtype=bool)
+
+
+def _expand(buff, offsets, null):
+    """
+    Insert empty values at positions of NULL values.
+
+    :param buff: Bytes buffer of values.
+    :param offsets: Offsets of non-NULL values in the buffer.
+    :param null: Mask of NULL values.
+    """
+    size = numpy.zeros(len(null), dtype=numpy.int64)
+    size[~null] = numpy.diff(offsets)
+    offsets = numpy.zeros(len(null) + 1, dtype=numpy.int64)
+    numpy.cumsum(size, out=offsets[1:])
+    return buff, offsets, null
+
+
+def _join(fields, n):
+    """
+    Join encoded columns into rows of binary COPY data.
+
+    Each row is: number of fields, and for each field its length (-1 for
+    NULL value) and its data.
+
+    :param fields: List of encoded columns.
+    :param n: Number of rows.
+    """
+    sizes = [
+        numpy.where(null, 0, numpy.diff(offsets))
+        for _, offsets, null in fields
+    ]
+    row_size = 2 + sum(4 + s for s in sizes) if fields \
+        else numpy.full(n, 2)
+    start = numpy.zeros(n + 1, dtype=numpy.int64)
+    numpy.cumsum(row_size, out=start[1:])
+    buff = numpy.empty(start[-1], dtype=numpy.uint8)
+
+    _scatter(buff, start[:-1], numpy.full(n, len(fields), dtype='>i2'))
+    pos = start[:-1] + 2
+    for (data, offsets, null), size in zip(fields, sizes):
+        length = numpy.where(null, -1, size).astype('>i4')
+        _scatter(buff, pos, length)
+        pos = pos + 4
+        _copy(buff, pos, data, offsets[:-1], size)
+        pos = pos + size
+    return buff.tobytes()
+
+
+def _scatter(buff, pos, data):
+    """
+    Write items of an array at positions of a buffer.
+
+    :param buff: Bytes buffer.
+    :param pos: Array of positions in the buffer.
+    :param data: Array of items.
+    """
+    size = data.dtype.itemsize
+    data = data.view(numpy.uint8).reshape(len(pos), size)
+    buff[pos[:, None] + numpy.arange(size)] = data
+
+
+def _copy(buff, pos, data, src, size):
+    """
+    Copy ranges of bytes into a buffer.
+
+    :param buff: Destination bytes buffer.
+    :param pos: Array of positions in the destination buffer.
+    :param data: Source bytes buffer.
+    :param src: Array of positions in the source buffer.
+    :param size: Array of ranges sizes.
+    """
+    total = size.sum()
+    if total == 0:
+        return
+    k = numpy.arange(total) - numpy.repeat(numpy.cumsum(size) - size, size)
+    buff[numpy.repeat(pos, size) + k] = data[numpy.repeat(src, size) + k]
+
+
+def _type(dtype):
+    """
+    Get PostgreSQL type and binary format of NumPy type.
+
+    NumPy type of Pandas' nullable type is used for the nullable type.
+
+    :param dtype: NumPy type or Pandas' nullable type.
+    """
+    dtype = getattr(dtype, 'numpy_dtype', dtype)
+    if not isinstance(dtype, numpy.dtype):
+        raise ValueError('Unsupported column type {}'.format(dtype))
+    key = 'b' if dtype.kind == 'b' else dtype.str[1:]
+    if key not in TYPES:
+        raise ValueError('Unsupported column type {}'.format(dtype))
+    return TYPES[key]
+
+
+# vim: sw=4:et:ai
@@ -0,0 +1,108 @@
+#
+# GeoCoon - GIS data analysis library based on Pandas and Shapely
+#
+# Copyright (C) 2014 by Artur Wroblewski <wrobell@pld-linux.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Cache of prepared geometries of GIS series.
+
+Prepared geometries make repeated predicate evaluations much faster, but
+they are expensive to create and need additional memory. The cache keeps
+limited number of prepared geometries and removes least recently used
+ones.
+"""
+
+from collections import OrderedDict
+
+from shapely.geometry.base import BaseGeometry
+from shapely.prepared import prep, PreparedGeometry
+
+from .meta import CONVERSE_PREDICATES
+
+# predicates supported by prepared geometries
+PREDICATES = {m for m in CONVERSE_PREDICATES if hasattr(PreparedGeometry, m)}
+
+
+class PreparedCache(object):
+    """
+    Least recently used cache of prepared geometries.
+
+    Geometry is prepared on first use.
+
+    The cache does not keep reference to the collection of geometries, so
+    it can be cached by GIS series without keeping values array of the
+    series alive. The collection is passed to the cache methods instead.
+
+    :var maxsize: Maximum number of prepared geometries, no limit if null.
+    """
+    def __init__(self, maxsize=None):
+        """
+        Create cache of prepared geometries.
+
+        :param maxsize: Maximum number of prepared geometries.
+        """
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+
+
+    def __len__(self):
+        return len(self._cache)
+
+
+    def get(self, shapes, i):
+        """
+        Get prepared geometry.
+
+        :param shapes: Collection of geometries.
+        :param i: Position of geometry in the collection.
+        """
+        cache = self._cache
+        geom = cache.get(i)
+        if geom is None:
+            geom = cache[i] = prep(shapes[i])
+            if self.maxsize is not None and len(cache) > self.maxsize:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(i)
+        return geom
+
+
+    def call(self, shapes, predicate, other):
+        """
+        Evaluate predicate for each geometry using prepared geometries.
+
+        List of predicate values is returned.
+
+        :param shapes: Collection of geometries.
+        :param predicate: Predicate name.
+        :param other: Geometry or collection of geometries.
+        """
+        n = len(shapes)
+        get = self.get
+        if isinstance(other, BaseGeometry):
+            data = (
+                getattr(get(shapes, i), predicate)(other) for i in range(n)
+            )
+        else:
+            data = (
+                getattr(get(shapes, i), predicate)(o)
+                for i, o in zip(range(n), other)
+            )
+        return list(data)
+
+
+# vim: sw=4:et:ai
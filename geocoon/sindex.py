@@ -0,0 +1,150 @@
+#
+# GeoCoon - GIS data analysis library based on Pandas and Shapely
+#
+# Copyright (C) 2014 by Artur Wroblewski <wrobell@pld-linux.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Spatial index of GIS geometries.
+
+The spatial index is based on Shapely's STR tree. It finds geometries,
+which bounding boxes intersect bounding box of a query geometry.
+"""
+
+import numpy
+from shapely.prepared import prep, PreparedGeometry
+from shapely.strtree import STRtree
+
+from .coords import shape_bounds
+from .meta import CONVERSE_PREDICATES
+
+# predicates supported by spatial index query and their converse
+# predicates; the predicates are false for geometries with disjoint
+# bounding boxes
+PREDICATES = {
+    k: v for k, v in CONVERSE_PREDICATES.items() if k != 'disjoint'
+}
+
+
+class SpatialIndex(object):
+    """
+    Spatial index of collection of geometries.
+
+    The query methods return positions of geometries in the indexed
+    collection.
+
+    The index does not keep reference to the collection of geometries, so
+    it can be cached by GIS series without keeping values array of the
+    series alive. The collection is passed to the query methods instead.
+
+    :var bounds: Array of bounds of indexed geometries.
+    """
+    def __init__(self, shapes, bounds=None):
+        """
+        Create spatial index.
+
+        If bounds of geometries are not specified, then they are
+        calculated.
+
+        :param shapes: NumPy object array of Shapely geometries.
+        :param bounds: Array of bounds of geometries.
+        """
+        self.bounds = shape_bounds(shapes) if bounds is None else bounds
+
+        if hasattr(STRtree, 'query_items'):
+            # Shapely 1.8 returns geometries unless items are specified
+            tree = STRtree(shapes, range(len(shapes)))
+            self._query = tree.query_items
+        else:
+            tree = STRtree(shapes)
+            self._query = tree.query
+        self._tree = tree
+
+
+    def __len__(self):
+        return len(self.bounds)
+
+
+    def query(self, shapes, geom, predicate=None):
+        """
+        Find geometries, which bounding boxes intersect bounding box of
+        the query geometry.
+
+        If predicate is specified, then only the geometries for which the
+        predicate is true are returned. The predicate is evaluated for
+        each indexed geometry with query geometry as parameter, i.e.
+        `within` predicate finds geometries within the query geometry.
+
+        Sorted array of positions of geometries is returned.
+
+        :param shapes: NumPy object array of indexed geometries.
+        :param geom: Query geometry.
+        :param predicate: Optional predicate name.
+        """
+        if predicate is not None and predicate not in PREDICATES:
+            raise ValueError('Predicate {} not supported'.format(predicate))
+
+        idx = numpy.array(sorted(self._query(geom)), dtype=numpy.intp)
+        if predicate is not None:
+            # g.predicate(geom) is equivalent of geom.converse(g), use
+            # prepared query geometry if possible
+            converse = PREDICATES[predicate]
+            if len(idx) > 1 and hasattr(PreparedGeometry, converse):
+                pcall = getattr(prep(geom), converse)
+                mask = [pcall(g) for g in shapes[idx]]
+            else:
+                mask = [getattr(g, predicate)(geom) for g in shapes[idx]]
+            idx = idx[numpy.array(mask, dtype=bool)]
+        return idx
+
+
+    def nearest(self, shapes, geom, k=1):
+        """
+        Find `k` geometries nearest to the query geometry.
+
+        The distance between bounding boxes of geometries is used to find
+        candidate geometries, then exact distance is calculated for the
+        candidates only.
+
+        Array of positions of geometries ordered by distance is returned.
+
+        :param shapes: NumPy object array of indexed geometries.
+        :param geom: Query geometry.
+        :param k: Number of geometries to find.
+        """
+        valid = numpy.flatnonzero(~numpy.isnan(self.bounds[:, 0]))
+        k = min(k, len(valid))
+        if k < 1:
+            return numpy.empty(0, dtype=numpy.intp)
+
+        minx, miny, maxx, maxy = geom.bounds
+        bounds = self.bounds[valid]
+        dx = numpy.maximum(bounds[:, 0] - maxx, minx - bounds[:, 2])
+        dy = numpy.maximum(bounds[:, 1] - maxy, miny - bounds[:, 3])
+        box_dist = numpy.hypot(numpy.maximum(dx, 0), numpy.maximum(dy, 0))
+
+        # distance to k-th geometry limits the candidate geometries
+        idx = numpy.argpartition(box_dist, k - 1)[:k]
+        limit = max(shapes[valid[i]].distance(geom) for i in idx)
+
+        # allow for rounding errors of distance calculations
+        idx = valid[box_dist <= limit * (1 + 1e-9)]
+        dist = numpy.array([g.distance(geom) for g in shapes[idx]])
+        order = numpy.argsort(dist, kind='mergesort')[:k]
+        return idx[order]
+
+
+# vim: sw=4:et:ai
@@ -17,35 +17,496 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from contextlib import ExitStack
+
+import numpy
+import pandas
 import pandas.io.sql
 
+from . import parallel
+from . import pgcopy
+from .coords import concat_packed
 from .core import GeoDataFrame
-from .factory import from_wkb
+from .factory import from_wkb, _FROM_COORDS, _common_srid
+from .wkb import WKB_POINT, to_bytes, decode
 
 def read_sql(sql, con, geom_col, index_col=None, coerce_float=True,
-        params=None):
+        params=None, chunksize=None, cache=None, mixed='generic'):
     """
     Query SQL/MM database and return GIS data frame with specified column
     as GIS series.
 
+    If chunk size is specified, then iterator of GIS data frames is
+    returned. Each data frame contains at most `chunksize` rows, so memory
+    usage is bounded by the chunk size. Depending on database driver,
+    server side cursor might be required to stream the query results from
+    database.
+
+    If cache is specified, then the GIS data frame is read from the cache
+    or stored in the cache after query execution. The cache is keyed on
+    SQL query, its parameters, GIS columns and index column. The cache
+    cannot be used when reading query results in chunks.
+
+    A GIS column of a database table often contains geometries of
+    different classes, i.e. polygons and multipolygons. By default,
+    generic GIS series is created for such column, see
+    :py:func:`geocoon.factory.from_wkb`.
+
     :param geom_col: GIS column (can be collection of column names).
+    :param chunksize: Number of rows in each GIS data frame.
+    :param cache: Optional cache of query results.
+    :param mixed: Action on geometries of different classes, `raise` or
+        `generic`.
 
-    .. seealso:: pandas.io.sql.read_sql
+    .. seealso::
+
+        pandas.io.sql.read_sql
+        :py:class:`geocoon.cache.SQLCache`
     """
     if isinstance(geom_col, str):
         geom_col = (geom_col,)
 
+    if cache is not None:
+        if chunksize is not None:
+            raise ValueError('Cache cannot be used with chunk size')
+        key = cache.key(sql, params, geom_col, index_col)
+        data = cache.get(key)
+        if data is None:
+            data = read_sql(
+                sql, con, geom_col, index_col=index_col,
+                coerce_float=coerce_float, params=params, mixed=mixed
+            )
+            cache.set(key, data)
+        return data
+
+    kw = {} if chunksize is None else {'chunksize': chunksize}
     data = pandas.io.sql.read_sql(
         sql, con, index_col=index_col, coerce_float=coerce_float,
-        params=params
+        params=params, **kw
+    )
+    if chunksize is None:
+        return _to_geo_frame(data, geom_col, mixed)
+    else:
+        return (_to_geo_frame(chunk, geom_col, mixed) for chunk in data)
+
+
+def read_sql_partitioned(sql, con_factory, geom_col, partition_col, bounds,
+        n_partitions, index_col=None, coerce_float=True, params=None,
+        placeholder='%s', n_jobs=None, max_connections=None,
+        mixed='generic'):
+    """
+    Query SQL/MM database with partitioned query and return GIS data frame
+    with specified column as GIS series.
+
+    The range of partition column values is split into `n_partitions`
+    ranges of equal size. The first and the last range are open-ended, so
+    the values outside of the bounds are read as well. The rows with null
+    value of partition column are read with additional partition and are
+    the last rows of the data frame. The query of each partition is
+    executed in a thread with its own database connection. At most
+    `max_connections` queries are executed at once, one per partition by
+    default. The WKB data of each partition is decoded with NumPy in
+    worker processes, see :py:func:`geocoon.parallel.set_n_jobs`, then
+    the partitions are concatenated into single GIS data frame.
+
+    The query is wrapped as subquery and filtered with partition column
+    range condition. The range parameters are appended to query
+    parameters, therefore the parameters have to be a sequence.
+
+    :param sql: SQL query.
+    :param con_factory: Function creating new database connection.
+    :param geom_col: GIS column (can be collection of column names).
+    :param partition_col: Column used to partition the query.
+    :param bounds: Lower and upper bound of partition column values.
+    :param n_partitions: Number of partitions.
+    :param index_col: Index column.
+    :param coerce_float: Convert decimal values to float numbers.
+    :param params: Sequence of query parameters.
+    :param placeholder: Query parameter placeholder of database driver.
+    :param n_jobs: Number of worker processes decoding WKB data.
+    :param max_connections: Maximum number of database connections open
+        at once.
+    :param mixed: Action on geometries of different classes, `raise` or
+        `generic`.
+
+    .. seealso:: :py:func:`read_sql`
+    """
+    if isinstance(geom_col, str):
+        geom_col = (geom_col,)
+    if n_partitions < 1:
+        raise ValueError(
+            'Invalid number of partitions: {}'.format(n_partitions)
+        )
+    if max_connections is None:
+        max_connections = n_partitions + 1
+    elif max_connections < 1:
+        raise ValueError(
+            'Invalid number of connections: {}'.format(max_connections)
+        )
+    n_jobs = parallel.get_n_jobs(n_jobs)
+
+    queries = _partition_queries(
+        sql, partition_col, bounds, n_partitions, placeholder,
+        tuple(params or ())
+    )
+    with ExitStack() as stack:
+        threads = stack.enter_context(ThreadPoolExecutor(max_connections))
+        executor = stack.enter_context(ProcessPoolExecutor(n_jobs)) \
+            if n_jobs > 1 else None
+        read = lambda query: _read_partition(
+            query, con_factory, geom_col, index_col, coerce_float, executor
+        )
+        parts = list(threads.map(read, queries))
+
+    return _concat_partitions(parts, geom_col, index_col, mixed)
+
+
+async def read_sql_async(sql, con, geom_col, index_col=None, params=None,
+        chunksize=10000, executor=None, mixed='generic'):
+    """
+    Query SQL/MM database with asynchronous connection and return GIS data
+    frame with specified column as GIS series.
+
+    The connection has to provide asyncpg compatible `fetch` coroutine,
+    which returns list of records. The records are converted into data
+    frames and the WKB data is decoded in batches of `chunksize` rows with
+    the executor, so the event loop is not blocked.
+
+    :param sql: SQL query.
+    :param con: Asynchronous database connection.
+    :param geom_col: GIS column (can be collection of column names).
+    :param index_col: Index column.
+    :param params: Sequence of query parameters.
+    :param chunksize: Number of rows in each batch.
+    :param executor: Executor used to decode WKB data, default executor
+        of the event loop if null.
+    :param mixed: Action on geometries of different classes, `raise` or
+        `generic`.
+
+    .. seealso:: :py:func:`read_sql`
+    """
+    if isinstance(geom_col, str):
+        geom_col = (geom_col,)
+
+    loop = asyncio.get_running_loop()
+    rows = await con.fetch(sql, *(params or ()))
+    if rows:
+        columns = list(rows[0].keys())
+    else:
+        # no records to get column names from
+        columns = [] if index_col is None else [index_col]
+        columns.extend(geom_col)
+
+    parts = []
+    for i in range(0, max(1, len(rows)), chunksize):
+        part = await loop.run_in_executor(
+            executor, _decode_records, rows[i:i + chunksize], i, columns,
+            geom_col, index_col
+        )
+        parts.append(part)
+    return await loop.run_in_executor(
+        executor, _concat_partitions, parts, geom_col, index_col, mixed
+    )
+
+
+def _partition_queries(sql, partition_col, bounds, n, placeholder, params):
+    """
+    Create query and its parameters for each partition.
+
+    The first and the last range of partition column values are
+    open-ended. The query of rows with null value of partition column is
+    created as well.
+
+    :param sql: SQL query.
+    :param partition_col: Column used to partition the query.
+    :param bounds: Lower and upper bound of partition column values.
+    :param n: Number of partitions.
+    :param placeholder: Query parameter placeholder.
+    :param params: Tuple of query parameters.
+    """
+    lower, upper = bounds
+    step = (upper - lower) / n
+    edges = [None] + [lower + step * i for i in range(1, n)] + [None]
+
+    query = 'select * from ({}) as _partition where {}'.format
+    ops = '>=', '<'
+    for i in range(n):
+        values = [v for v in edges[i:i + 2] if v is not None]
+        cond = [
+            '{} {} {}'.format(partition_col, op, placeholder)
+            for op, v in zip(ops, edges[i:i + 2]) if v is not None
+        ]
+        cond = cond or ['{} is not null'.format(partition_col)]
+        yield query(sql, ' and '.join(cond)), params + tuple(values)
+    yield query(sql, '{} is null'.format(partition_col)), params
+
+
+def _read_partition(query, con_factory, geom_col, index_col, coerce_float,
+        executor):
+    """
+    Read data frame of a partition and decode its WKB data.
+
+    Tuple of data frame and dictionary of decoded WKB data of each GIS
+    column is returned.
+
+    :param query: Tuple of partition query and its parameters.
+    :param con_factory: Function creating new database connection.
+    :param geom_col: Collection of GIS column names.
+    :param index_col: Index column.
+    :param coerce_float: Convert decimal values to float numbers.
+    :param executor: Process pool executor or null.
+    """
+    sql, params = query
+    con = con_factory()
+    try:
+        data = pandas.io.sql.read_sql(
+            sql, con, index_col=index_col, coerce_float=coerce_float,
+            params=params
+        )
+    finally:
+        con.close()
+
+    values = [to_bytes(data[col]) for col in geom_col]
+    if executor is None:
+        decoded = [decode(v) for v in values]
+    else:
+        decoded = list(executor.map(decode, values))
+    return data, dict(zip(geom_col, decoded))
+
+
+def _decode_records(rows, start, columns, geom_col, index_col):
+    """
+    Create data frame from batch of records and decode its WKB data.
+
+    Tuple of data frame and dictionary of decoded WKB data of each GIS
+    column is returned.
+
+    :param rows: Batch of records.
+    :param start: Position of first record of the batch.
+    :param columns: Column names.
+    :param geom_col: Collection of GIS column names.
+    :param index_col: Index column.
+    """
+    data = pandas.DataFrame.from_records(
+        [tuple(r) for r in rows], columns=columns
     )
+    data.index = pandas.RangeIndex(start, start + len(rows))
+    if index_col is not None:
+        data = data.set_index(index_col)
+    decoded = (decode(to_bytes(data[col])) for col in geom_col)
+    return data, dict(zip(geom_col, decoded))
+
+
+def _concat_partitions(parts, geom_col, index_col, mixed):
+    """
+    Concatenate partitions into GIS data frame.
+
+    If index column is not specified, then the data frame has new range
+    index.
+
+    :param parts: List of tuples of data frame and dictionary of decoded
+        WKB data of each GIS column.
+    :param geom_col: Collection of GIS column names.
+    :param index_col: Index column.
+    :param mixed: Action on geometries of different classes.
+    """
+    frames = [frame for frame, _ in parts]
+    data = pandas.concat(frames, ignore_index=index_col is None)
+    columns = dict(data.items())
+    for col in geom_col:
+        decoded = [coords[col] for _, coords in parts]
+        wkb = [f[col] for f in frames]
+        columns[col] = _concat_geometries(decoded, wkb, data.index, mixed)
+    return GeoDataFrame(columns, index=data.index, copy=False)
+
+
+def _concat_geometries(decoded, wkb, index, mixed):
+    """
+    Create GIS series from decoded WKB data of partitions.
+
+    If WKB data of a partition could not be decoded or partitions contain
+    different geometries, then GIS series is created from WKB data.
+
+    :param decoded: List of decoded WKB data of partitions.
+    :param wkb: List of WKB data of partitions.
+    :param index: Index of GIS series.
+    :param mixed: Action on geometries of different classes.
+    """
+    items = [d for d, w in zip(decoded, wkb) if len(w)]
+    if items and all(d is not None for d in items):
+        geom_type = items[0][0]
+        coords = [d[1] for d in items]
+        ndim = {
+            len(c) if geom_type == WKB_POINT else c[0].shape[1]
+            for c in coords
+        }
+        if all(d[0] == geom_type for d in items) and len(ndim) == 1:
+            if geom_type == WKB_POINT:
+                coords = numpy.concatenate(coords, axis=1)
+            else:
+                coords = concat_packed(coords)
+            series = _FROM_COORDS[geom_type](*coords, index=index)
+            series.srid = _common_srid(
+                numpy.concatenate([d[2] for d in items])
+            )
+            return series
+
+    data = numpy.concatenate([numpy.asarray(w, dtype=object) for w in wkb])
+    return from_wkb(data, index=index, mixed=mixed)
+
+
+def _to_geo_frame(data, geom_col, mixed):
+    """
+    Convert data frame into GIS data frame.
+
+    The geometry columns are converted from WKB data into GIS series.
+
+    :param data: Data frame.
+    :param geom_col: Collection of GIS column names.
+    :param mixed: Action on geometries of different classes.
+    """
     data = GeoDataFrame(data)
 
     # coerce each column to GIS series
     for col in geom_col:
-        data[col] = from_wkb(data[col], index=data.index)
+        data[col] = from_wkb(data[col], index=data.index, mixed=mixed)
 
     return data
 
 
+def to_sql(data, name, con, schema=None, if_exists='fail', index=True,
+        index_label=None, chunksize=10000, srid=None):
+    """
+    Write GIS data frame into PostgreSQL table using binary COPY.
+
+    The rows are streamed to database in PostgreSQL binary COPY format and
+    GIS series are encoded as EWKB data carrying the SRID. The rows are
+    encoded in batches of `chunksize` rows, so memory usage is bounded by
+    the chunk size.
+
+    The connection has to be psycopg2 or psycopg 3 connection. The
+    transaction is not committed.
+
+    The parameters follow `pandas.DataFrame.to_sql` method, so they can be
+    passed by position as well.
+
+    :param data: GIS data frame.
+    :param name: Table name.
+    :param con: Database connection.
+    :param schema: Optional schema name.
+    :param if_exists: One of `fail`, `replace` or `append`.
+    :param index: Write index as a column if true.
+    :param index_label: Name of index column (or sequence of names for
+        multi-index).
+    :param chunksize: Number of rows in each batch of rows.
+    :param srid: SRID of geometries, SRID of GIS series by default.
+    """
+    if if_exists not in ('fail', 'replace', 'append'):
+        raise ValueError('Invalid if_exists value: {}'.format(if_exists))
+
+    series = [pgcopy.column(data, col) for col in data.columns]
+    labels = list(data.columns)
+    if index:
+        series = pgcopy.index_columns(data) + series
+        labels = _index_labels(data.index, index_label) + labels
+
+    table = _quote(name) if schema is None \
+        else '{}.{}'.format(_quote(schema), _quote(name))
+    columns = ', '.join(_quote(col) for col in labels)
+
+    cursor = con.cursor()
+    try:
+        if if_exists == 'replace':
+            cursor.execute('drop table if exists {}'.format(table))
+        if if_exists != 'append':
+            types = (
+                '{} {}'.format(_quote(col), pgcopy.column_type(s, srid))
+                for col, s in zip(labels, series)
+            )
+            cursor.execute('create table {} ({})'.format(
+                table, ', '.join(types)
+            ))
+
+        sql = 'copy {} ({}) from stdin with (format binary)'.format(
+            table, columns
+        )
+        stream = pgcopy.encode(
+            data, srid=srid, batchsize=chunksize, index=index
+        )
+        if hasattr(cursor, 'copy_expert'):
+            cursor.copy_expert(sql, _Reader(stream))
+        else:
+            with cursor.copy(sql) as copy:
+                for buff in stream:
+                    copy.write(buff)
+    finally:
+        cursor.close()
+
+
+def _index_labels(index, index_label):
+    """
+    Get column names of index levels.
+
+    The names are created like with `pandas.DataFrame.reset_index` method
+    if index label is not specified and index levels have no names.
+
+    :param index: Data frame index.
+    :param index_label: Name of index column or sequence of names.
+    """
+    names = index.names if index_label is None else index_label
+    if isinstance(names, str):
+        names = [names]
+    if index.nlevels == 1:
+        return ['index' if names[0] is None else names[0]]
+    return [
+        'level_{}'.format(i) if n is None else n for i, n in enumerate(names)
+    ]
+
+
+def _quote(name):
+    """
+    Quote SQL identifier.
+
+    :param name: SQL identifier.
+    """
+    return '"{}"'.format(str(name).replace('"', '""'))
+
+
+class _Reader:
+    """
+    File-like object reading data from iterator of binary strings.
+
+    Used to pass binary COPY data to psycopg2 `copy_expert` method.
+    """
+    def __init__(self, stream):
+        self._stream = stream
+        self._buff = b''
+        self._pos = 0
+
+
+    def read(self, size=-1):
+        """
+        Read at most `size` bytes, or all remaining data if `size` is
+        negative.
+        """
+        if size < 0:
+            data = self._buff[self._pos:] + b''.join(self._stream)
+            self._buff = b''
+            self._pos = 0
+            return data
+
+        while self._pos >= len(self._buff):
+            self._buff = next(self._stream, None)
+            self._pos = 0
+            if self._buff is None:
+                self._buff = b''
+                return b''
+
+        data = self._buff[self._pos:self._pos + size]
+        self._pos += len(data)
+        return data
+
+
 # vim: sw=4:et:ai
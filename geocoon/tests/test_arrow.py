@@ -0,0 +1,334 @@
+#
+# GeoCoon - GIS data analysis library based on Pandas and Shapely
+#
+# Copyright (C) 2014 by Artur Wroblewski <wrobell@pld-linux.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Apache Arrow and Parquet interchange tests.
+"""
+
+import os.path
+import tempfile
+
+import pandas
+from shapely.geometry import Point, LineString, Polygon
+
+from geocoon.core import GeoDataFrame, PointSeries, LineStringSeries, \
+    PolygonSeries
+from geocoon.arrow import to_arrow, from_arrow, to_parquet, read_parquet
+
+import unittest
+from unittest import mock
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+def create_data():
+    """
+    Create GIS data frame with points, line strings and polygons.
+    """
+    data = GeoDataFrame({
+        'a': PointSeries([Point(1, 2), Point(3, 4), Point(5, 6)]),
+        'b': [1, 2, 3],
+        'c': LineStringSeries([
+            LineString([(0, 0), (1, 1)]),
+            LineString([(1, 1), (2, 2), (3, 3)]),
+            LineString([(4, 4), (5, 5)]),
+        ]),
+        'd': PolygonSeries([
+            Polygon([(0, 0), (1, 0), (1, 1)]),
+            Polygon(
+                [(0, 0), (4, 0), (4, 4), (0, 4)],
+                [[(1, 1), (2, 1), (2, 2)]]
+            ),
+            Polygon(),
+        ]),
+    })
+    return data[['a', 'b', 'c', 'd']]
+
+
+@unittest.skipIf(pyarrow is None, 'pyarrow not installed')
+class ArrowTestCase(unittest.TestCase):
+    """
+    Apache Arrow interchange tests.
+    """
+    def assert_equal_frames(self, expected, result, columns='abcd'):
+        """
+        Check if GIS data frames have the same data.
+        """
+        self.assertEqual(GeoDataFrame, type(result))
+        self.assertEqual(list(columns), list(result.columns))
+        self.assertEqual(list(expected.index), list(result.index))
+        for col in columns:
+            if col in expected._geom_columns:
+                self.assertEqual(type(expected[col]), type(result[col]))
+                self.assertTrue(all(
+                    g1.equals(g2) or g1.is_empty and g2.is_empty
+                    for g1, g2 in zip(expected[col], result[col])
+                ))
+            else:
+                self.assertEqual(list(expected[col]), list(result[col]))
+
+
+    def test_arrow_wkb(self):
+        """
+        Test Arrow table conversion with WKB geometry encoding
+        """
+        data = create_data()
+        table = to_arrow(data)
+
+        self.assertEqual(pyarrow.binary(), table.schema.field('a').type)
+        result = from_arrow(table)
+        self.assert_equal_frames(data, result)
+        self.assertEqual(
+            {'a': PointSeries, 'c': LineStringSeries, 'd': PolygonSeries},
+            result._geom_columns
+        )
+
+
+    def test_arrow_native(self):
+        """
+        Test Arrow table conversion with native geometry encoding
+        """
+        data = create_data()
+        table = to_arrow(data, encoding='native')
+
+        self.assertEqual(
+            pyarrow.list_(pyarrow.list_(pyarrow.float64(), 2)),
+            table.schema.field('c').type
+        )
+        result = from_arrow(table)
+        self.assert_equal_frames(data, result)
+
+
+    def test_arrow_null(self):
+        """
+        Test Arrow table conversion with null geometries
+        """
+        data = create_data()
+        data['a'] = PointSeries([Point(1, 2), None, Point(5, 6)], srid=4326)
+        data['c'] = LineStringSeries([None, None, LineString([(4, 4), (5, 5)])])
+        for encoding in ('wkb', 'native'):
+            table = to_arrow(data, encoding=encoding)
+            self.assertEqual(2, table.column('c').null_count)
+
+            result = from_arrow(table)
+            self.assertEqual(PointSeries, type(result.a))
+            self.assertEqual(LineStringSeries, type(result.c))
+            self.assertEqual(4326, result.a.srid)
+            self.assertEqual([False, True, False], result.a.isna().tolist())
+            self.assertEqual([True, True, False], result.c.isna().tolist())
+            self.assertEqual(data.a[2], result.a[2])
+            self.assertEqual(data.c[2], result.c[2])
+
+
+    def test_arrow_slice(self):
+        """
+        Test Arrow table conversion of sliced table
+        """
+        data = create_data()
+        data.index = pandas.Index([10, 20, 30])
+        for encoding in ('wkb', 'native'):
+            table = to_arrow(data, encoding=encoding).slice(1, 2)
+            result = from_arrow(table)
+            self.assert_equal_frames(data[1:], result)
+
+
+    def test_arrow_metadata(self):
+        """
+        Test GeoParquet metadata of Arrow table
+        """
+        import json
+
+        table = to_arrow(create_data())
+        geo = json.loads(table.schema.metadata[b'geo'])
+        self.assertEqual('a', geo['primary_column'])
+        meta = geo['columns']['a']
+        self.assertEqual('WKB', meta['encoding'])
+        self.assertEqual(['Point'], meta['geometry_types'])
+        self.assertEqual([1, 2, 5, 6], meta['bbox'])
+
+
+    def test_arrow_srid(self):
+        """
+        Test Arrow table conversion with SRID of GIS series
+        """
+        import json
+
+        data = create_data()
+        data['a'] = PointSeries(data.a, srid=2180)
+        table = to_arrow(data)
+
+        geo = json.loads(table.schema.metadata[b'geo'])
+        crs = geo['columns']['a']['crs']
+        self.assertEqual({'authority': 'EPSG', 'code': 2180}, crs['id'])
+        self.assertIsNone(geo['columns']['c']['crs'])
+
+        result = from_arrow(table)
+        self.assertEqual(2180, result.a.srid)
+        self.assertIsNone(result.c.srid)
+
+
+    def test_arrow_srid_default(self):
+        """
+        Test Arrow table conversion without `crs` of GIS series
+        """
+        import json
+
+        table = to_arrow(create_data())
+        geo = json.loads(table.schema.metadata[b'geo'])
+        del geo['columns']['a']['crs']
+        metadata = {b'geo': json.dumps(geo).encode()}
+        table = table.replace_schema_metadata(metadata)
+
+        result = from_arrow(table)
+        self.assertEqual(4326, result.a.srid)
+
+
+    def test_arrow_encoding(self):
+        """
+        Test error on unknown geometry encoding
+        """
+        self.assertRaises(ValueError, to_arrow, create_data(), encoding='x')
+
+
+
+@unittest.skipIf(pyarrow is None, 'pyarrow not installed')
+class ParquetTestCase(unittest.TestCase):
+    """
+    Parquet interchange tests.
+    """
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._dir.name, 'data.parquet')
+
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+
+    def test_parquet(self):
+        """
+        Test writing and reading GIS data frame in Parquet file
+        """
+        data = create_data()
+        for encoding in ('wkb', 'native'):
+            data.to_parquet(self.path, encoding=encoding)
+            result = read_parquet(self.path)
+            ArrowTestCase.assert_equal_frames(self, data, result)
+
+
+    def test_parquet_srid(self):
+        """
+        Test writing and reading SRID of GIS series in Parquet file
+        """
+        data = create_data()
+        data['a'] = PointSeries(data.a, srid=4326)
+        to_parquet(data, self.path)
+
+        result = read_parquet(self.path, bbox=(0, 0, 4, 5))
+        self.assertEqual(4326, result.a.srid)
+
+
+    def test_parquet_null(self):
+        """
+        Test writing and reading null geometries in Parquet file
+        """
+        data = create_data()
+        data['a'] = PointSeries([None, Point(3, 4), Point(5, 6)])
+        data['c'] = LineStringSeries([LineString([(0, 0), (1, 1)]), None, None])
+        for encoding in ('wkb', 'native'):
+            to_parquet(data, self.path, encoding=encoding)
+            result = read_parquet(self.path)
+            self.assertEqual([True, False, False], result.a.isna().tolist())
+            self.assertEqual([False, True, True], result.c.isna().tolist())
+            self.assertEqual([3, 5], result.a[1:].x.tolist())
+
+            result = read_parquet(self.path, bbox=(0, 0, 4, 5))
+            self.assertEqual([1], list(result.index))
+
+
+    def test_parquet_columns(self):
+        """
+        Test reading Parquet file with column projection
+        """
+        data = create_data()
+        to_parquet(data, self.path)
+
+        result = read_parquet(self.path, columns=['b', 'c'])
+        ArrowTestCase.assert_equal_frames(self, data, result, columns='bc')
+        self.assertEqual({'c': LineStringSeries}, result._geom_columns)
+
+
+    def test_parquet_bbox(self):
+        """
+        Test reading Parquet file with bounding box filter
+        """
+        data = create_data()
+        data.index = pandas.Index([10, 20, 30])
+        to_parquet(data, self.path, row_group_size=1)
+
+        result = read_parquet(self.path, bbox=(2.5, 3.5, 3.5, 4.5))
+        ArrowTestCase.assert_equal_frames(self, data.iloc[1:2], result)
+
+        result = read_parquet(self.path, columns=['b'], bbox=(0, 0, 4, 5))
+        self.assertEqual([1, 2], list(result.b))
+        self.assertEqual(['b'], list(result.columns))
+
+
+    def test_parquet_bbox_range_index(self):
+        """
+        Test reading Parquet file with bounding box filter and range index
+        """
+        data = create_data()
+        to_parquet(data, self.path)
+
+        result = read_parquet(self.path, bbox=(2.5, 3.5, 3.5, 4.5))
+        ArrowTestCase.assert_equal_frames(self, data.iloc[1:2], result)
+        self.assertEqual([1], list(result.index))
+
+        result = read_parquet(self.path, columns=['b'], bbox=(4, 5, 6, 7))
+        self.assertEqual([2], list(result.index))
+
+        to_parquet(data, self.path, index=False)
+        result = read_parquet(self.path, bbox=(4, 5, 6, 7))
+        self.assertEqual([0], list(result.index))
+
+
+    def test_parquet_bbox_row_groups(self):
+        """
+        Test skipping Parquet row groups with bounding box statistics
+        """
+        import pyarrow.parquet as pq
+
+        data = create_data()
+        to_parquet(data, self.path, row_group_size=2)
+
+        with mock.patch.object(
+                pq.ParquetFile, 'read_row_groups',
+                autospec=True,
+                side_effect=pq.ParquetFile.read_row_groups) as f:
+            result = read_parquet(self.path, bbox=(4, 5, 6, 7))
+
+        self.assertEqual([1], list(f.call_args[0][1]))
+        self.assertEqual([5], list(result.a.x))
+
+
+# vim: sw=4:et:ai
@@ -0,0 +1,237 @@
+#
+# GeoCoon - GIS data analysis library based on Pandas and Shapely
+#
+# Copyright (C) 2014 by Artur Wroblewski <wrobell@pld-linux.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Redis cache of SQL query results tests.
+"""
+
+import io
+import socket
+
+import numpy
+import pandas
+from shapely.geometry import Point, LineString
+
+from geocoon.cache import SQLCache, dumps, loads
+from geocoon.core import GeoDataFrame, PointSeries, LineStringSeries
+
+import unittest
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+try:
+    import redis
+    socket.create_connection(('localhost', 6379), timeout=1).close()
+except (ImportError, OSError):
+    redis = None
+
+
+def create_data():
+    """
+    Create GIS data frame with points and line strings.
+    """
+    data = GeoDataFrame({
+        'a': PointSeries([Point(1, 2), Point(3, 4)]),
+        'b': LineStringSeries([
+            LineString([(0, 0), (1, 1)]), LineString([(1, 1), (2, 2)])
+        ]),
+        'c': ['x', 'y'],
+    })
+    return data[['a', 'b', 'c']]
+
+
+class SerializationTestCase(unittest.TestCase):
+    """
+    GIS data frame serialization tests.
+    """
+    def test_dumps_loads(self):
+        """
+        Test GIS data frame serialization
+        """
+        data = create_data()
+        buff = dumps(data)
+        self.assertNotIn(b'shapely', buff)
+
+        result = loads(buff)
+        self.assertEqual(GeoDataFrame, type(result))
+        self.assertEqual(['a', 'b', 'c'], list(result.columns))
+        self.assertEqual(PointSeries, type(result.a))
+        self.assertEqual(LineStringSeries, type(result.b))
+        self.assertEqual([1, 3], list(result.a.x))
+        self.assertEqual([2 ** 0.5] * 2, list(result.b.length))
+        self.assertEqual(['x', 'y'], list(result.c))
+
+
+    def test_dumps_loads_strings(self):
+        """
+        Test GIS data frame serialization with strings and null values
+        """
+        data = create_data()
+        data['c'] = ['zażółć', None]
+        data.index = pandas.Index(['p1', 'p2'], name='id')
+
+        result = loads(dumps(data))
+        self.assertEqual(['zażółć', None], list(result.c))
+        self.assertEqual(['p1', 'p2'], list(result.index))
+        self.assertEqual('id', result.index.name)
+
+
+    def test_dumps_unsupported(self):
+        """
+        Test error on serialization of object column with non-string values
+        """
+        data = create_data()
+        data['c'] = [b'x', {}]
+        self.assertRaises(ValueError, dumps, data)
+
+
+    def test_loads_pickle(self):
+        """
+        Test error on deserialization of pickled data
+        """
+        f = io.BytesIO()
+        header = numpy.frombuffer(b'{}', dtype=numpy.uint8)
+        numpy.savez(f, header, c=numpy.array(['x', None], dtype=object))
+        self.assertRaises(ValueError, loads, f.getvalue())
+
+
+    def test_dumps_loads_srid(self):
+        """
+        Test GIS data frame serialization with SRID of GIS series
+        """
+        data = create_data()
+        data['a'] = PointSeries(data.a, srid=2180)
+
+        result = loads(dumps(data))
+        self.assertEqual(2180, result.a.srid)
+        self.assertIsNone(result.b.srid)
+
+
+class SQLCacheKeyTestCase(unittest.TestCase):
+    """
+    SQL cache key tests.
+    """
+    def test_key(self):
+        """
+        Test SQL cache key depends on query, parameters and columns
+        """
+        cache = SQLCache(None, prefix='p:')
+        key = cache.key('select', (1,), ('a',))
+        self.assertTrue(key.startswith('p:'))
+        self.assertEqual(key, cache.key('select', (1,), ['a']))
+
+        self.assertNotEqual(key, cache.key('select 1', (1,), ('a',)))
+        self.assertNotEqual(key, cache.key('select', (2,), ('a',)))
+        self.assertNotEqual(key, cache.key('select', (1,), ('b',)))
+        self.assertNotEqual(key, cache.key('select', (1,), ('a',), 'a'))
+
+
+@unittest.skipIf(fakeredis is None, 'fakeredis not installed')
+class SQLCacheTestCase(unittest.TestCase):
+    """
+    Redis cache of SQL query results tests (fake Redis client).
+    """
+    def setUp(self):
+        self.client = self.create_client()
+        self.cache = SQLCache(self.client, prefix='geocoon-test:')
+
+
+    def create_client(self):
+        """
+        Create Redis client.
+        """
+        return fakeredis.FakeRedis()
+
+
+    def tearDown(self):
+        self.cache.clear()
+
+
+    def test_get_set(self):
+        """
+        Test storing GIS data frame in Redis cache
+        """
+        key = self.cache.key('select', None, ('a', 'b'))
+        self.assertIsNone(self.cache.get(key))
+
+        self.cache.set(key, create_data())
+        result = self.cache.get(key)
+        self.assertEqual(PointSeries, type(result.a))
+        self.assertEqual([2, 4], list(result.a.y))
+
+        ttl = self.client.ttl(key)
+        self.assertTrue(0 < ttl <= 3600)
+
+
+    def test_evict(self):
+        """
+        Test removing oldest entries from Redis cache
+        """
+        data = create_data()
+        size = len(dumps(data))
+        self.cache.maxsize = 2 * size
+
+        keys = [self.cache.key('select {}'.format(i)) for i in range(3)]
+        for k in keys:
+            self.cache.set(k, data)
+
+        self.assertIsNone(self.cache.get(keys[0]))
+        self.assertIsNotNone(self.cache.get(keys[1]))
+        self.assertIsNotNone(self.cache.get(keys[2]))
+
+
+    def test_set_too_large(self):
+        """
+        Test GIS data frame larger than Redis cache is not stored
+        """
+        self.cache.maxsize = 10
+        key = self.cache.key('select')
+        self.cache.set(key, create_data())
+        self.assertIsNone(self.cache.get(key))
+
+
+    def test_set_unsupported(self):
+        """
+        Test GIS data frame with unsupported values is not stored
+        """
+        data = create_data()
+        data['c'] = [b'x', b'y']
+        key = self.cache.key('select')
+        with self.assertLogs('geocoon.cache', 'WARNING'):
+            self.cache.set(key, data)
+        self.assertIsNone(self.cache.get(key))
+
+
+
+@unittest.skipIf(redis is None, 'Redis server not available')
+class RedisSQLCacheTestCase(SQLCacheTestCase):
+    """
+    Redis cache of SQL query results tests (Redis server).
+    """
+    def create_client(self):
+        """
+        Create Redis client.
+        """
+        return redis.Redis()
+
+
+# vim: sw=4:et:ai
@@ -0,0 +1,284 @@
+#
+# GeoCoon - GIS data analysis library based on Pandas and Shapely
+#
+# Copyright (C) 2014 by Artur Wroblewski <wrobell@pld-linux.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Coordinate arrays unit tests.
+"""
+
+import numpy
+from shapely.geometry import Point, LineString, Polygon, GeometryCollection
+
+from geocoon.coords import point_coords, line_coords, line_shapes, \
+    segment_lengths, is_closed, polygon_coords, polygon_shapes, \
+    ring_areas, polygon_areas, polygon_centroids, concat_packed, \
+    simplify_lines
+
+import unittest
+
+
+class PointCoordsTestCase(unittest.TestCase):
+    """
+    Point coordinates tests.
+    """
+    def test_point_coords(self):
+        """
+        Test creating array of point coordinates
+        """
+        coords = point_coords([Point(1, 2), Point(3, 4)])
+        self.assertEqual((2, 2), coords.shape)
+        self.assertEqual([[1, 3], [2, 4]], coords.tolist())
+
+
+    def test_point_coords_mixed(self):
+        """
+        Test creating array of point coordinates (2D and 3D points)
+        """
+        coords = point_coords([Point(1, 2, 5), Point(3, 4)])
+        self.assertEqual((2, 2), coords.shape)
+
+
+    def test_point_coords_null(self):
+        """
+        Test creating array of point coordinates (null and empty values)
+        """
+        data = [Point(1, 2, 5), None, GeometryCollection(), Point(3, 4, 6)]
+        coords = point_coords(data)
+        self.assertEqual((3, 4), coords.shape)
+        self.assertEqual([1, 2, 5], coords[:, 0].tolist())
+        self.assertTrue(numpy.isnan(coords[:, 1:3]).all())
+        self.assertEqual([3, 4, 6], coords[:, 3].tolist())
+
+
+    def test_point_coords_nan(self):
+        """
+        Test creating array of point coordinates (Pandas' missing values)
+        """
+        coords = point_coords([Point(1, 2), numpy.nan])
+        self.assertEqual([1, 2], coords[:, 0].tolist())
+        self.assertTrue(numpy.isnan(coords[:, 1]).all())
+
+
+
+class LineCoordsTestCase(unittest.TestCase):
+    """
+    Line string coordinates tests.
+    """
+    def setUp(self):
+        """
+        Create line strings.
+        """
+        self.lines = [
+            LineString([(0, 0), (3, 4)]),
+            LineString([(1, 1), (1, 2), (2, 2), (1, 1)]),
+            LineString([(5, 5), (5, 6), (6, 6)]),
+        ]
+
+
+    def test_line_coords(self):
+        """
+        Test creating packed array of line string coordinates
+        """
+        coords, offsets = line_coords(self.lines)
+        self.assertEqual((9, 2), coords.shape)
+        self.assertEqual([0, 2, 6, 9], offsets.tolist())
+        self.assertEqual([1, 2], coords[3].tolist())
+
+
+    def test_line_coords_empty(self):
+        """
+        Test creating packed array of line string coordinates (no lines)
+        """
+        coords, offsets = line_coords([])
+        self.assertEqual((0, 2), coords.shape)
+        self.assertEqual([0], offsets.tolist())
+
+
+    def test_line_coords_null(self):
+        """
+        Test creating packed array of line string coordinates (null values
+        and empty geometries)
+        """
+        data = [self.lines[0], None, GeometryCollection(), LineString()]
+        coords, offsets = line_coords(data)
+        self.assertEqual((2, 2), coords.shape)
+        self.assertEqual([0, 2, 2, 2, 2], offsets.tolist())
+
+
+    def test_line_shapes(self):
+        """
+        Test creating line strings from packed array of coordinates
+        """
+        lines = line_shapes(*line_coords(self.lines))
+        self.assertEqual(3, len(lines))
+        self.assertTrue(all(l1.equals(l2) for l1, l2 in zip(self.lines, lines)))
+
+
+    def test_concat_packed(self):
+        """
+        Test concatenating packed arrays of line string coordinates
+        """
+        data = [line_coords(self.lines[:2]), line_coords(self.lines[2:])]
+        coords, offsets = concat_packed(data)
+        expected = line_coords(self.lines)
+        self.assertEqual(expected[0].tolist(), coords.tolist())
+        self.assertEqual(expected[1].tolist(), offsets.tolist())
+
+
+    def test_segment_lengths(self):
+        """
+        Test calculating length of packed lines
+        """
+        value = segment_lengths(*line_coords(self.lines))
+        expected = [g.length for g in self.lines]
+        self.assertEqual(expected, value.tolist())
+
+
+    def test_is_closed(self):
+        """
+        Test checking if packed lines are closed
+        """
+        value = is_closed(*line_coords(self.lines))
+        self.assertEqual([False, True, False], value.tolist())
+
+
+    def test_simplify_lines(self):
+        """
+        Test simplifying packed lines
+        """
+        lines = self.lines + [
+            LineString([(0, 0), (1, 0.1), (2, -0.1), (3, 5), (4, 6), (5, 0)]),
+            LineString([(0, 0), (0, 0), (1, 0.1), (2, 0), (2, 0)]),
+            LineString([(1, 1), (1, 1.1), (1, 1)]),
+            LineString([(0, 0), (5, 0), (0, 0)]),
+            LineString(),
+        ]
+        packed = line_coords(lines)
+        for tolerance in (0, 0.5, 2):
+            value = line_shapes(*simplify_lines(*packed, tolerance))
+            expected = [
+                g.simplify(tolerance, preserve_topology=False) for g in lines
+            ]
+            for v, e in zip(value, expected):
+                self.assertEqual(e.is_empty, v.is_empty)
+                if not e.is_empty:
+                    self.assertEqual(list(e.coords), list(v.coords))
+
+
+    def test_simplify_lines_random(self):
+        """
+        Test simplifying packed lines with the same result as Shapely
+        """
+        rng = numpy.random.default_rng(1)
+        lines = [
+            LineString(numpy.cumsum(rng.normal(size=(n, 2)), axis=0).round(1))
+            for n in rng.integers(2, 50, size=100)
+        ]
+        coords, offsets = simplify_lines(*line_coords(lines), 1)
+        value = line_shapes(coords, offsets)
+        expected = [g.simplify(1, preserve_topology=False) for g in lines]
+        self.assertEqual(
+            [list(g.coords) for g in expected], [list(g.coords) for g in value]
+        )
+
+
+
+class PolygonCoordsTestCase(unittest.TestCase):
+    """
+    Polygon coordinates tests.
+    """
+    def setUp(self):
+        """
+        Create polygons.
+        """
+        shell = [(0, 0), (0, 10), (10, 10), (10, 0), (0, 0)]
+        hole1 = [(1, 1), (2, 1), (2, 2), (1, 1)]
+        hole2 = [(5, 5), (5, 7), (7, 7), (7, 5), (5, 5)]
+        self.polygons = [
+            Polygon(shell, [hole1, hole2]),
+            Polygon(),
+            Polygon([(20, 20), (22, 20), (21, 23)]),
+        ]
+
+
+    def test_polygon_coords(self):
+        """
+        Test creating packed array of polygon coordinates
+        """
+        coords, ring_offsets, offsets = polygon_coords(self.polygons)
+        self.assertEqual((18, 2), coords.shape)
+        self.assertEqual([0, 5, 9, 14, 18], ring_offsets.tolist())
+        self.assertEqual([0, 3, 3, 4], offsets.tolist())
+
+
+    def test_polygon_shapes(self):
+        """
+        Test creating polygons from packed array of coordinates
+        """
+        polygons = polygon_shapes(*polygon_coords(self.polygons))
+        self.assertEqual(3, len(polygons))
+        self.assertTrue(all(
+            p1.equals(p2) for p1, p2 in zip(self.polygons, polygons)
+        ))
+
+
+    def test_concat_packed(self):
+        """
+        Test concatenating packed arrays of polygon coordinates
+        """
+        data = [
+            polygon_coords(self.polygons[:1]),
+            polygon_coords(self.polygons[1:]),
+        ]
+        result = concat_packed(data)
+        expected = polygon_coords(self.polygons)
+        self.assertEqual(3, len(result))
+        for a, b in zip(expected, result):
+            self.assertEqual(a.tolist(), b.tolist())
+
+
+    def test_ring_areas(self):
+        """
+        Test calculating signed area of packed rings
+        """
+        coords, ring_offsets, _ = polygon_coords(self.polygons)
+        value = ring_areas(coords, ring_offsets)
+        self.assertEqual([100, -0.5, 4, -3], value.tolist())
+
+
+    def test_polygon_areas(self):
+        """
+        Test calculating area of packed polygons
+        """
+        value = polygon_areas(*polygon_coords(self.polygons))
+        self.assertEqual([g.area for g in self.polygons], value.tolist())
+
+
+    def test_polygon_centroids(self):
+        """
+        Test calculating centroid of packed polygons
+        """
+        value = polygon_centroids(*polygon_coords(self.polygons))
+        self.assertEqual((2, 3), value.shape)
+        for i in (0, 2):
+            c = self.polygons[i].centroid
+            self.assertEqual([c.x, c.y], value[:, i].tolist())
+        self.assertTrue(numpy.isnan(value[:, 1]).all())
+
+
+# vim: sw=4:et:ai
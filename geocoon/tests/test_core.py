@@ -21,14 +21,28 @@
 GeoCoon core unit tests.
 """
 
+import gc
+import weakref
+
+import numpy
 import pandas
-from shapely.geometry import Point, LineString, Polygon
+from shapely.geometry import Point, LineString, Polygon, \
+    GeometryCollection, box
+import shapely.wkb
+import shapely.wkt
 
-from geocoon.core import GeoDataFrame, PointSeries, LineStringSeries, \
-    PolygonSeries, fetch_attr
+from geocoon.core import GeoDataFrame, GeoSeries, PointSeries, \
+    LineStringSeries, PolygonSeries, fetch_attr, series_cache, \
+    SIMPLIFY_MAX_VERTICES, _SERIES_CACHE
 from geocoon.meta import META_POINT, META_LINE_STRING, META_POLYGON
 
 import unittest
+from unittest import mock
+
+try:
+    import pyproj
+except ImportError:
+    pyproj = None
 
 
 class GeoDataFrameTestCase(unittest.TestCase):
@@ -101,6 +115,21 @@ class GeoDataFrameTestCase(unittest.TestCase):
         self.assertTrue(all([4] * 2 == df.b))
 
 
+    def test_srid(self):
+        """
+        Test GIS data frame keeps SRID of GIS series
+        """
+        series = PointSeries([Point(v, v * 2) for v in range(5)], srid=4326)
+        df = GeoDataFrame({'a': series, 'b': [4, 5, 5, 4, 5]})
+        df['c'] = PointSeries([Point(0, 0)] * 5)
+
+        self.assertEqual(4326, df.a.srid)
+        self.assertIsNone(df.c.srid)
+        self.assertEqual(4326, df[df.b == 4].a.srid)
+        self.assertEqual(4326, df.head(2).a.srid)
+        self.assertEqual(4326, df.groupby('b').get_group(5).a.srid)
+
+
 
 class GeoSeriesTestCase(unittest.TestCase):
     """
@@ -115,6 +144,86 @@ class GeoSeriesTestCase(unittest.TestCase):
         self.assertEqual(PointSeries, type(series))
 
 
+    def test_srid(self):
+        """
+        Test GIS series SRID
+        """
+        series = PointSeries([Point(v, v * 2) for v in range(3)], srid=4326)
+        self.assertEqual(4326, series.srid)
+        self.assertIsNone(PointSeries([Point(1, 1)]).srid)
+
+        self.assertEqual(4326, PointSeries(series).srid)
+        self.assertEqual(3857, PointSeries(series, srid=3857).srid)
+        self.assertEqual(4326, series[1:].srid)
+        self.assertEqual(4326, series.iloc[[0, 2]].srid)
+        self.assertEqual(4326, series[series.x > 0].srid)
+        self.assertEqual(4326, series.copy().srid)
+
+
+    def test_name(self):
+        """
+        Test GIS series name is kept on slicing and copying
+        """
+        data = [Point(v, v * 2) for v in range(3)]
+        series = PointSeries(data, name='loc', srid=4326)
+
+        items = [
+            series.copy(), series.head(), series.iloc[:1], series[1:],
+            series[series.x > 0], series.sort_index(), series.cx[0:1, 0:2],
+        ]
+        for item in items:
+            self.assertEqual('loc', item.name)
+            self.assertEqual(4326, item.srid)
+
+
+    @unittest.skipIf(pyproj is None, 'pyproj not installed')
+    def test_to_srid(self):
+        """
+        Test transforming GIS series into another spatial reference system
+        """
+        points = PointSeries([Point(1, 1), Point(0, 0)], index=['a', 'b'])
+        self.assertRaises(ValueError, points.to_srid, 3857)
+
+        points.srid = 4326
+        lines = LineStringSeries([LineString([(0, 0), (1, 1)])], srid=4326)
+        polygons = PolygonSeries([box(0, 0, 1, 1)], srid=4326)
+        generic = GeoSeries([Point(1, 1), None], srid=4326)
+
+        expected = (111319.49079327357, 111325.1428663851)
+        for series in (points, lines, polygons, generic):
+            value = series.to_srid(3857)
+            self.assertEqual(type(series), type(value))
+            self.assertEqual(3857, value.srid)
+            self.assertEqual(list(series.index), list(value.index))
+            numpy.testing.assert_almost_equal(
+                expected, value.values[0].bounds[2:], 6
+            )
+
+        value = points.to_srid(3857)
+        self.assertEqual([1, 0], list(value.to_srid(4326).x.round(9)))
+        self.assertIsNone(generic.to_srid(3857)[1])
+
+
+    def test_to_srid_null(self):
+        """
+        Test transforming GIS series with null values into another spatial
+        reference system
+        """
+        points = PointSeries([Point(1, 1), None], srid=4326)
+        lines = LineStringSeries(
+            [LineString([(0, 0), (1, 1)]), None], srid=4326
+        )
+        polygons = PolygonSeries([box(0, 0, 1, 1), None], srid=4326)
+        for series in (points, lines, polygons):
+            value = series.to_srid(3857)
+            self.assertEqual([False, True], value.isna().tolist())
+            self.assertTrue(value.bounds.loc[1].isna().all())
+
+        value = points.to_srid(3857)
+        self.assertTrue(numpy.isnan(value.x[1]))
+        self.assertIsNone(value.to_wkb()[1])
+
+
     def test_fetch_attr(self):
         """
         Test fetch GIS properties from GIS series
@@ -125,6 +234,253 @@ class GeoSeriesTestCase(unittest.TestCase):
         self.assertTrue(all(y == [2, 4]))
 
 
+    def test_cache(self):
+        """
+        Test GIS series property values are cached
+        """
+        data = [Point(v, v * 2) for v in [1, 2]]
+        series = PointSeries(data)
+
+        value = series.wkb
+        cached = series_cache(series)['wkb']
+        self.assertEqual(list(cached), list(series.wkb))
+        self.assertIs(cached, series_cache(series)['wkb'])
+
+        # cache is not modified via returned series
+        value[0] = None
+        self.assertEqual(Point(1, 2).wkb, series.wkb[0])
+
+
+    def test_cache_shared(self):
+        """
+        Test GIS series property values cache is shared by data frame column
+        """
+        data = [Point(v, v * 2) for v in [1, 2]]
+        df = GeoDataFrame({'a': PointSeries(data)})
+
+        df.a.wkt
+        cached = series_cache(df.a)['wkt']
+        df.a.wkt
+        self.assertIs(cached, series_cache(df.a)['wkt'])
+
+
+    def test_cache_setitem(self):
+        """
+        Test GIS series property values cache is cleared on item assignment
+        """
+        data = [Point(v, v * 2) for v in [1, 2]]
+        series = PointSeries(data)
+        self.assertEqual(['POINT (1 2)', 'POINT (2 4)'], list(series.wkt))
+
+        series[0] = Point(3, 3)
+        self.assertEqual(['POINT (3 3)', 'POINT (2 4)'], list(series.wkt))
+
+
+    def test_cache_slice(self):
+        """
+        Test GIS series cache is cleared for slices sharing the data
+        """
+        data = [Point(v, v * 2) for v in [1, 2, 3]]
+        series = PointSeries(data)
+        view = series[0:2]
+        self.assertEqual([1, 2], view.x.tolist())
+
+        series[0] = Point(100, 100)
+        self.assertEqual([100, 2], view.x.tolist())
+
+        series = PointSeries(data)
+        self.assertEqual([1, 2, 3], series.x.tolist())
+        self.assertEqual([1, 2, 1, 2], series.bounds.loc[0].tolist())
+        view = series[0:2]
+        view[0] = Point(50, 50)
+        self.assertEqual([50, 2, 3], series.x.tolist())
+        self.assertEqual([50, 50, 50, 50], series.bounds.loc[0].tolist())
+
+
+    def test_cache_iloc(self):
+        """
+        Test GIS series property values cache is cleared on indexer update
+        """
+        data = [Point(v, v * 2) for v in [1, 2]]
+        series = PointSeries(data)
+        self.assertTrue(all([1, 2] == series.x))
+
+        series.iloc[1] = Point(3, 3)
+        self.assertTrue(all([1, 3] == series.x))
+
+
+    def test_clear_cache(self):
+        """
+        Test clearing GIS series property values cache
+        """
+        data = [Point(v, v * 2) for v in [1, 2]]
+        series = PointSeries(data)
+
+        wkt = series.wkt.values
+        series.clear_cache()
+        self.assertIsNot(wkt, series.wkt.values)
+
+
+    def test_query(self):
+        """
+        Test GIS series spatial index query
+        """
+        data = [Point(v, v * 2) for v in [1, 2, 3, 4]]
+        series = PointSeries(data, index=list('abcd'))
+
+        value = series.query(box(1.5, 0, 3.5, 8), predicate='intersects')
+        self.assertEqual(['b', 'c'], list(value))
+
+
+    def test_nearest(self):
+        """
+        Test GIS series spatial index nearest geometries query
+        """
+        data = [Point(v, v * 2) for v in [1, 2, 3, 4]]
+        series = PointSeries(data, index=list('abcd'))
+
+        value = series.nearest(Point(3.9, 8), k=2)
+        self.assertEqual(['d', 'c'], list(value))
+
+
+    def test_sindex_setitem(self):
+        """
+        Test GIS series spatial index is recreated on item assignment
+        """
+        data = [Point(v, v * 2) for v in [1, 2, 3, 4]]
+        series = PointSeries(data, index=list('abcd'))
+        sindex = series.sindex
+        self.assertIs(sindex, series.sindex)
+
+        series['a'] = Point(3.9, 8)
+        self.assertIsNot(sindex, series.sindex)
+        self.assertEqual(['a'], list(series.nearest(Point(3.9, 8))))
+
+
+    def test_sindex_release(self):
+        """
+        Test GIS series cache with spatial index is removed with the
+        series
+        """
+        series = PointSeries([Point(v, v * 2) for v in [1, 2, 3, 4]])
+        series.query(box(0, 0, 2, 2))
+        values = weakref.ref(series.values)
+        key = id(series.values)
+        self.assertIn(key, _SERIES_CACHE)
+
+        del series
+        gc.collect()
+        self.assertIsNone(values())
+        self.assertNotIn(key, _SERIES_CACHE)
+
+
+    def test_prepare_release(self):
+        """
+        Test GIS series cache with prepared geometries is removed with
+        the series
+        """
+        series = PolygonSeries([box(v, v, v + 1, v + 1) for v in range(3)])
+        series.prepare().contains(Point(1.5, 1.5))
+        values = weakref.ref(series.values)
+        key = id(series.values)
+        self.assertEqual(3, len(series_cache(series)['prepared']))
+
+        del series
+        gc.collect()
+        self.assertIsNone(values())
+        self.assertNotIn(key, _SERIES_CACHE)
+
+
+    def test_bounds(self):
+        """
+        Test GIS series bounds
+        """
+        data = [Point(v, v * 2) for v in [1, 2]]
+        series = PointSeries(data, index=list('ab'))
+        bounds = series.bounds
+
+        self.assertEqual(['minx', 'miny', 'maxx', 'maxy'], list(bounds.columns))
+        self.assertEqual(list('ab'), list(bounds.index))
+        self.assertEqual([[1, 2, 1, 2], [2, 4, 2, 4]], bounds.values.tolist())
+
+
+    def test_bounds_null(self):
+        """
+        Test GIS series bounds, bounding box indexer and spatial index with
+        null values
+        """
+        polygons = PolygonSeries([box(0, 0, 1, 1), None, box(2, 2, 3, 3)])
+        lines = LineStringSeries([LineString([(0, 0), (1, 1)]), None])
+        for series in (polygons, lines):
+            bounds = series.bounds
+            self.assertEqual([0, 0, 1, 1], bounds.loc[0].tolist())
+            self.assertTrue(bounds.loc[1].isna().all())
+            self.assertEqual([0], list(series.cx[0:1.5, 0:1.5].index))
+            self.assertEqual([0], list(series.query(box(0, 0, 1.5, 1.5))))
+
+        self.assertEqual([2], list(polygons.nearest(Point(2.5, 2.5))))
+
+
+    def test_reindex(self):
+        """
+        Test GIS series properties with missing values introduced by
+        reindexing
+        """
+        points = PointSeries([Point(1, 3), Point(2, 4)]).reindex([0, 1, 2])
+        self.assertTrue(numpy.isnan(points.x[2]))
+        self.assertTrue(points.bounds.loc[2].isna().all())
+        self.assertIsNone(points.to_wkb()[2])
+        self.assertIsNone(points.to_wkt()[2])
+
+        lines = LineStringSeries([LineString([(0, 0), (3, 4)])])
+        lines = lines.reindex([0, 1])
+        self.assertEqual([5, 0], lines.length.tolist())
+        self.assertTrue(lines.bounds.loc[1].isna().all())
+
+        polygons = PolygonSeries([box(0, 0, 1, 1)]).reindex([0, 1])
+        self.assertTrue(polygons.bounds.loc[1].isna().all())
+        self.assertIsNone(polygons.to_wkb()[1])
+
+
+    def test_bounds_packed(self):
+        """
+        Test GIS series bounds calculated with packed coordinates
+        """
+        lines = [
+            LineString([(0, 0), (3, 4), (1, 5)]),
+            LineString(),
+            LineString([(1, 1), (1, 2), (2, 2)]),
+        ]
+        polygons = [box(0, 0, 1, 2), Polygon(), box(3, 4, 5, 6).buffer(1)]
+        for series in (LineStringSeries(lines), PolygonSeries(polygons)):
+            expected = series.bounds.values
+            series.clear_cache()
+            series.to_coords()
+            value = series.bounds.values
+
+            self.assertEqual(expected[[0, 2]].tolist(), value[[0, 2]].tolist())
+            self.assertTrue(numpy.isnan(expected[1]).all())
+            self.assertTrue(numpy.isnan(value[1]).all())
+
+
+    def test_cx(self):
+        """
+        Test GIS series bounding box indexer
+        """
+        data = [box(v, v, v + 1, v + 1) for v in range(5)]
+        series = PolygonSeries(data, index=list('abcde'))
+
+        value = series.cx[1.5:2.5, 0:3]
+        self.assertEqual(PolygonSeries, type(value))
+        self.assertEqual(['b', 'c'], list(value.index))
+
+        value = series.cx[3.5:, :]
+        self.assertEqual(['d', 'e'], list(value.index))
+
+        value = series.cx[:, :0.5]
+        self.assertEqual(['a'], list(value.index))
+
+
     def test_select(self):
         """
         Test selecting from GIS series
@@ -191,6 +547,20 @@ class PointSeriesTestCase(unittest.TestCase):
         self.assertEqual(PolygonSeries, type(value))
 
 
+    def test_method_adapt_buffer_parallel(self):
+        """
+        Test adaptation of point buffer method (parallel)
+        """
+        data = [Point(v, v * 2) for v in range(10)]
+        series = PointSeries(data, index=list('abcdefghij'))
+        value = series.buffer(0.2, resolution=3, n_jobs=2)
+
+        self.assertEqual(PolygonSeries, type(value))
+        self.assertEqual(list('abcdefghij'), list(value.index))
+        expected = series.buffer(0.2, resolution=3)
+        self.assertTrue(all(expected.equals(value)))
+
+
     def test_method_adapt_geom(self):
         """
         Test adaptation of point methods (first param is geometry)
@@ -211,6 +581,241 @@ class PointSeriesTestCase(unittest.TestCase):
         self.assertTrue(all([True, True, False] == value), value)
 
 
+    def test_method_adapt_geom_parallel(self):
+        """
+        Test adaptation of point methods (first param is geometry, parallel)
+        """
+        p1 = [Point(v, v * 2) for v in [5, 2, 4]]
+        p2 = [Point(v, v * 2) for v in [5, 2]] + [Point(4.1, 1)]
+        s1 = PointSeries(p1)
+        s2 = PointSeries(p2)
+
+        value = s1.equals(s2, n_jobs=2)
+        self.assertTrue(all([True, True, False] == value), value)
+
+        value = s1.intersection(s2, n_jobs=2)
+        self.assertEqual(PointSeries, type(value))
+        self.assertTrue(value[0].equals(p1[0]))
+        self.assertTrue(value[2].is_empty)
+
+
+    def test_coords(self):
+        """
+        Test point coordinates are views of coordinates array
+        """
+        data = [Point(v, v * 2, v * 3) for v in [5, 2, 4]]
+        series = PointSeries(data)
+
+        self.assertTrue(all([5, 2, 4] == series.x))
+        self.assertTrue(all([10, 4, 8] == series.y))
+        self.assertTrue(all([15, 6, 12] == series.z))
+
+        self.assertTrue(numpy.shares_memory(series.x.values, series.x.values))
+
+
+    def test_coords_2d(self):
+        """
+        Test point coordinates of 2D points
+        """
+        data = [Point(v, v * 2) for v in [5, 2, 4]]
+        series = PointSeries(data)
+
+        self.assertTrue(all([5, 2, 4] == series.x))
+        self.assertTrue(all([10, 4, 8] == series.y))
+
+
+    def test_coords_modify(self):
+        """
+        Test if modification of point coordinates is not allowed
+        """
+        series = PointSeries([Point(1, 2), Point(3, 4)])
+        x = series.x
+        self.assertRaises(ValueError, x.__setitem__, 0, 99)
+        self.assertEqual([1, 3], series.x.tolist())
+
+
+    def test_coords_null(self):
+        """
+        Test point series with null values and empty geometries
+        """
+        data = [Point(1, 2), None, GeometryCollection(), Point(3, 4)]
+        series = PointSeries(data, index=list('abcd'))
+
+        self.assertEqual([False, True, True, False], series.x.isna().tolist())
+        self.assertTrue(series.bounds.loc[['b', 'c']].isna().all().all())
+        self.assertEqual([1, 2, 1, 2], series.bounds.loc['a'].tolist())
+
+        d = series.distance(series)
+        self.assertEqual([False, True, True, False], d.isna().tolist())
+        d = series.distance(Point(1, 2))
+        self.assertEqual([0, 2 * 2 ** 0.5], d[['a', 'd']].tolist())
+        self.assertEqual([False, True, True, False], d.isna().tolist())
+
+        self.assertEqual(['a', 'd'], list(series.cx[0:5, 0:5].index))
+        self.assertEqual(['a', 'd'], list(series.query(box(0, 0, 5, 5))))
+        self.assertTrue(series.step_distance().isna().all())
+
+        data = series.to_wkb()
+        self.assertIsNone(data['b'])
+        self.assertTrue(shapely.wkb.loads(data['c']).is_empty)
+        self.assertEqual(Point(3, 4), shapely.wkb.loads(data['d']))
+        data = series.to_wkt()
+        self.assertEqual([None, 'GEOMETRYCOLLECTION EMPTY'], data[1:3].tolist())
+
+
+    def test_coords_update(self):
+        """
+        Test point coordinates after point series update
+        """
+        data = [Point(v, v * 2) for v in [5, 2, 4]]
+        series = PointSeries(data)
+        self.assertTrue(all([5, 2, 4] == series.x))
+
+        series[1] = Point(7, 1)
+        self.assertTrue(all([5, 7, 4] == series.x))
+
+
+    def test_distance(self):
+        """
+        Test distance between two point series
+        """
+        s1 = PointSeries([Point(v, v * 2) for v in [5, 2, 4]])
+        s2 = PointSeries([Point(v + 3, v * 2 + 4) for v in [5, 2, 4]])
+
+        value = s1.distance(s2)
+        self.assertEqual(pandas.Series, type(value))
+        self.assertTrue(all([5, 5, 5] == value))
+
+
+    def test_distance_non_point(self):
+        """
+        Test distance between point series and non-point GIS series
+        """
+        s1 = PointSeries([Point(v, 0) for v in [5, 2, 4]])
+        s2 = LineStringSeries([LineString([(0, 1), (10, 1)])] * 3)
+
+        value = s1.distance(s2)
+        self.assertTrue(all([1, 1, 1] == value))
+
+        value = s1.distance(s2, n_jobs=2)
+        self.assertEqual([1, 1, 1], list(value))
+
+
+    def test_geodesic_distance(self):
+        """
+        Test geodesic distance between point series
+        """
+        s1 = PointSeries([Point(0, 0), Point(-0.1278, 51.5074)])
+        s2 = PointSeries([Point(1, 0), Point(2.3522, 48.8566)])
+
+        value = s1.geodesic_distance(s2)
+        numpy.testing.assert_almost_equal([111195.1, 343556.5], value, 1)
+
+        value = s1.geodesic_distance(s2, method='vincenty')
+        numpy.testing.assert_almost_equal([111319.49, 343923.12], value, 2)
+
+        value = s1.geodesic_distance(Point(0, 0))
+        self.assertEqual(0, value[0])
+
+        self.assertRaises(ValueError, s1.geodesic_distance, s2[:1])
+
+
+    def test_step_distance(self):
+        """
+        Test distance between consecutive points of point series
+        """
+        series = PointSeries(
+            [Point(0, 0), Point(3, 4), Point(3, 4), Point(4, 4)],
+            index=list('abcd')
+        )
+        value = series.step_distance()
+        self.assertEqual(pandas.Series, type(value))
+        self.assertEqual(list('abcd'), list(value.index))
+        self.assertTrue(numpy.isnan(value['a']))
+        self.assertEqual([5, 0, 1], list(value[1:]))
+
+
+    def test_step_distance_group(self):
+        """
+        Test distance between consecutive points of grouped point series
+        """
+        series = PointSeries(
+            [Point(0, 0), Point(3, 4), Point(0, 1), Point(1, 0), Point(1, 1)]
+        )
+        value = series.step_distance(by=[1, 2, 1, 2, 2])
+        self.assertTrue(numpy.isnan(value[0]))
+        self.assertTrue(numpy.isnan(value[1]))
+        self.assertEqual([1, 20 ** 0.5, 1], list(value[2:]))
+
+
+    def test_step_bearing(self):
+        """
+        Test bearing between consecutive points of point series
+        """
+        series = PointSeries(
+            [Point(0, 0), Point(0, 1), Point(1, 1), Point(1, 0), Point(0, 0)]
+        )
+        value = series.step_bearing()
+        self.assertTrue(numpy.isnan(value[0]))
+        self.assertEqual([0, 90, 180, 270], list(value[1:]))
+
+        value = series.step_bearing(by=[1, 1, 2, 2, 2])
+        self.assertTrue(numpy.isnan(value[2]))
+        self.assertEqual([0, 180, 270], list(value[[1, 3, 4]]))
+
+
+    def test_speed(self):
+        """
+        Test speed between consecutive points of point series
+        """
+        index = pandas.date_range('2020-01-01', periods=4, freq='2s')
+        series = PointSeries(
+            [Point(0, 0), Point(3, 4), Point(3, 4), Point(3, 8)], index=index
+        )
+        value = series.speed()
+        self.assertTrue(numpy.isnan(value.iloc[0]))
+        self.assertEqual([2.5, 0, 2], list(value[1:]))
+
+        value = series.speed([0, 1, 2, 4])
+        self.assertEqual([5, 0, 2], list(value[1:]))
+
+        value = series.speed(by=['a', 'b', 'a', 'b'])
+        self.assertTrue(numpy.isnan(value.iloc[1]))
+        self.assertEqual([1.25, 1], list(value[2:]))
+
+        self.assertRaises(ValueError, series.speed, [0, 1])
+
+
+    def test_to_wkb(self):
+        """
+        Test creating WKB data of point series
+        """
+        points = [Point(1, 2), Point(3.5, 4)]
+        series = PointSeries(points, index=['a', 'b'])
+
+        value = series.to_wkb()
+        self.assertEqual(['a', 'b'], list(value.index))
+        self.assertEqual([g.wkb for g in points], list(value))
+
+        value = series.to_wkb(hex=True, srid=4326)
+        expected = [shapely.wkb.dumps(g, hex=True, srid=4326) for g in points]
+        self.assertEqual(expected, list(value))
+
+
+    def test_to_wkt(self):
+        """
+        Test creating WKT data of point series
+        """
+        series = PointSeries([Point(1, 2), Point(3.5, 1 / 3, 1)])
+
+        value = series.to_wkt()
+        self.assertEqual('POINT (1 2)', value[0])
+        self.assertEqual(Point(3.5, 1 / 3), shapely.wkt.loads(value[1]))
+
+        value = series.to_wkt(precision=2)
+        self.assertEqual(['POINT (1 2)', 'POINT (3.5 0.33)'], list(value))
+
+
 
 class LineStringSeriesTestCase(unittest.TestCase):
     """
@@ -262,6 +867,180 @@ class LineStringSeriesTestCase(unittest.TestCase):
             self.assertTrue(all(not callable(v) for v in value))
 
 
+    def test_packed_properties(self):
+        """
+        Test line string properties calculated with packed coordinates
+        """
+        lines = [
+            LineString([(0, 0), (3, 4)]),
+            LineString([(1, 1), (1, 2), (2, 2), (1, 1)]),
+            LineString([(0, 0), (2, 2), (2, 0), (0, 2), (0, 0)]),
+            LineString([(5, 5), (5, 6), (6, 6)]),
+        ]
+        series = LineStringSeries(lines, index=list('abcd'))
+
+        self.assertEqual([g.length for g in lines], list(series.length))
+        self.assertEqual([g.is_ring for g in lines], list(series.is_ring))
+        self.assertEqual([g.wkb for g in lines], list(series.wkb))
+        self.assertEqual(list('abcd'), list(series.length.index))
+
+
+    def test_packed_properties_modify(self):
+        """
+        Test modifying values of line string properties does not modify
+        cached values
+        """
+        lines = [LineString([(0, 0), (3, 4)]), LineString([(0, 0), (0, 1)])]
+        series = LineStringSeries(lines)
+
+        value = series.length
+        value[0] = -1
+        value *= 10
+        self.assertEqual([5, 1], list(series.length))
+
+        line_coords, offsets = series.to_coords()
+        self.assertFalse(line_coords.flags.writeable)
+        self.assertFalse(offsets.flags.writeable)
+
+
+    def test_simplify(self):
+        """
+        Test simplifying line strings
+        """
+        lines = [
+            LineString([(0, 0), (1, 0.1), (2, -0.1), (3, 5), (4, 6), (5, 0)]),
+            LineString([(0, 0), (1, 1), (2, 0)]),
+        ]
+        series = LineStringSeries(lines, index=['a', 'b'], srid=4326)
+
+        for preserve_topology in (True, False):
+            value = series.simplify(0.5, preserve_topology=preserve_topology)
+            self.assertEqual(LineStringSeries, type(value))
+            self.assertEqual(['a', 'b'], list(value.index))
+            self.assertEqual(4326, value.srid)
+            expected = [g.simplify(0.5, preserve_topology) for g in lines]
+            self.assertEqual(expected, list(value))
+
+        value = series.simplify(0.5, preserve_topology=False)
+        self.assertIn('coords', series_cache(value))
+
+
+    def test_simplify_long(self):
+        """
+        Test simplifying long line strings with Shapely
+        """
+        n = SIMPLIFY_MAX_VERTICES + 1
+        lines = [LineString([(i, i % 3) for i in range(n)])] * 2
+        series = LineStringSeries(lines, srid=4326)
+
+        with mock.patch('geocoon.coords.simplify_lines') as f:
+            value = series.simplify(0.5, preserve_topology=False)
+        self.assertFalse(f.called)
+        # packed coordinates are not created just to count vertices
+        self.assertNotIn('coords', series_cache(series))
+
+        self.assertEqual(LineStringSeries, type(value))
+        self.assertEqual(4326, value.srid)
+        expected = [g.simplify(0.5, False) for g in lines]
+        self.assertEqual(expected, list(value))
+
+
+    def test_geodesic_length(self):
+        """
+        Test geodesic length of line strings
+        """
+        lines = [
+            LineString([(0, 0), (1, 0), (2, 0)]),
+            LineString([(0, 0), (0, 1)]),
+        ]
+        series = LineStringSeries(lines, index=['a', 'b'])
+
+        value = series.geodesic_length()
+        self.assertEqual(['a', 'b'], list(value.index))
+        numpy.testing.assert_almost_equal([222390.2, 111195.1], value, 1)
+
+        value = series.geodesic_length(method='vincenty')
+        numpy.testing.assert_almost_equal([222638.98, 110574.39], value, 2)
+
+
+    def test_packed_properties_null(self):
+        """
+        Test packed line string properties with null values and empty
+        geometries
+        """
+        data = [LineString([(0, 0), (3, 4)]), None, GeometryCollection()]
+        series = LineStringSeries(data)
+
+        self.assertEqual([5, 0, 0], series.length.tolist())
+        self.assertEqual([False] * 3, series.is_ring.tolist())
+        self.assertEqual(data[0].wkb, series.wkb[0])
+
+        data = series.to_wkb()
+        self.assertIsNone(data[1])
+        self.assertTrue(shapely.wkb.loads(data[2]).is_empty)
+
+
+    def test_packed_properties_3d(self):
+        """
+        Test line string properties calculated with packed coordinates (3D)
+        """
+        lines = [
+            LineString([(0, 0, 1), (3, 4, 1)]),
+            LineString([(1, 1, 1), (1, 2, 2), (2, 2, 3), (1, 1, 4)]),
+        ]
+        series = LineStringSeries(lines)
+
+        self.assertEqual([g.length for g in lines], list(series.length))
+        self.assertEqual([g.is_ring for g in lines], list(series.is_ring))
+        self.assertEqual([g.wkb for g in lines], list(series.wkb))
+
+
+    def test_to_coords(self):
+        """
+        Test getting packed coordinates of line strings
+        """
+        lines = [
+            LineString([(0, 0), (3, 4)]),
+            LineString([(1, 1), (1, 2), (2, 2)]),
+        ]
+        series = LineStringSeries(lines)
+        coords, offsets = series.to_coords()
+
+        self.assertEqual([[0, 0], [3, 4], [1, 1], [1, 2], [2, 2]], coords.tolist())
+        self.assertEqual([0, 2, 5], offsets.tolist())
+
+
+    def test_to_wkb(self):
+        """
+        Test creating WKB data of line string series
+        """
+        lines = [
+            LineString([(0, 0), (3, 4)]),
+            LineString(),
+            LineString([(1, 1), (1, 2), (2, 2)]),
+        ]
+        series = LineStringSeries(lines)
+
+        value = series.to_wkb(hex=True, srid=2180)
+        expected = [shapely.wkb.dumps(g, hex=True, srid=2180) for g in lines]
+        self.assertEqual(expected, list(value))
+
+
+    def test_to_wkt(self):
+        """
+        Test creating WKT data of line string series
+        """
+        lines = [
+            LineString([(0, 0), (3, 4.25)]),
+            LineString(),
+            LineString([(1, 1), (1, 2), (2, 2)]),
+        ]
+        series = LineStringSeries(lines)
+
+        value = series.to_wkt()
+        self.assertEqual([g.wkt for g in lines], list(value))
+
+
 
 class PolygonSeriesTestCase(unittest.TestCase):
     """
@@ -291,6 +1070,30 @@ class PolygonSeriesTestCase(unittest.TestCase):
         self.assertEqual(3, len(value))
 
 
+    def test_area_modify(self):
+        """
+        Test modifying values of polygon area does not modify cached values
+        """
+        series = PolygonSeries([box(0, 0, 1, 1), box(0, 0, 2, 2)])
+        series.to_coords()
+
+        value = series.area
+        value *= 10
+        self.assertEqual([1, 4], list(series.area))
+
+
+    def test_method_adapt_simplify(self):
+        """
+        Test adaptation of polygon simplify method
+        """
+        data = [Polygon([(0, 0), (1, 0.01), (2, 0), (2, 2), (0, 2)])]
+        series = PolygonSeries(data, srid=4326)
+        value = series.simplify(0.1)
+        self.assertEqual(PolygonSeries, type(value))
+        self.assertEqual(4326, value.srid)
+        self.assertEqual(data[0].simplify(0.1), value[0])
+
+
     def test_method_adapt_geom(self):
         """
         Test adaptation of polygon methods (first param is geometry)
@@ -312,4 +1115,123 @@ class PolygonSeriesTestCase(unittest.TestCase):
         self.assertTrue(all([False, True, False] == value), value)
 
 
+    def test_method_adapt_geom_scalar(self):
+        """
+        Test adaptation of polygon methods (first param is single geometry)
+        """
+        poly = lambda v: Polygon(((v, v), (v + 0.1, v), (v + 0.2, v + 0.2), (v, v)))
+        s1 = PolygonSeries([poly(v) for v in [5, 2, 4, 2.05]])
+        geom = poly(2)
+        s2 = PolygonSeries([geom] * 4)
+        methods = (k for k, v in META_POLYGON.items() if v.first_is_geom)
+        for method in methods:
+            mcall = getattr(s1, method)
+            value = mcall(geom)
+            expected = mcall(s2)
+            self.assertEqual(4, len(value))
+            self.assertEqual(type(expected), type(value))
+            if isinstance(expected, PolygonSeries):
+                self.assertTrue(all(expected.equals(value)), method)
+            else:
+                self.assertEqual(list(expected), list(value), method)
+
+        value = s1.within(box(1, 1, 4.5, 4.5))
+        self.assertEqual([False, True, True, True], list(value))
+        value = s1.contains(Point(2.05, 2.01))
+        self.assertEqual([False, True, False, False], list(value))
+
+
+    def test_packed_properties(self):
+        """
+        Test polygon properties calculated with packed coordinates
+        """
+        polygons = [
+            Point(v, v * 2).buffer(v, resolution=4) for v in [5, 2, 4]
+        ]
+        polygons[1] = polygons[1].difference(Point(2, 4).buffer(1))
+        polygons.append(Polygon([(0, 0), (1, 1), (2, 2)]))
+        series = PolygonSeries(polygons, index=list('abcd'))
+
+        series.to_coords()
+        self.assertEqual([g.area for g in polygons], list(series.area))
+        self.assertTrue(all(
+            p1.equals(p2)
+            for p1, p2 in zip(series.centroid, (g.centroid for g in polygons))
+        ))
+        self.assertEqual(list('abcd'), list(series.centroid.index))
+
+
+    def test_prepare(self):
+        """
+        Test polygon predicates with prepared geometries
+        """
+        series = PolygonSeries([box(v, v, v + 1, v + 1) for v in range(3)])
+        series.prepare(maxsize=2)
+
+        points = PointSeries([Point(0.5, 0.5), Point(0, 0), Point(2.5, 2.5)])
+        value = series.contains(points)
+        self.assertEqual([True, False, True], list(value))
+
+        value = series.intersects(Point(1, 1))
+        self.assertEqual([True, True, False], list(value))
+
+        cache = series_cache(series)['prepared']
+        self.assertEqual(2, len(cache))
+
+
+    def test_prepare_setitem(self):
+        """
+        Test prepared geometries are removed on item assignment
+        """
+        series = PolygonSeries([box(v, v, v + 1, v + 1) for v in range(3)])
+        series.prepare()
+        self.assertEqual([True, False, False], list(series.contains(Point(0.5, 0.5))))
+
+        series[1] = box(0, 0, 1, 1)
+        self.assertNotIn('prepared', series_cache(series))
+        self.assertEqual([True, True, False], list(series.contains(Point(0.5, 0.5))))
+
+
+    def test_to_wkb(self):
+        """
+        Test creating WKB data of polygon series
+        """
+        polygons = [
+            box(0, 0, 1, 1),
+            Polygon(),
+            Polygon(
+                [(0, 0), (9, 0), (9, 9), (0, 9), (0, 0)],
+                [[(1, 1), (2, 1), (2, 2), (1, 1)]]
+            ),
+        ]
+        series = PolygonSeries(polygons)
+        expected = [shapely.wkb.dumps(g, srid=3857) for g in polygons]
+        self.assertEqual(expected, list(series.to_wkb(srid=3857)))
+
+        # packed coordinates
+        series.to_coords()
+        self.assertEqual(expected, list(series.to_wkb(srid=3857)))
+
+
+    def test_to_wkt(self):
+        """
+        Test creating WKT data of polygon series
+        """
+        polygons = [
+            box(0, 0, 1, 1),
+            Polygon(),
+            Polygon(
+                [(0, 0), (9, 0), (9, 9), (0, 9), (0, 0)],
+                [[(1, 1), (2, 1), (2, 2), (1, 1)]]
+            ),
+        ]
+        series = PolygonSeries(polygons)
+        expected = [g.wkt for g in polygons]
+        self.assertEqual(expected, list(series.to_wkt()))
+
+        # packed coordinates
+        series.to_coords()
+        self.assertEqual(expected, list(series.to_wkt()))
+
+
 # vim: sw=4:et:ai
@@ -19,14 +19,17 @@
 
 import binascii
 
-from shapely.geometry import Point, LineString, Polygon
+from shapely.geometry import Point, LineString, Polygon, MultiPoint, \
+    MultiPolygon, GeometryCollection
+import shapely.wkb
 
-from geocoon.factory import from_shapes, from_wkb, as_line_string, \
-    as_polygon
-from geocoon.core import GeoDataFrame, PointSeries, LineStringSeries, \
-    PolygonSeries
+from geocoon.factory import from_shapes, from_wkb, from_xy, \
+    from_line_coords, from_polygon_coords, as_line_string, as_polygon
+from geocoon.core import GeoDataFrame, GeoSeries, PointSeries, \
+    LineStringSeries, PolygonSeries, series_cache
 
 import unittest
+from unittest import mock
 
 class FactoryTestCase(unittest.TestCase):
     """
@@ -64,6 +67,64 @@ class FactoryTestCase(unittest.TestCase):
         self.assertRaises(ValueError, from_shapes, data)
 
 
+    @mock.patch('geocoon.factory.CHUNK_SIZE', 2)
+    def test_from_shapes_iterator(self):
+        """
+        Test GIS series shapes factory (iterator consumed in chunks)
+        """
+        consumed = []
+        def shapes():
+            for i in range(5):
+                consumed.append(i)
+                yield Point(i, i)
+
+        series = from_shapes(shapes(), index=list('abcde'))
+        self.assertEqual(PointSeries, type(series))
+        self.assertEqual(list('abcde'), list(series.index))
+        self.assertEqual([0, 1, 2, 3, 4], list(series.x))
+        self.assertEqual(5, len(consumed))
+
+
+    @mock.patch('geocoon.factory.CHUNK_SIZE', 2)
+    def test_from_shapes_mixed(self):
+        """
+        Test GIS series shapes factory (mixed geometries)
+        """
+        consumed = []
+        def shapes():
+            for i in range(10):
+                consumed.append(i)
+                yield Point(i, i) if i != 2 else LineString([(0, 0), (i, i)])
+
+        # error is raised with the first chunk with mixed geometries
+        self.assertRaises(ValueError, from_shapes, shapes())
+        self.assertEqual(4, len(consumed))
+
+        series = from_shapes(shapes(), mixed='generic')
+        self.assertEqual(GeoSeries, type(series))
+        self.assertEqual(10, len(series))
+        self.assertEqual(LineString, type(series[2]))
+
+        self.assertRaises(
+            ValueError, from_shapes, shapes(), cls=PointSeries, mixed='generic'
+        )
+
+
+    def test_from_shapes_empty(self):
+        """
+        Test GIS series shapes factory (empty and null geometries)
+        """
+        series = from_shapes([])
+        self.assertEqual(GeoSeries, type(series))
+        self.assertEqual(0, len(series))
+
+        shapes = [Point(1, 1), None, GeometryCollection(), Point(2, 2)]
+        series = from_shapes(shapes)
+        self.assertEqual(PointSeries, type(series))
+        self.assertIsNone(series[1])
+        self.assertTrue(series[2].is_empty)
+
+
     def test_from_wkb(self):
         """
         Test GIS series WKB factory (point)
@@ -77,6 +138,168 @@ class FactoryTestCase(unittest.TestCase):
 
         series = from_wkb(points)
         self.assertEqual(PointSeries, type(series))
+        self.assertEqual([0, 1, 2], list(series.x))
+        self.assertIn('coords', series_cache(series))
+
+
+    def test_from_wkb_ewkb(self):
+        """
+        Test GIS series WKB factory (point EWKB with SRID)
+        """
+        points = [
+            '0101000020E6100000000000000000F03F0000000000000040',
+            memoryview(Point(3, 4).wkb),
+        ]
+        series = from_wkb(points, index=['a', 'b'])
+        self.assertEqual(PointSeries, type(series))
+        self.assertEqual(Point(1, 2), series['a'])
+        self.assertEqual(Point(3, 4), series['b'])
+        # SRID of one of the points is unknown
+        self.assertIsNone(series.srid)
+
+
+    def test_from_wkb_srid(self):
+        """
+        Test GIS series WKB factory (SRID of EWKB data)
+        """
+        points = [Point(1, 2), Point(3, 4)]
+        series = from_wkb([shapely.wkb.dumps(g, srid=4326) for g in points])
+        self.assertEqual(PointSeries, type(series))
+        self.assertEqual(4326, series.srid)
+
+        # big endian geometries are decoded with Shapely
+        data = [
+            shapely.wkb.dumps(g, srid=3857, big_endian=True) for g in points
+        ]
+        series = from_wkb(data)
+        self.assertEqual(PointSeries, type(series))
+        self.assertEqual(3857, series.srid)
+
+
+    def test_from_wkb_line_string(self):
+        """
+        Test GIS series WKB factory (line string)
+        """
+        lines = [
+            LineString([(0, 0), (3, 4)]),
+            LineString([(1, 1), (1, 2), (2, 2), (1, 1)]),
+        ]
+        series = from_wkb([g.wkb for g in lines])
+        self.assertEqual(LineStringSeries, type(series))
+        self.assertEqual(lines, list(series))
+        self.assertIn('coords', series_cache(series))
+
+
+    def test_from_wkb_polygon(self):
+        """
+        Test GIS series WKB factory (polygon)
+        """
+        polygons = [
+            Polygon([(0, 0), (1, 0), (1, 1), (0, 0)]),
+            Polygon(
+                [(0, 0), (9, 0), (9, 9), (0, 9), (0, 0)],
+                [[(1, 1), (2, 1), (2, 2), (1, 1)]]
+            ),
+        ]
+        series = from_wkb([g.wkb for g in polygons])
+        self.assertEqual(PolygonSeries, type(series))
+        self.assertTrue(all(a.equals(b) for a, b in zip(polygons, series)))
+        self.assertEqual([0.5, 80.5], list(series.area))
+
+
+    def test_from_wkb_fallback(self):
+        """
+        Test GIS series WKB factory (Shapely fallback)
+        """
+        points = [Point(1, 2).wkb, Point().wkb]
+        series = from_wkb(points)
+        self.assertEqual(PointSeries, type(series))
+        self.assertTrue(series[1].is_empty)
+
+        data = [MultiPoint([(0, 0), (1, 1)]).wkb]
+        self.assertRaises(ValueError, from_wkb, data)
+
+
+    def test_from_wkb_mixed(self):
+        """
+        Test GIS series WKB factory (mixed geometries)
+        """
+        polygon = Polygon([(0, 0), (1, 0), (1, 1)])
+        data = [polygon.wkb, MultiPolygon([polygon]).wkb]
+        self.assertRaises(ValueError, from_wkb, data)
+
+        series = from_wkb(data, mixed='generic')
+        self.assertEqual(GeoSeries, type(series))
+        self.assertEqual(MultiPolygon, type(series[1]))
+
+
+    def test_from_xy(self):
+        """
+        Test GIS point series coordinates factory
+        """
+        series = from_xy([1, 2, 3], [4, 5, 6], index=list('abc'))
+
+        self.assertEqual(PointSeries, type(series))
+        self.assertEqual(Point(2, 5), series['b'])
+        self.assertTrue(all([1, 2, 3] == series.x))
+        self.assertTrue(all([4, 5, 6] == series.y))
+
+
+    def test_from_xy_3d(self):
+        """
+        Test GIS point series coordinates factory (3d)
+        """
+        series = from_xy([1, 2], [4, 5], [7, 8])
+
+        self.assertTrue(series[0].has_z)
+        self.assertTrue(all([7, 8] == series.z))
+
+
+    def test_from_line_coords(self):
+        """
+        Test GIS line string series packed coordinates factory
+        """
+        coords = [[0, 0], [3, 4], [1, 1], [1, 2], [2, 2]]
+        series = from_line_coords(coords, [0, 2, 5])
+
+        self.assertEqual(LineStringSeries, type(series))
+        self.assertEqual(LineString([(1, 1), (1, 2), (2, 2)]), series[1])
+        self.assertEqual([5, 2], list(series.length))
+
+
+    def test_from_line_coords_invalid(self):
+        """
+        Test GIS line string series packed coordinates factory (invalid)
+        """
+        coords = [[0, 0], [3, 4], [1, 1], [1, 2], [2, 2]]
+        self.assertRaises(ValueError, from_line_coords, coords, [0, 2, 4])
+        self.assertRaises(ValueError, from_line_coords, coords, [1, 2, 5])
+
+
+    def test_from_polygon_coords(self):
+        """
+        Test GIS polygon series packed coordinates factory
+        """
+        coords = [
+            [0, 0], [0, 4], [4, 4], [4, 0], [0, 0],
+            [1, 1], [2, 1], [2, 2], [1, 1],
+            [5, 5], [6, 5], [6, 6], [5, 5],
+        ]
+        series = from_polygon_coords(coords, [0, 5, 9, 13], [0, 2, 3])
+
+        self.assertEqual(PolygonSeries, type(series))
+        self.assertEqual(1, len(series[0].interiors))
+        self.assertEqual([15.5, 0.5], list(series.area))
+
+
+    def test_from_polygon_coords_invalid(self):
+        """
+        Test GIS polygon series packed coordinates factory (invalid)
+        """
+        coords = [[0, 0], [0, 4], [4, 4], [4, 0], [0, 0]]
+        self.assertRaises(
+            ValueError, from_polygon_coords, coords, [0, 5], [0, 2]
+        )
 
 
 
@@ -150,6 +373,29 @@ class LineStringFactoryTestCase(unittest.TestCase):
         self.assertTrue(series[0].has_z)
 
 
+    def test_grouped_series_order(self):
+        """
+        Test creating line string series from grouped series with
+        unordered keys
+        """
+        data = {
+            'device': ['dev2', 'dev1', 'dev2', None, 'dev1', 'dev2'],
+            'location': from_xy([1, 2, 3, 4, 5, 6], [0, 0, 1, 0, 1, 2]),
+        }
+        data = GeoDataFrame(data)
+        for sort in (True, False):
+            grouped = data.groupby('device', sort=sort).location
+            series = as_line_string(grouped)
+            expected = grouped.apply(lambda s: LineString(list(s)))
+
+            self.assertTrue(isinstance(series, LineStringSeries))
+            self.assertEqual(list(expected.index), list(series.index))
+            self.assertEqual('device', series.index.name)
+            self.assertTrue(all(
+                l1.equals(l2) for l1, l2 in zip(expected, series)
+            ))
+
+
 
 class PolygonFactoryTestCase(unittest.TestCase):
     """
@@ -225,4 +471,22 @@ class PolygonFactoryTestCase(unittest.TestCase):
         self.assertTrue(series[0].has_z)
 
 
+    def test_grouped_series_closed(self):
+        """
+        Test creating polygon series from grouped series with closed and
+        not closed rings
+        """
+        data = {
+            'device': ['dev1'] * 4 + ['dev2'] * 3,
+            'location': from_xy([0, 2, 2, 0, 5, 6, 5], [0, 0, 2, 0, 5, 5, 6]),
+        }
+        data = GeoDataFrame(data).groupby('device')
+        series = as_polygon(data.location)
+
+        self.assertEqual(2, series['dev1'].area)
+        self.assertEqual(0.5, series['dev2'].area)
+        self.assertEqual([2, 0.5], list(series.area))
+        self.assertEqual(4, len(series['dev2'].exterior.coords))
+
+
 # vim: sw=4:et:ai
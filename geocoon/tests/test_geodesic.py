@@ -0,0 +1,97 @@
+#
+# GeoCoon - GIS data analysis library based on Pandas and Shapely
+#
+# Copyright (C) 2014 by Artur Wroblewski <wrobell@pld-linux.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Geodesic distance unit tests.
+"""
+
+import numpy
+
+from geocoon.geodesic import distance, haversine, vincenty, line_lengths
+
+import unittest
+
+# London and Paris
+LON1, LAT1 = -0.1278, 51.5074
+LON2, LAT2 = 2.3522, 48.8566
+
+
+class DistanceTestCase(unittest.TestCase):
+    """
+    Geodesic distance tests.
+    """
+    def test_haversine(self):
+        """
+        Test calculating great-circle distance
+        """
+        value = haversine([LON1, 0], [LAT1, 0], [LON2, 1], [LAT2, 0])
+        self.assertAlmostEqual(343556.5, value[0], 1)
+        self.assertAlmostEqual(111195.1, value[1], 1)
+
+
+    def test_vincenty(self):
+        """
+        Test calculating distance on WGS84 ellipsoid
+        """
+        value = vincenty(
+            [LON1, 0, 0], [LAT1, 0, 0], [LON2, 1, 0], [LAT2, 0, 0]
+        )
+        self.assertAlmostEqual(343923.12, value[0], 2)
+        self.assertAlmostEqual(111319.49, value[1], 2)
+        self.assertEqual(0, value[2])
+
+
+    def test_vincenty_antipodal(self):
+        """
+        Test calculating distance of nearly antipodal points on WGS84
+        ellipsoid
+        """
+        value = vincenty([0, 0], [0, 0], [179.9, 1], [0, 0])
+        self.assertTrue(numpy.isnan(value[0]))
+        self.assertAlmostEqual(111319.49, value[1], 2)
+
+
+    def test_distance_method(self):
+        """
+        Test geodesic distance calculation method selection
+        """
+        value = distance(LON1, LAT1, LON2, LAT2, 'vincenty')
+        self.assertAlmostEqual(343923.12, value, 2)
+
+        self.assertRaises(
+            ValueError, distance, LON1, LAT1, LON2, LAT2, 'planar'
+        )
+
+
+    def test_line_lengths(self):
+        """
+        Test calculating geodesic length of packed lines
+        """
+        coords = numpy.array([
+            [0, 0], [1, 0], [2, 0],
+            [LON1, LAT1], [LON2, LAT2],
+            [5, 5],
+        ])
+        offsets = numpy.array([0, 3, 5, 5, 6])
+        value = line_lengths(coords, offsets)
+        expected = [2 * 111195.1, 343556.5, 0, 0]
+        numpy.testing.assert_almost_equal(expected, value, 1)
+
+
+# vim: sw=4:et:ai
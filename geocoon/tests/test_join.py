@@ -0,0 +1,134 @@
+#
+# GeoCoon - GIS data analysis library based on Pandas and Shapely
+#
+# Copyright (C) 2014 by Artur Wroblewski <wrobell@pld-linux.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Spatial join unit tests.
+"""
+
+from shapely.geometry import Point, box
+
+from geocoon.core import GeoDataFrame, PointSeries, PolygonSeries
+from geocoon.join import sjoin
+
+import unittest
+
+
+class SpatialJoinTestCase(unittest.TestCase):
+    """
+    Spatial join tests.
+    """
+    def setUp(self):
+        """
+        Create GIS data frames with positions and zones.
+        """
+        self.positions = GeoDataFrame({
+            'location': PointSeries([
+                Point(0.5, 0.5), Point(1.5, 0.5), Point(5, 5), Point(1, 0.5)
+            ], index=list('abcd')),
+            'name': ['p1', 'p2', 'p3', 'p4'],
+        }, index=list('abcd'))
+        self.zones = GeoDataFrame({
+            'area': PolygonSeries(
+                [box(0, 0, 1, 1), box(1, 0, 2, 1)], index=list('xy')
+            ),
+            'name': ['z1', 'z2'],
+        }, index=list('xy'))
+
+
+    def test_sjoin_within(self):
+        """
+        Test spatial join with within predicate
+        """
+        df = sjoin(
+            self.positions, self.zones, 'location', 'area', predicate='within'
+        )
+        self.assertEqual(['a', 'b'], list(df.index))
+        self.assertEqual(['p1', 'p2'], list(df.name_left))
+        self.assertEqual(['z1', 'z2'], list(df.name_right))
+        self.assertEqual(['x', 'y'], list(df.index_right))
+        self.assertEqual(PointSeries, type(df.location))
+        self.assertEqual(PolygonSeries, type(df.area))
+
+
+    def test_sjoin_intersects(self):
+        """
+        Test spatial join with intersects predicate
+        """
+        df = sjoin(self.positions, self.zones, 'location', 'area')
+        self.assertEqual(['a', 'b', 'd', 'd'], list(df.index))
+        self.assertEqual(['x', 'y', 'x', 'y'], list(df.index_right))
+        self.assertEqual(
+            {'location': PointSeries, 'area': PolygonSeries},
+            df._geom_columns
+        )
+
+
+    def test_sjoin_contains(self):
+        """
+        Test spatial join with contains predicate
+        """
+        df = sjoin(
+            self.zones, self.positions, 'area', 'location',
+            predicate='contains'
+        )
+        self.assertEqual(['x', 'y'], list(df.index))
+        self.assertEqual(['a', 'b'], list(df.index_right))
+        self.assertTrue(all([0.5, 1.5] == df.location.x))
+
+
+    def test_sjoin_empty(self):
+        """
+        Test spatial join with no matching geometries
+        """
+        df = sjoin(
+            self.positions, self.zones, 'location', 'area',
+            predicate='overlaps'
+        )
+        self.assertEqual(0, len(df))
+        self.assertEqual(PointSeries, type(df.location))
+
+
+    def test_sjoin_null(self):
+        """
+        Test spatial join with null geometries
+        """
+        zones = GeoDataFrame({
+            'area': PolygonSeries(
+                [box(0, 0, 1, 1), None], index=list('xy')
+            ),
+            'name': ['z1', 'z2'],
+        }, index=list('xy'))
+        df = sjoin(
+            self.positions, zones, 'location', 'area', predicate='within'
+        )
+        self.assertEqual(['a'], list(df.index))
+        self.assertEqual(['x'], list(df.index_right))
+
+
+    def test_sjoin_unsupported(self):
+        """
+        Test spatial join with unsupported predicate
+        """
+        self.assertRaises(
+            ValueError, sjoin, self.positions, self.zones, 'location',
+            'area', predicate='disjoint'
+        )
+
+
+# vim: sw=4:et:ai
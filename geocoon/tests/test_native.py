@@ -0,0 +1,215 @@
+#
+# GeoCoon - GIS data analysis library based on Pandas and Shapely
+#
+# Copyright (C) 2014 by Artur Wroblewski <wrobell@pld-linux.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Native columnar file format tests.
+"""
+
+import os.path
+import tempfile
+
+import numpy
+import pandas
+from shapely.geometry import Point, LineString, Polygon
+
+from geocoon.core import GeoDataFrame, PointSeries, LineStringSeries, \
+    PolygonSeries, series_cache
+from geocoon.native import to_geocoon, read_geocoon
+
+import unittest
+
+
+class NativeFormatTestCase(unittest.TestCase):
+    """
+    Native columnar file format tests.
+    """
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._dir.name, 'data')
+
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+
+    def test_write_read(self):
+        """
+        Test writing and reading GIS data frame in native format
+        """
+        data = GeoDataFrame({
+            'a': PointSeries([Point(1, 2), Point(3, 4), Point(5, 6)]),
+            'b': LineStringSeries([
+                LineString([(0, 0), (1, 1)]),
+                LineString(),
+                LineString([(1, 1), (2, 2), (3, 3)]),
+            ]),
+            'c': PolygonSeries([
+                Polygon([(0, 0), (1, 0), (1, 1)]),
+                Polygon(
+                    [(0, 0), (4, 0), (4, 4), (0, 4)],
+                    [[(1, 1), (2, 1), (2, 2)]]
+                ),
+                Polygon(),
+            ]),
+            'd': [1, 2, 3],
+            'e': ['x', None, 'z'],
+        })
+        data = data[['a', 'b', 'c', 'd', 'e']]
+        data.index = pandas.Index([10, 20, 30], name='id')
+
+        data.to_geocoon(self.path)
+        result = read_geocoon(self.path)
+
+        self.assertEqual(GeoDataFrame, type(result))
+        self.assertEqual(['a', 'b', 'c', 'd', 'e'], list(result.columns))
+        self.assertEqual([10, 20, 30], list(result.index))
+        self.assertEqual('id', result.index.name)
+
+        self.assertEqual(PointSeries, type(result.a))
+        self.assertEqual(LineStringSeries, type(result.b))
+        self.assertEqual(PolygonSeries, type(result.c))
+        self.assertEqual(
+            {'a': PointSeries, 'b': LineStringSeries, 'c': PolygonSeries},
+            result._geom_columns
+        )
+        for col in 'abc':
+            self.assertTrue(all(
+                g1.equals(g2) or g1.is_empty and g2.is_empty
+                for g1, g2 in zip(data[col], result[col])
+            ))
+        self.assertEqual([1, 2, 3], list(result.d))
+        self.assertEqual(['x', None, 'z'], list(result.e))
+
+
+    def test_write_read_srid(self):
+        """
+        Test writing and reading SRID of GIS series in native format
+        """
+        data = GeoDataFrame({
+            'a': PointSeries([Point(1, 2), Point(3, 4)], srid=4326),
+            'b': PointSeries([Point(1, 2), Point(3, 4)]),
+        })
+        to_geocoon(data, self.path)
+
+        result = read_geocoon(self.path)
+        self.assertEqual(4326, result.a.srid)
+        self.assertIsNone(result.b.srid)
+        self.assertEqual({'a': 4326, 'b': None}, result._geom_srid)
+
+
+    def test_write_read_strings(self):
+        """
+        Test writing and reading strings in native format without pickle
+        """
+        data = GeoDataFrame({
+            'a': PointSeries([Point(1, 2), Point(3, 4)]),
+            'v': ['zażółć', None],
+        })
+        data.index = pandas.Index(['p1', 'p2'])
+        to_geocoon(data, self.path)
+        files = os.listdir(self.path)
+        self.assertFalse(any(f.endswith('.pickle') for f in files))
+
+        result = read_geocoon(self.path)
+        self.assertEqual(['zażółć', None], list(result.v))
+        self.assertEqual(['p1', 'p2'], list(result.index))
+
+
+    def test_write_overwrite(self):
+        """
+        Test overwriting GIS data frame with different column types
+        """
+        data = GeoDataFrame({
+            'a': PointSeries([Point(1, 2), Point(3, 4)]), 'v': ['x', 'y'],
+        })
+        to_geocoon(data, self.path)
+        data = GeoDataFrame({
+            'a': PointSeries([Point(1, 2), Point(3, 4)]), 'v': [1, 2],
+        })
+        to_geocoon(data, self.path)
+
+        result = read_geocoon(self.path)
+        self.assertEqual([1, 2], list(result.v))
+
+
+    def test_write_unsupported_objects(self):
+        """
+        Test error on writing object column with non-string values
+        """
+        data = GeoDataFrame({
+            'a': PointSeries([Point(1, 2), Point(3, 4)]), 'v': [b'x', {}],
+        })
+        self.assertRaises(ValueError, to_geocoon, data, self.path)
+
+
+    def test_read_mmap(self):
+        """
+        Test reading GIS data frame in native format with memory mapping
+        """
+        data = GeoDataFrame({
+            'a': PointSeries([Point(1, 2), Point(3, 4)]),
+            'b': [1.5, 2.5],
+        })
+        to_geocoon(data, self.path)
+
+        result = read_geocoon(self.path)
+        self.assertIsInstance(result.b.values.base, numpy.memmap)
+        coords = series_cache(result.a)['coords']
+        self.assertIsInstance(coords, numpy.memmap)
+        self.assertEqual([1, 3], list(result.a.x))
+
+        # modifications are not written to disk
+        result.b.values[0] = 10
+        self.assertEqual(1.5, read_geocoon(self.path).b[0])
+
+        result = read_geocoon(self.path, mmap=False)
+        self.assertNotIsInstance(result.b.values.base, numpy.memmap)
+        self.assertEqual([1.5, 2.5], list(result.b))
+
+
+    def test_write_read_timestamp(self):
+        """
+        Test writing and reading timestamp columns in native format
+        """
+        ts = pandas.to_datetime(['2000-01-01 01:00', '2000-01-02'])
+        data = GeoDataFrame({
+            'a': PointSeries([Point(1, 2), Point(3, 4)]),
+            'b': ts.tz_localize('Europe/Paris'),
+        })
+        data.index = ts
+        to_geocoon(data, self.path)
+
+        result = read_geocoon(self.path)
+        self.assertTrue((data.index == result.index).all())
+        self.assertEqual(str(data.b.dtype), str(result.b.dtype))
+        self.assertTrue((data.b == result.b).all())
+
+
+    def test_write_unsupported(self):
+        """
+        Test error on writing unsupported column type
+        """
+        data = GeoDataFrame({
+            'a': PointSeries([Point(1, 2)]),
+            'b': pandas.Categorical(['x']),
+        })
+        self.assertRaises(ValueError, to_geocoon, data, self.path)
+
+
+# vim: sw=4:et:ai
@@ -0,0 +1,104 @@
+#
+# GeoCoon - GIS data analysis library based on Pandas and Shapely
+#
+# Copyright (C) 2014 by Artur Wroblewski <wrobell@pld-linux.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Parallel execution unit tests.
+"""
+
+from functools import partial
+
+import numpy
+from shapely.geometry import Point, Polygon
+
+from geocoon import parallel
+from geocoon.core import call_method
+
+import unittest
+
+
+class ParallelTestCase(unittest.TestCase):
+    """
+    Parallel execution tests.
+    """
+    def tearDown(self):
+        """
+        Restore default number of worker processes.
+        """
+        parallel.set_n_jobs(1)
+
+
+    def test_get_n_jobs(self):
+        """
+        Test getting number of worker processes
+        """
+        self.assertEqual(1, parallel.get_n_jobs())
+        self.assertEqual(3, parallel.get_n_jobs(3))
+
+        parallel.set_n_jobs(2)
+        self.assertEqual(2, parallel.get_n_jobs())
+        self.assertEqual(3, parallel.get_n_jobs(3))
+
+
+    def test_get_n_jobs_cpu(self):
+        """
+        Test getting number of worker processes (number of CPUs)
+        """
+        self.assertTrue(parallel.get_n_jobs(-1) >= 1)
+
+
+    def test_get_n_jobs_invalid(self):
+        """
+        Test getting invalid number of worker processes
+        """
+        self.assertRaises(ValueError, parallel.get_n_jobs, 0)
+
+
+    def test_call(self):
+        """
+        Test calling geometry method in worker processes
+        """
+        wkb = numpy.array([Point(v, v).wkb for v in range(5)], dtype=object)
+        f = partial(call_method, Point, 'buffer')
+        data = parallel.call(f, wkb, None, (1,), {'resolution': 2}, True, 2)
+        self.assertEqual(5, len(data))
+        self.assertTrue(all(isinstance(p, Polygon) for p in data))
+
+
+    def test_call_empty(self):
+        """
+        Test calling geometry method in worker processes (no geometries)
+        """
+        wkb = numpy.array([], dtype=object)
+        f = partial(call_method, Point, 'buffer')
+        data = parallel.call(f, wkb, None, (1,), {}, True, 2)
+        self.assertEqual([], data)
+
+
+    def test_call_geom(self):
+        """
+        Test calling geometry method in worker processes (geometry param)
+        """
+        wkb = numpy.array([Point(v, v).wkb for v in range(5)], dtype=object)
+        other = Point(0, 0).buffer(2.5).wkb
+        f = partial(call_method, Point, 'within')
+        data = parallel.call(f, wkb, other, (), {}, False, 2)
+        self.assertEqual([True, True, False, False, False], data)
+
+
+# vim: sw=4:et:ai
@@ -0,0 +1,246 @@
+#
+# GeoCoon - GIS data analysis library based on Pandas and Shapely
+#
+# Copyright (C) 2014 by Artur Wroblewski <wrobell@pld-linux.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+PostgreSQL binary COPY format encoding tests.
+"""
+
+import struct
+
+import numpy
+import pandas
+from shapely.geometry import Point, LineString, GeometryCollection
+
+from geocoon.core import GeoDataFrame, PointSeries, LineStringSeries
+from geocoon.pgcopy import HEADER, TRAILER, encode, column, column_type
+
+import unittest
+
+
+def row(*fields):
+    """
+    Create row of binary COPY data from binary strings of fields.
+
+    The `None` value is NULL field.
+    """
+    data = struct.pack('>h', len(fields))
+    for f in fields:
+        if f is None:
+            data += struct.pack('>i', -1)
+        else:
+            data += struct.pack('>i', len(f)) + f
+    return data
+
+
+class EncodeTestCase(unittest.TestCase):
+    """
+    PostgreSQL binary COPY format encoding tests.
+    """
+    def test_encode(self):
+        """
+        Test encoding data frame in binary COPY format
+        """
+        data = GeoDataFrame({
+            'a': PointSeries([Point(1, 2), Point(3, 4)]),
+            'b': [1, 2],
+            'c': ['x', None],
+            'd': [1.5, numpy.nan],
+            'e': [True, False],
+        })
+        data = data[['a', 'b', 'c', 'd', 'e']]
+
+        result = b''.join(encode(data))
+        expected = HEADER \
+            + row(Point(1, 2).wkb, struct.pack('>q', 1), b'x',
+                struct.pack('>d', 1.5), b'\x01') \
+            + row(Point(3, 4).wkb, struct.pack('>q', 2), None, None, b'\x00') \
+            + TRAILER
+        self.assertEqual(expected, result)
+
+
+    def test_encode_srid(self):
+        """
+        Test encoding GIS series as EWKB data with SRID
+        """
+        data = GeoDataFrame({'a': PointSeries([Point(1, 2)])})
+
+        result = b''.join(encode(data, srid=4326))
+        ewkb = b'\x01\x01\x00\x00\x20\xe6\x10\x00\x00' \
+            + struct.pack('<dd', 1, 2)
+        self.assertEqual(HEADER + row(ewkb) + TRAILER, result)
+
+        data = GeoDataFrame({'a': PointSeries([Point(1, 2)], srid=4326)})
+        result = b''.join(encode(data))
+        self.assertEqual(HEADER + row(ewkb) + TRAILER, result)
+
+
+    def test_encode_null_geometry(self):
+        """
+        Test encoding null values and empty geometries as NULL values
+        """
+        line = LineString([(1, 2), (3, 4)])
+        data = GeoDataFrame({
+            'a': PointSeries([Point(1, 2), None, GeometryCollection()]),
+            'b': LineStringSeries([None, line, LineString()]),
+        })
+        data = data[['a', 'b']]
+
+        result = b''.join(encode(data))
+        expected = HEADER \
+            + row(Point(1, 2).wkb, None) \
+            + row(None, line.wkb) \
+            + row(None, None) \
+            + TRAILER
+        self.assertEqual(expected, result)
+
+
+    def test_encode_reindexed(self):
+        """
+        Test encoding missing values of reindexed GIS series as NULL values
+        """
+        data = GeoDataFrame({'a': PointSeries([Point(1, 2)])})
+        data = data.reindex([0, 1])
+
+        result = b''.join(encode(data))
+        expected = HEADER + row(Point(1, 2).wkb) + row(None) + TRAILER
+        self.assertEqual(expected, result)
+
+
+    def test_encode_nullable(self):
+        """
+        Test encoding columns of Pandas' nullable types
+        """
+        data = pandas.DataFrame({
+            'a': pandas.array([1, None], dtype='Int32'),
+            'b': pandas.array([None, 1.5], dtype='Float64'),
+            'c': pandas.array([True, None], dtype='boolean'),
+            'd': pandas.array(['x', None], dtype='string'),
+        })
+
+        result = b''.join(encode(data))
+        expected = HEADER \
+            + row(struct.pack('>i', 1), None, b'\x01', b'x') \
+            + row(None, struct.pack('>d', 1.5), None, None) \
+            + TRAILER
+        self.assertEqual(expected, result)
+
+        types = [column_type(data[c]) for c in 'abcd']
+        self.assertEqual(['integer', 'double precision', 'boolean', 'text'], types)
+
+
+    def test_encode_batches(self):
+        """
+        Test encoding data frame in batches of rows
+        """
+        data = pandas.DataFrame({'a': numpy.arange(5, dtype=numpy.int32)})
+
+        result = list(encode(data, batchsize=2))
+        self.assertEqual(5, len(result))
+        self.assertEqual(HEADER, result[0])
+        self.assertEqual(TRAILER, result[-1])
+
+        f = lambda *v: b''.join(row(struct.pack('>i', k)) for k in v)
+        self.assertEqual([f(0, 1), f(2, 3), f(4)], result[1:-1])
+
+
+    def test_encode_index(self):
+        """
+        Test encoding data frame with its index
+        """
+        index = pandas.MultiIndex.from_arrays(
+            [[1, 2, 3], pandas.date_range('2020-01-01', periods=3)]
+        )
+        data = GeoDataFrame(
+            {'a': PointSeries([Point(v, v) for v in range(3)])}, index=index
+        )
+
+        result = b''.join(encode(data, batchsize=2, index=True))
+        expected = b''.join(encode(data.reset_index()))
+        self.assertEqual(expected, result)
+
+
+    def test_encode_timestamp(self):
+        """
+        Test encoding timestamps in binary COPY format
+        """
+        data = pandas.DataFrame({
+            'a': pandas.to_datetime(['2000-01-01', '2000-01-02 00:00:01', None]),
+        })
+
+        result = b''.join(encode(data))
+        expected = HEADER \
+            + row(struct.pack('>q', 0)) \
+            + row(struct.pack('>q', 86401000000)) \
+            + row(None) \
+            + TRAILER
+        self.assertEqual(expected, result)
+
+
+    def test_encode_timestamp_tz(self):
+        """
+        Test encoding timestamps with time zone in binary COPY format
+        """
+        ts = pandas.to_datetime(['2000-01-01 01:00']).tz_localize('Europe/Paris')
+        data = pandas.DataFrame({'a': ts})
+
+        result = b''.join(encode(data))
+        self.assertEqual(HEADER + row(struct.pack('>q', 0)) + TRAILER, result)
+
+
+    def test_encode_empty(self):
+        """
+        Test encoding empty data frame in binary COPY format
+        """
+        data = pandas.DataFrame({'a': numpy.array([], dtype=numpy.int64)})
+        self.assertEqual([HEADER, TRAILER], list(encode(data)))
+
+
+    def test_column_type(self):
+        """
+        Test PostgreSQL types of data frame columns
+        """
+        data = GeoDataFrame({
+            'a': PointSeries([Point(1, 2)]),
+            'b': numpy.array([1], dtype=numpy.int16),
+            'c': ['x'],
+            'd': numpy.array([1], dtype=numpy.float32),
+            'e': pandas.to_datetime(['2000-01-01']),
+        })
+        types = [column_type(column(data, c)) for c in 'abcde']
+        expected = ['geometry', 'smallint', 'text', 'real', 'timestamp']
+        self.assertEqual(expected, types)
+
+        self.assertEqual(
+            'geometry(Geometry, 4326)',
+            column_type(column(data, 'a'), srid=4326)
+        )
+
+
+    def test_column_type_unsupported(self):
+        """
+        Test error on unsupported data frame column type
+        """
+        data = pandas.Series([1j])
+        self.assertRaises(ValueError, column_type, data)
+
+        data = pandas.Series([1, 0], dtype='Sparse[int64]')
+        self.assertRaises(ValueError, column_type, data)
+
+
+# vim: sw=4:et:ai
@@ -0,0 +1,80 @@
+#
+# GeoCoon - GIS data analysis library based on Pandas and Shapely
+#
+# Copyright (C) 2014 by Artur Wroblewski <wrobell@pld-linux.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Prepared geometries cache unit tests.
+"""
+
+from shapely.geometry import Point, box
+from shapely.prepared import PreparedGeometry
+
+from geocoon.prepared import PreparedCache
+
+import unittest
+
+
+class PreparedCacheTestCase(unittest.TestCase):
+    """
+    Prepared geometries cache tests.
+    """
+    def test_get(self):
+        """
+        Test getting prepared geometry
+        """
+        shapes = [box(0, 0, 1, 1), box(1, 1, 2, 2)]
+        cache = PreparedCache()
+        geom = cache.get(shapes, 1)
+
+        self.assertTrue(isinstance(geom, PreparedGeometry))
+        self.assertIs(geom, cache.get(shapes, 1))
+        self.assertEqual(1, len(cache))
+
+
+    def test_eviction(self):
+        """
+        Test removal of least recently used prepared geometry
+        """
+        shapes = [box(v, v, v + 1, v + 1) for v in range(4)]
+        cache = PreparedCache(2)
+        g0 = cache.get(shapes, 0)
+        cache.get(shapes, 1)
+        self.assertIs(g0, cache.get(shapes, 0))
+
+        cache.get(shapes, 2) # geometry 1 is removed
+        self.assertEqual(2, len(cache))
+        self.assertIs(g0, cache.get(shapes, 0))
+        self.assertEqual([0, 2], sorted(cache._cache))
+
+
+    def test_call(self):
+        """
+        Test evaluating predicate with prepared geometries
+        """
+        shapes = [box(v, v, v + 1, v + 1) for v in range(3)]
+        cache = PreparedCache()
+
+        value = cache.call(shapes, 'contains', Point(1.5, 1.5))
+        self.assertEqual([False, True, False], value)
+
+        others = [Point(0.5, 0.5), Point(0, 0), Point(2.5, 2.5)]
+        value = cache.call(shapes, 'contains', others)
+        self.assertEqual([True, False, True], value)
+
+
+# vim: sw=4:et:ai
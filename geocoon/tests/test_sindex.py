@@ -0,0 +1,96 @@
+#
+# GeoCoon - GIS data analysis library based on Pandas and Shapely
+#
+# Copyright (C) 2014 by Artur Wroblewski <wrobell@pld-linux.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Spatial index unit tests.
+"""
+
+import numpy
+from shapely.geometry import Point, Polygon, box
+
+from geocoon.sindex import SpatialIndex
+
+import unittest
+
+
+class SpatialIndexTestCase(unittest.TestCase):
+    """
+    Spatial index tests.
+    """
+    def setUp(self):
+        """
+        Create spatial index of points and polygons.
+        """
+        shapes = numpy.empty(5, dtype=object)
+        shapes[:3] = [Point(v, v) for v in range(3)]
+        shapes[3] = box(0.5, 0.5, 1.5, 1.5)
+        shapes[4] = Polygon()
+        self.shapes = shapes
+        self.index = SpatialIndex(shapes)
+
+
+    def test_query(self):
+        """
+        Test spatial index query
+        """
+        idx = self.index.query(self.shapes, box(0.8, 0.8, 2, 2))
+        self.assertEqual([1, 2, 3], list(idx))
+
+
+    def test_query_predicate(self):
+        """
+        Test spatial index query with predicate
+        """
+        idx = self.index.query(self.shapes, box(0.8, 0.8, 2.5, 2.5), predicate='within')
+        self.assertEqual([1, 2], list(idx))
+
+        idx = self.index.query(self.shapes, Point(1.2, 1.2), predicate='contains')
+        self.assertEqual([3], list(idx))
+
+
+    def test_query_predicate_unsupported(self):
+        """
+        Test spatial index query with unsupported predicate
+        """
+        self.assertRaises(
+            ValueError, self.index.query, self.shapes, Point(1, 1),
+            predicate='disjoint'
+        )
+
+
+    def test_nearest(self):
+        """
+        Test spatial index nearest geometries query
+        """
+        idx = self.index.nearest(self.shapes, Point(2.1, 2.2))
+        self.assertEqual([2], list(idx))
+
+        idx = self.index.nearest(self.shapes, Point(2.1, 2.2), k=3)
+        self.assertEqual([2, 3, 1], list(idx))
+
+
+    def test_nearest_all(self):
+        """
+        Test spatial index nearest geometries query (more than indexed)
+        """
+        idx = self.index.nearest(self.shapes, Point(2.1, 2.2), k=10)
+        self.assertEqual([2, 3, 1, 0], list(idx))
+
+
+# vim: sw=4:et:ai
@@ -17,10 +17,22 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
-from shapely.geometry import Point
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import os.path
+import sqlite3
+import tempfile
+import threading
+import time
 
-from geocoon.sql import read_sql
-from geocoon.core import GeoDataFrame, PointSeries
+import pandas
+from shapely.geometry import Point, LineString, Polygon, MultiPolygon
+
+from geocoon.sql import read_sql, read_sql_partitioned, read_sql_async, \
+    to_sql, _decode_records
+from geocoon.core import GeoDataFrame, GeoSeries, PointSeries, \
+    LineStringSeries, series_cache
+from geocoon.pgcopy import encode
 
 import unittest
 from unittest import mock
@@ -53,4 +65,453 @@ class SQLTestCase(unittest.TestCase):
         self.assertTrue(all([1, 2, 3] == result.a.y))
 
 
+    @mock.patch('pandas.io.sql.read_sql')
+    def test_read_sql_mixed(self, f_sql):
+        """
+        Test SQL data frame read with mixed geometries
+        """
+        polygon = Polygon([(0, 0), (1, 0), (1, 1)])
+        data = [polygon.wkb, MultiPolygon([polygon]).wkb]
+        f_sql.side_effect = lambda *args, **kw: pandas.DataFrame({'a': data})
+
+        result = read_sql('query', 'con', geom_col='a')
+        self.assertEqual(GeoSeries, type(result.a))
+        self.assertEqual(MultiPolygon, type(result.a[1]))
+
+        self.assertRaises(
+            ValueError, read_sql, 'query', 'con', 'a', mixed='raise'
+        )
+
+
+    @mock.patch('pandas.io.sql.read_sql')
+    def test_read_sql_chunks(self, f_sql):
+        """
+        Test SQL data frame read in chunks
+        """
+        points = [Point(v, v) for v in range(5)]
+        data = pandas.DataFrame({
+            'a': [p.wkb for p in points],
+            'b': list(range(5)),
+        })
+        f_sql.return_value = iter([data[:3], data[3:]])
+
+        result = read_sql('query', 'con', geom_col='a', chunksize=3)
+        result = list(result)
+        self.assertEqual(3, f_sql.call_args[1]['chunksize'])
+        self.assertEqual(2, len(result))
+        self.assertEqual([3, 2], [len(df) for df in result])
+        for df in result:
+            self.assertEqual(GeoDataFrame, type(df))
+            self.assertEqual(PointSeries, type(df.a))
+        self.assertTrue(all([3, 4] == result[1].a.x))
+        self.assertEqual([3, 4], list(result[1].index))
+
+
+    @mock.patch('pandas.io.sql.read_sql')
+    def test_read_sql_cache(self, f_sql):
+        """
+        Test SQL data frame read with cache
+        """
+        data = pandas.DataFrame({'a': [Point(1, 1).wkb], 'b': [1]})
+        f_sql.return_value = data
+        cache = mock.MagicMock()
+        cache.get.return_value = None
+
+        result = read_sql('query', 'con', geom_col='a', params=(1,), cache=cache)
+        self.assertEqual(
+            mock.call('query', (1,), ('a',), None), cache.key.call_args
+        )
+        self.assertTrue(f_sql.called)
+        self.assertIs(result, cache.set.call_args[0][1])
+
+        # second read uses the cache
+        f_sql.reset_mock()
+        cache.get.return_value = result
+        self.assertIs(result, read_sql('query', 'con', geom_col='a', cache=cache))
+        self.assertFalse(f_sql.called)
+
+        self.assertRaises(
+            ValueError, read_sql, 'query', 'con', 'a', chunksize=1, cache=cache
+        )
+
+
+    def test_to_sql(self):
+        """
+        Test writing GIS data frame with binary COPY
+        """
+        data = GeoDataFrame({
+            'a': PointSeries([Point(v, v) for v in range(5)]),
+            'b': list(range(5)),
+        })
+        data = data[['a', 'b']]
+
+        con = mock.MagicMock()
+        cursor = con.cursor.return_value
+        stream = []
+        # psycopg2 reads COPY data in blocks of 8192 bytes
+        cursor.copy_expert.side_effect = lambda sql, f: stream.extend(
+            iter(lambda: f.read(8192), b'')
+        )
+        del cursor.copy
+
+        data.to_sql('test', con, srid=4326, index=False, chunksize=2)
+
+        sql = [c[0][0] for c in cursor.execute.call_args_list]
+        self.assertEqual([
+            'create table "test" ("a" geometry(Geometry, 4326), "b" bigint)'
+        ], sql)
+        self.assertEqual(
+            'copy "test" ("a", "b") from stdin with (format binary)',
+            cursor.copy_expert.call_args[0][0]
+        )
+        expected = b''.join(encode(data, srid=4326))
+        self.assertEqual(expected, b''.join(stream))
+        self.assertTrue(cursor.close.called)
+
+
+    def test_to_sql_copy(self):
+        """
+        Test writing GIS data frame with psycopg 3 COPY
+        """
+        data = GeoDataFrame({'a': PointSeries([Point(1, 2), Point(3, 4)])})
+
+        con = mock.MagicMock()
+        cursor = con.cursor.return_value
+        del cursor.copy_expert
+        copy = cursor.copy.return_value.__enter__.return_value
+
+        to_sql(
+            data, 'test', con, schema='s', if_exists='replace',
+            index_label='id', chunksize=1
+        )
+
+        sql = [c[0][0] for c in cursor.execute.call_args_list]
+        self.assertEqual([
+            'drop table if exists "s"."test"',
+            'create table "s"."test" ("id" bigint, "a" geometry)',
+        ], sql)
+        self.assertEqual(
+            'copy "s"."test" ("id", "a") from stdin with (format binary)',
+            cursor.copy.call_args[0][0]
+        )
+        stream = [c[0][0] for c in copy.write.call_args_list]
+        self.assertEqual(4, len(stream))
+
+        expected = data.reset_index()
+        expected = b''.join(encode(expected))
+        self.assertEqual(expected, b''.join(stream))
+
+
+    def test_to_sql_index(self):
+        """
+        Test writing GIS data frame with multi-index and positional
+        parameters
+        """
+        index = pandas.MultiIndex.from_arrays([[1, 2], ['x', 'y']])
+        index.names = ['id', None]
+        data = GeoDataFrame(
+            {'a': PointSeries([Point(1, 2), Point(3, 4)])}, index=index
+        )
+
+        con = mock.MagicMock()
+        cursor = con.cursor.return_value
+        del cursor.copy
+
+        data.to_sql('test', con, 's')
+
+        sql = [c[0][0] for c in cursor.execute.call_args_list]
+        self.assertEqual([
+            'create table "s"."test" ("id" bigint, "level_1" text,'
+            ' "a" geometry)',
+        ], sql)
+        self.assertEqual(
+            'copy "s"."test" ("id", "level_1", "a") from stdin'
+            ' with (format binary)',
+            cursor.copy_expert.call_args[0][0]
+        )
+
+
+    def test_to_sql_append(self):
+        """
+        Test appending GIS data frame to a table
+        """
+        data = GeoDataFrame({'a': PointSeries([Point(1, 2)])})
+        con = mock.MagicMock()
+        cursor = con.cursor.return_value
+
+        to_sql(data, 'test', con, if_exists='append', index=False)
+        self.assertFalse(cursor.execute.called)
+        self.assertTrue(cursor.copy_expert.called)
+
+
+    def test_to_sql_if_exists(self):
+        """
+        Test error on invalid if exists option
+        """
+        data = GeoDataFrame({'a': PointSeries([Point(1, 2)])})
+        self.assertRaises(ValueError, to_sql, data, 'test', 'con', if_exists='x')
+
+
+
+class PartitionedSQLTestCase(unittest.TestCase):
+    """
+    Test reading SQL query results with partitioned queries.
+    """
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._dir.name, 'test.db')
+
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+
+    def create_table(self, shapes, ts=None):
+        """
+        Create table with identifier, partition column and geometry.
+        """
+        if ts is None:
+            ts = [10 * i for i in range(len(shapes))]
+        con = sqlite3.connect(self.path)
+        con.execute('create table t (id integer, ts integer, geom blob)')
+        con.executemany(
+            'insert into t values (?, ?, ?)',
+            [(i, t, g.wkb) for i, (t, g) in enumerate(zip(ts, shapes))]
+        )
+        con.commit()
+        con.close()
+
+
+    def read(self, n_partitions, **kw):
+        """
+        Read table with partitioned queries.
+        """
+        return read_sql_partitioned(
+            'select * from t', lambda: sqlite3.connect(self.path), 'geom',
+            'ts', (0, 90), n_partitions, index_col='id', placeholder='?',
+            **kw
+        )
+
+
+    def test_read_sql_partitioned(self):
+        """
+        Test reading points with partitioned queries
+        """
+        self.create_table([Point(i, 2 * i) for i in range(10)])
+        for n in (1, 3, 20):
+            result = self.read(n)
+            self.assertEqual(GeoDataFrame, type(result))
+            self.assertEqual(['ts', 'geom'], list(result.columns))
+            self.assertEqual(list(range(10)), list(result.index))
+            self.assertEqual(PointSeries, type(result.geom))
+            self.assertEqual({'geom': PointSeries}, result._geom_columns)
+            self.assertEqual(list(range(10)), list(result.geom.x))
+            self.assertEqual(list(range(0, 20, 2)), list(result.geom.y))
+
+
+    def test_read_sql_partitioned_unbounded(self):
+        """
+        Test reading rows with partition column values outside of bounds
+        and null values with partitioned queries
+        """
+        ts = [-10, 0, None, 50, 90, 100]
+        self.create_table([Point(i, i) for i in range(6)], ts)
+        for n in (1, 3):
+            result = self.read(n)
+            self.assertEqual([0, 1, 3, 4, 5, 2], list(result.index))
+            self.assertEqual([0, 1, 3, 4, 5, 2], list(result.geom.x))
+
+
+    def test_read_sql_partitioned_range_index(self):
+        """
+        Test reading with partitioned queries without index column
+        """
+        self.create_table([Point(i, i) for i in range(10)])
+        result = read_sql_partitioned(
+            'select * from t', lambda: sqlite3.connect(self.path), 'geom',
+            'ts', (0, 90), 3, placeholder='?'
+        )
+        self.assertEqual(list(range(10)), list(result.index))
+        self.assertEqual(list(range(10)), list(result.geom.x))
+        self.assertEqual(list(range(10)), list(result.id))
+
+
+    def test_read_sql_partitioned_connections(self):
+        """
+        Test limiting number of database connections of partitioned
+        queries
+        """
+        lock = threading.Lock()
+        count = [0, 0]
+        class Connection(sqlite3.Connection):
+            def __init__(self, *args, **kw):
+                super().__init__(*args, **kw)
+                with lock:
+                    count[0] += 1
+                    count[1] = max(count)
+
+            def close(self):
+                # keep the connection open, so the queries overlap
+                time.sleep(0.05)
+                with lock:
+                    count[0] -= 1
+                super().close()
+
+        self.create_table([Point(i, i) for i in range(10)])
+        result = read_sql_partitioned(
+            'select * from t',
+            lambda: sqlite3.connect(
+                self.path, factory=Connection, check_same_thread=False
+            ),
+            'geom', 'ts', (0, 90), 10, index_col='id', placeholder='?',
+            max_connections=2
+        )
+        self.assertEqual(list(range(10)), list(result.geom.x))
+        self.assertEqual(0, count[0])
+        self.assertTrue(1 <= count[1] <= 2)
+
+        self.assertRaises(ValueError, self.read, 3, max_connections=0)
+
+
+    def test_read_sql_partitioned_processes(self):
+        """
+        Test reading line strings with partitioned queries and WKB data
+        decoded by worker processes
+        """
+        lines = [LineString([(i, i), (i + 1, i + 2)]) for i in range(10)]
+        self.create_table(lines)
+        result = self.read(3, n_jobs=2)
+
+        self.assertEqual(LineStringSeries, type(result.geom))
+        self.assertTrue(all(l1.equals(l2) for l1, l2 in zip(lines, result.geom)))
+        coords, offsets = series_cache(result.geom)['coords']
+        self.assertEqual(list(range(0, 21, 2)), list(offsets))
+
+
+    def test_read_sql_partitioned_fallback(self):
+        """
+        Test reading partitions with different geometry dimensions
+        """
+        points = [Point(i, i) for i in range(5)] \
+            + [Point(i, i, i) for i in range(5, 10)]
+        self.create_table(points)
+        result = self.read(2)
+
+        self.assertEqual(PointSeries, type(result.geom))
+        self.assertEqual(list(range(10)), list(result.geom.x))
+
+
+    def test_read_sql_partitioned_params(self):
+        """
+        Test reading with partitioned queries with query parameters
+        """
+        self.create_table([Point(i, i) for i in range(10)])
+        result = read_sql_partitioned(
+            'select * from t where id > ?', lambda: sqlite3.connect(self.path),
+            'geom', 'ts', (0, 90), 2, params=(3,), placeholder='?'
+        )
+        self.assertEqual(list(range(4, 10)), list(result.geom.x))
+
+
+
+class Record(tuple):
+    """
+    Record returned by fake asynchronous database connection.
+    """
+    def __new__(cls, columns, values):
+        obj = super().__new__(cls, values)
+        obj.columns = columns
+        return obj
+
+
+    def keys(self):
+        return iter(self.columns)
+
+
+
+class AsyncConnection(object):
+    """
+    Fake asynchronous database connection returning recorded rows.
+    """
+    def __init__(self, columns, rows):
+        self.rows = [Record(columns, r) for r in rows]
+        self.query = None
+
+
+    async def fetch(self, sql, *params):
+        self.query = sql, params
+        await asyncio.sleep(0)
+        return self.rows
+
+
+
+class AsyncSQLTestCase(unittest.TestCase):
+    """
+    Test reading SQL query results with asynchronous connection.
+    """
+    def test_read_sql_async(self):
+        """
+        Test reading GIS data frame with asynchronous connection
+        """
+        rows = [(i, Point(i, 2 * i).wkb) for i in range(10)]
+        con = AsyncConnection(['id', 'geom'], rows)
+
+        with ThreadPoolExecutor(1) as executor:
+            with mock.patch('geocoon.sql._decode_records') as f:
+                f.side_effect = _decode_records
+                task = read_sql_async(
+                    'query', con, 'geom', index_col='id', params=(1, 2),
+                    chunksize=3, executor=executor
+                )
+                result = asyncio.run(task)
+
+        self.assertEqual(('query', (1, 2)), con.query)
+        # decoded in batches of rows
+        self.assertEqual(4, f.call_count)
+        self.assertEqual(
+            [0, 3, 6, 9], [c[0][1] for c in f.call_args_list]
+        )
+
+        self.assertEqual(GeoDataFrame, type(result))
+        self.assertEqual(['geom'], list(result.columns))
+        self.assertEqual(list(range(10)), list(result.index))
+        self.assertEqual('id', result.index.name)
+        self.assertEqual(PointSeries, type(result.geom))
+        self.assertEqual(list(range(0, 20, 2)), list(result.geom.y))
+
+
+    def test_read_sql_async_empty(self):
+        """
+        Test reading empty GIS data frame with asynchronous connection
+        """
+        con = AsyncConnection(['id', 'geom'], [])
+
+        task = read_sql_async('query', con, 'geom', index_col='id')
+        result = asyncio.run(task)
+        self.assertEqual(GeoDataFrame, type(result))
+        self.assertEqual(['geom'], list(result.columns))
+        self.assertEqual(0, len(result))
+        self.assertEqual('id', result.index.name)
+        self.assertIn('geom', result._geom_columns)
+
+        result = asyncio.run(read_sql_async('query', con, 'geom'))
+        self.assertEqual(['geom'], list(result.columns))
+        self.assertEqual(0, len(result))
+
+
+    def test_read_sql_async_columns(self):
+        """
+        Test reading GIS data frame with asynchronous connection and
+        default index
+        """
+        rows = [(Point(i, i).wkb, 'p{}'.format(i)) for i in range(5)]
+        con = AsyncConnection(['geom', 'name'], rows)
+
+        result = asyncio.run(read_sql_async('query', con, ['geom'], chunksize=2))
+        self.assertEqual(['geom', 'name'], list(result.columns))
+        self.assertEqual(list(range(5)), list(result.index))
+        self.assertEqual(list(range(5)), list(result.geom.x))
+        self.assertEqual(['p{}'.format(i) for i in range(5)], list(result.name))
+
+
 # vim: sw=4:et:ai
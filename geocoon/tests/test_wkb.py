@@ -0,0 +1,268 @@
+#
+# GeoCoon - GIS data analysis library based on Pandas and Shapely
+#
+# Copyright (C) 2014 by Artur Wroblewski <wrobell@pld-linux.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+WKB conversion unit tests.
+"""
+
+import numpy
+from shapely.geometry import Point, LineString, Polygon, MultiPoint
+import shapely.wkb
+
+from geocoon.coords import point_coords, line_coords, polygon_coords
+from geocoon.wkb import WKB_POINT, WKB_LINE_STRING, WKB_POLYGON, \
+    encode_points, encode_lines, encode_polygons, decode, to_bytes, \
+    read_srid
+
+import unittest
+
+
+class EncodeTestCase(unittest.TestCase):
+    """
+    WKB encoding tests.
+    """
+    def test_encode_lines(self):
+        """
+        Test encoding line strings as WKB data
+        """
+        lines = [
+            LineString([(0, 0), (3, 4)]),
+            LineString([(1, 1), (1, 2), (2, 2), (1, 1)]),
+        ]
+        data = encode_lines(*line_coords(lines))
+        self.assertEqual([g.wkb for g in lines], list(data))
+
+
+    def test_encode_lines_3d(self):
+        """
+        Test encoding line strings as WKB data (3D)
+        """
+        lines = [
+            LineString([(0, 0, 1), (3, 4, 2)]),
+            LineString([(1, 1, 3), (1, 2, 4), (2, 2, 5), (1, 1, 6)]),
+        ]
+        data = encode_lines(*line_coords(lines))
+        self.assertEqual([g.wkb for g in lines], list(data))
+
+
+    def test_encode_lines_srid(self):
+        """
+        Test encoding line strings as EWKB data with SRID
+        """
+        lines = [
+            LineString([(0, 0), (3, 4)]),
+            LineString([(1, 1), (1, 2), (2, 2), (1, 1)]),
+        ]
+        data = encode_lines(*line_coords(lines), srid=4326, hex=True)
+        expected = [shapely.wkb.dumps(g, srid=4326, hex=True) for g in lines]
+        self.assertEqual(expected, list(data))
+
+
+    def test_encode_points(self):
+        """
+        Test encoding points as WKB data
+        """
+        points = [Point(1, 2), Point(3, 4)]
+        data = encode_points(point_coords(points))
+        self.assertEqual([g.wkb for g in points], list(data))
+
+        points = [Point(1, 2, 3), Point(3, 4, 5)]
+        data = encode_points(point_coords(points), srid=2180)
+        expected = [shapely.wkb.dumps(g, srid=2180) for g in points]
+        self.assertEqual(expected, list(data))
+
+
+    def test_encode_polygons(self):
+        """
+        Test encoding polygons as WKB data
+        """
+        polygons = [
+            Polygon([(0, 0), (1, 0), (1, 1), (0, 0)]),
+            Polygon(
+                [(0, 0), (9, 0), (9, 9), (0, 9), (0, 0)],
+                [[(1, 1), (2, 1), (2, 2), (1, 1)],
+                 [(5, 5), (6, 5), (6, 6), (5, 5)]]
+            ),
+        ]
+        data = encode_polygons(*polygon_coords(polygons))
+        self.assertEqual([g.wkb for g in polygons], list(data))
+
+        data = encode_polygons(*polygon_coords(polygons), srid=4326, hex=True)
+        expected = [shapely.wkb.dumps(g, srid=4326, hex=True) for g in polygons]
+        self.assertEqual(expected, list(data))
+
+
+    def test_encode_decode(self):
+        """
+        Test decoding encoded polygons
+        """
+        polygons = [
+            Polygon([(0, 0, 1), (1, 0, 2), (1, 1, 3), (0, 0, 1)]),
+            Polygon([(5, 5, 5), (6, 5, 5), (6, 6, 5), (5, 5, 5)]),
+        ]
+        packed = polygon_coords(polygons)
+        data = encode_polygons(*packed, srid=4326)
+        geom_type, result, srid = decode(data)
+
+        self.assertEqual(WKB_POLYGON, geom_type)
+        self.assertEqual([4326, 4326], srid.tolist())
+        for v1, v2 in zip(packed, result):
+            self.assertEqual(v1.tolist(), v2.tolist())
+
+
+class DecodeTestCase(unittest.TestCase):
+    """
+    WKB decoding tests.
+    """
+    def test_decode_points(self):
+        """
+        Test decoding points WKB data
+        """
+        data = [Point(1, 2).wkb, Point(3, 4).wkb]
+        geom_type, coords, srid = decode(data)
+
+        self.assertEqual(WKB_POINT, geom_type)
+        self.assertEqual([[1, 3], [2, 4]], coords.tolist())
+        self.assertEqual([0, 0], srid.tolist())
+
+
+    def test_decode_points_3d(self):
+        """
+        Test decoding points WKB data (3D)
+        """
+        data = [Point(1, 2, 5).wkb, Point(3, 4, 6).wkb]
+        geom_type, coords, srid = decode(data)
+
+        self.assertEqual(WKB_POINT, geom_type)
+        self.assertEqual([[1, 3], [2, 4], [5, 6]], coords.tolist())
+
+
+    def test_decode_points_iso(self):
+        """
+        Test decoding points ISO WKB data (3D)
+        """
+        data = [
+            b'\x01\xe9\x03\x00\x00' + numpy.array([1, 2, 5], '<f8').tobytes()
+        ]
+        geom_type, coords, srid = decode(data)
+
+        self.assertEqual(WKB_POINT, geom_type)
+        self.assertEqual([[1], [2], [5]], coords.tolist())
+
+
+    def test_decode_points_ewkb(self):
+        """
+        Test decoding points EWKB data with SRID
+        """
+        data = [
+            bytes.fromhex('0101000020E6100000000000000000F03F0000000000000040'),
+            Point(3, 4).wkb,
+        ]
+        geom_type, coords, srid = decode(data)
+
+        self.assertEqual(WKB_POINT, geom_type)
+        self.assertEqual([[1, 3], [2, 4]], coords.tolist())
+        self.assertEqual([4326, 0], srid.tolist())
+
+
+    def test_decode_lines(self):
+        """
+        Test decoding line strings WKB data
+        """
+        lines = [
+            LineString([(0, 0), (3, 4)]),
+            LineString(),
+            LineString([(1, 1), (1, 2), (2, 2), (1, 1)]),
+        ]
+        data = encode_lines(*line_coords(lines))
+        geom_type, (coords, offsets), srid = decode(data)
+
+        self.assertEqual(WKB_LINE_STRING, geom_type)
+        self.assertEqual([0, 2, 2, 6], offsets.tolist())
+        expected = [(0, 0), (3, 4), (1, 1), (1, 2), (2, 2), (1, 1)]
+        self.assertEqual(expected, [tuple(c) for c in coords.tolist()])
+
+
+    def test_decode_polygons(self):
+        """
+        Test decoding polygons WKB data
+        """
+        polygons = [
+            Polygon([(0, 0), (1, 0), (1, 1), (0, 0)]),
+            Polygon(
+                [(0, 0), (9, 0), (9, 9), (0, 9), (0, 0)],
+                [[(1, 1), (2, 1), (2, 2), (1, 1)],
+                 [(5, 5), (6, 5), (6, 6), (5, 5)]]
+            ),
+            Polygon([(2, 2), (3, 2), (3, 3), (2, 2)]),
+        ]
+        data = [g.wkb for g in polygons]
+        geom_type, coords, srid = decode(data)
+        coords, ring_offsets, offsets = coords
+
+        self.assertEqual(WKB_POLYGON, geom_type)
+        self.assertEqual([0, 1, 4, 5], offsets.tolist())
+        self.assertEqual([0, 4, 9, 13, 17, 21], ring_offsets.tolist())
+        self.assertEqual([5, 5], coords[13].tolist())
+        self.assertEqual([2, 2], coords[17].tolist())
+
+
+    def test_decode_unsupported(self):
+        """
+        Test decoding unsupported WKB data
+        """
+        line = LineString([(0, 0), (1, 1)])
+        self.assertIsNone(decode([]))
+        self.assertIsNone(decode([MultiPoint([(0, 0), (1, 1)]).wkb]))
+        self.assertIsNone(decode([Point(1, 2).wkb, line.wkb]))
+        self.assertIsNone(decode([Point(1, 2).wkb, Point(1, 2, 3).wkb]))
+        self.assertIsNone(decode([Point(1, 2).wkb[:-1]]))
+        self.assertIsNone(decode([line.wkb + b'\x00']))
+
+
+    def test_decode_big_endian(self):
+        """
+        Test decoding big endian WKB data
+        """
+        data = [b'\x00\x00\x00\x00\x01' + numpy.array([1, 2], '>f8').tobytes()]
+        self.assertIsNone(decode(data))
+
+
+    def test_to_bytes(self):
+        """
+        Test converting WKB data into binary strings
+        """
+        data = [b'\x01', '02', memoryview(b'\x03')]
+        self.assertEqual([b'\x01', b'\x02', b'\x03'], to_bytes(data))
+
+
+    def test_read_srid(self):
+        """
+        Test reading SRID of EWKB data
+        """
+        data = [
+            shapely.wkb.dumps(Point(1, 2), srid=4326),
+            shapely.wkb.dumps(MultiPoint([(0, 0)]), srid=3857, big_endian=True),
+            Point(1, 2).wkb,
+            b'',
+        ]
+        self.assertEqual([4326, 3857, 0, 0], read_srid(data).tolist())
+
+
+# vim: sw=4:et:ai
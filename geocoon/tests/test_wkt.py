@@ -0,0 +1,108 @@
+#
+# GeoCoon - GIS data analysis library based on Pandas and Shapely
+#
+# Copyright (C) 2014 by Artur Wroblewski <wrobell@pld-linux.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+WKT conversion unit tests.
+"""
+
+from shapely.geometry import Point, LineString, Polygon
+
+from geocoon.coords import point_coords, line_coords, polygon_coords
+from geocoon.wkt import encode_points, encode_lines, encode_polygons, \
+    format_values
+
+import unittest
+
+
+class EncodeTestCase(unittest.TestCase):
+    """
+    WKT encoding tests.
+    """
+    def test_encode_points(self):
+        """
+        Test encoding points as WKT data
+        """
+        points = [Point(1, 2), Point(-3.5, 4)]
+        data = encode_points(point_coords(points))
+        self.assertEqual(['POINT (1 2)', 'POINT (-3.5 4)'], list(data))
+
+
+    def test_encode_points_3d(self):
+        """
+        Test encoding points as WKT data (3D)
+        """
+        points = [Point(1, 2, 3), Point(3, 4, 5)]
+        data = encode_points(point_coords(points))
+        self.assertEqual([g.wkt for g in points], list(data))
+
+
+    def test_encode_lines(self):
+        """
+        Test encoding line strings as WKT data
+        """
+        lines = [
+            LineString([(0, 0), (3, 4)]),
+            LineString([(1, 1), (1, 2.125), (2, 2), (1, 1)]),
+        ]
+        data = encode_lines(*line_coords(lines), precision=2)
+        expected = [
+            'LINESTRING (0 0, 3 4)',
+            'LINESTRING (1 1, 1 2.12, 2 2, 1 1)',
+        ]
+        self.assertEqual(expected, list(data))
+
+
+    def test_encode_polygons(self):
+        """
+        Test encoding polygons as WKT data
+        """
+        polygons = [
+            Polygon([(0, 0), (1, 0), (1, 1), (0, 0)]),
+            Polygon(
+                [(0, 0), (9, 0), (9, 9), (0, 9), (0, 0)],
+                [[(1, 1), (2, 1), (2, 2), (1, 1)],
+                 [(5, 5), (6, 5), (6, 6), (5, 5)]]
+            ),
+        ]
+        data = encode_polygons(*polygon_coords(polygons))
+        self.assertEqual([g.wkt for g in polygons], list(data))
+
+
+    def test_format_values(self):
+        """
+        Test formatting float numbers
+        """
+        values = [1.0, -0.0, 0.1, 1 / 3, 1e20, 2.5e-7]
+        expected = [
+            '1', '0', '0.1', '0.3333333333333333', '100000000000000000000',
+            '0.00000025',
+        ]
+        self.assertEqual(expected, list(format_values(values)))
+
+
+    def test_format_values_precision(self):
+        """
+        Test formatting float numbers with precision
+        """
+        values = [1.0, -0.0001, 0.1, 1 / 3, 1e20]
+        expected = ['1', '0', '0.1', '0.333', '100000000000000000000']
+        self.assertEqual(expected, list(format_values(values, 3)))
+
+
+# vim: sw=4:et:ai
@@ -0,0 +1,449 @@
+#
+# GeoCoon - GIS data analysis library based on Pandas and Shapely
+#
+# Copyright (C) 2014 by Artur Wroblewski <wrobell@pld-linux.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Conversion of packed coordinate arrays to and from WKB format.
+
+The WKB data is created with NumPy for all geometries at once. The format
+of the data is the same as the format of WKB data created by Shapely,
+i.e. little endian byte order and EWKB flag for 3D geometries.
+"""
+
+import struct
+
+import numpy
+from numpy.lib.stride_tricks import as_strided
+
+# WKB geometry type codes
+WKB_POINT = 1
+WKB_LINE_STRING = 2
+WKB_POLYGON = 3
+
+# EWKB flag of 3D geometries
+WKB_Z = 0x80000000
+
+# EWKB flags of geometries with `m` coordinate and with SRID
+WKB_M = 0x40000000
+WKB_SRID = 0x20000000
+
+
+def encode_points(coords, srid=None, hex=False):
+    """
+    Create WKB data of points.
+
+    Array of WKB binary strings is returned. If SRID is specified, then
+    EWKB data with SRID is created.
+
+    :param coords: Array of coordinates of `(ndim, n)` shape.
+    :param srid: Optional SRID of points.
+    :param hex: Create hex strings if true.
+    """
+    ndim, n = coords.shape
+    header = _header(n, WKB_POINT, ndim, srid)
+    offsets = numpy.arange(n + 1)
+    return _join(header, coords.T, offsets, hex)
+
+
+def encode_lines(coords, offsets, srid=None, hex=False):
+    """
+    Create WKB data of packed line strings.
+
+    Array of WKB binary strings is returned. If SRID is specified, then
+    EWKB data with SRID is created.
+
+    :param coords: Array of coordinates of `(m, ndim)` shape.
+    :param offsets: Array of offsets of line strings.
+    :param srid: Optional SRID of line strings.
+    :param hex: Create hex strings if true.
+    """
+    n = len(offsets) - 1
+    # each line string is: byte order, type, optional SRID, number of
+    # points and coordinates
+    header = _header(n, WKB_LINE_STRING, coords.shape[1], srid, count=True)
+    header['count'] = numpy.diff(offsets)
+    return _join(header, coords, offsets, hex)
+
+
+def encode_polygons(coords, ring_offsets, offsets, srid=None, hex=False):
+    """
+    Create WKB data of packed polygons.
+
+    Array of WKB binary strings is returned. If SRID is specified, then
+    EWKB data with SRID is created.
+
+    :param coords: Array of coordinates of `(m, ndim)` shape.
+    :param ring_offsets: Array of offsets of rings.
+    :param offsets: Array of offsets of polygons.
+    :param srid: Optional SRID of polygons.
+    :param hex: Create hex strings if true.
+    """
+    n = len(offsets) - 1
+    n_rings = len(ring_offsets) - 1
+    csize = coords.shape[1] * 8
+
+    # each polygon is: byte order, type, optional SRID, number of rings
+    # and rings; each ring is: number of points and coordinates
+    header = _header(n, WKB_POLYGON, coords.shape[1], srid, count=True)
+    header['count'] = numpy.diff(offsets)
+    hsize = header.dtype.itemsize
+
+    n_points = numpy.diff(ring_offsets[offsets])
+    start = numpy.zeros(n + 1, dtype=numpy.int64)
+    numpy.cumsum(hsize + 4 * header['count'] + csize * n_points, out=start[1:])
+    buff = numpy.empty(start[-1], dtype=numpy.uint8)
+    _write(buff, start[:-1], header)
+
+    ids = numpy.repeat(numpy.arange(n), numpy.diff(offsets))
+    first = offsets[ids]
+    ring_start = start[ids] + hsize + 4 * (numpy.arange(n_rings) - first) \
+        + csize * (ring_offsets[:-1] - ring_offsets[first])
+    counts = numpy.diff(ring_offsets).astype('<u4')
+    _write(buff, ring_start, counts)
+
+    ids = numpy.repeat(numpy.arange(n_rings), counts)
+    cstart = ring_start[ids] + 4 \
+        + csize * (numpy.arange(len(coords)) - ring_offsets[ids])
+    _write(buff, cstart, numpy.ascontiguousarray(coords, dtype='<f8'))
+    return _split(buff, start, hex)
+
+
+def to_bytes(data):
+    """
+    Convert collection of WKB data into list of binary strings.
+
+    The WKB data can be binary strings, memory views (i.e. as returned by
+    some database drivers) or hex strings.
+
+    :param data: Collection of WKB data.
+    """
+    return [
+        bytes.fromhex(v) if isinstance(v, str) else bytes(v) for v in data
+    ]
+
+
+def decode(data):
+    """
+    Decode collection of WKB binary strings into packed coordinates.
+
+    The geometries are decoded with NumPy in one pass. All geometries have
+    to be little endian points, line strings or polygons of the same type
+    and dimension. Both ISO WKB and EWKB formats, including SRID, are
+    supported.
+
+    Tuple of geometry type, coordinates and SRID array is returned. The
+    coordinates are tuple of arrays as used by :py:mod:`geocoon.coords`
+    module, i.e. points array, coordinates and offsets of line strings or
+    coordinates, ring offsets and offsets of polygons. SRID is zero for
+    geometries without SRID.
+
+    If the geometries cannot be decoded, then `None` is returned.
+
+    :param data: Collection of WKB binary strings.
+    """
+    n = len(data)
+    if n == 0:
+        return None
+
+    size = numpy.fromiter(map(len, data), dtype=numpy.int64, count=n)
+    offsets = numpy.zeros(n + 1, dtype=numpy.int64)
+    numpy.cumsum(size, out=offsets[1:])
+    buff = numpy.frombuffer(b''.join(data), dtype=numpy.uint8)
+    return decode_buffer(buff, offsets)
+
+
+def read_srid(data):
+    """
+    Read SRID of each EWKB binary string.
+
+    SRID is zero for geometries without SRID.
+
+    :param data: Collection of WKB binary strings.
+    """
+    srid = numpy.zeros(len(data), dtype=numpy.uint32)
+    for i, v in enumerate(data):
+        if len(v) >= 9:
+            order = '<' if v[0] == 1 else '>'
+            code, value = struct.unpack(order + 'II', v[1:9])
+            if code & WKB_SRID:
+                srid[i] = value
+    return srid
+
+
+def decode_buffer(buff, offsets):
+    """
+    Decode WKB data stored in single buffer into packed coordinates.
+
+    The WKB data of geometry `i` is `buff[offsets[i]:offsets[i + 1]]`.
+    This allows to decode WKB data of binary arrays, i.e. Apache Arrow
+    arrays, without creating binary string for each geometry.
+
+    .. seealso:: :py:func:`decode`
+
+    :param buff: Array of bytes.
+    :param offsets: Array of offsets of WKB data.
+    """
+    n = len(offsets) - 1
+    if n <= 0:
+        return None
+
+    offsets = numpy.asarray(offsets, dtype=numpy.int64)
+    start = offsets[:-1]
+    end = offsets[1:]
+    if (end - start < 5).any():
+        return None
+
+    if (buff[start] != 1).any():
+        return None
+
+    code = _read(buff, start + 1, '<u4')
+    has_srid = (code & WKB_SRID) != 0
+    base = code & 0x0fffffff
+    iso = base // 1000
+    base = base % 1000
+    has_z = ((code & WKB_Z) != 0) | (iso == 1)
+
+    geom_type = base[0]
+    ndim = 3 if has_z[0] else 2
+    invalid = (code & WKB_M).any() or (iso > 1).any() \
+        or geom_type not in _DECODERS \
+        or (base != geom_type).any() or (has_z != has_z[0]).any()
+    if invalid:
+        return None
+
+    # position of first byte after geometry header
+    pos = start + 5 + 4 * has_srid
+    if (pos > end).any():
+        return None
+    srid = numpy.zeros(n, dtype=numpy.uint32)
+    if has_srid.any():
+        srid[has_srid] = _read(buff, start[has_srid] + 5, '<u4')
+
+    coords = _DECODERS[geom_type](buff, pos, end, ndim)
+    if coords is None:
+        return None
+    return int(geom_type), coords, srid
+
+
+def _decode_points(buff, pos, end, ndim):
+    """
+    Decode WKB data of points.
+
+    Array of coordinates of `(ndim, n)` shape is returned.
+    """
+    if (pos + 8 * ndim != end).any():
+        return None
+
+    k = numpy.arange(ndim)
+    coords = _read(buff, pos[None, :] + 8 * k[:, None], '<f8')
+    # empty points are not supported
+    if numpy.isnan(coords).any():
+        return None
+    return coords
+
+
+def _decode_lines(buff, pos, end, ndim):
+    """
+    Decode WKB data of line strings.
+
+    Tuple of coordinates array and offsets array is returned.
+    """
+    if (pos + 4 > end).any():
+        return None
+    count = _read(buff, pos, '<u4').astype(numpy.int64)
+    if (pos + 4 + 8 * ndim * count != end).any():
+        return None
+    return _read_coords(buff, pos + 4, count, ndim)
+
+
+def _decode_polygons(buff, pos, end, ndim):
+    """
+    Decode WKB data of polygons.
+
+    Tuple of coordinates array, ring offsets array and offsets array is
+    returned.
+    """
+    n = len(pos)
+    if (pos + 4 > end).any():
+        return None
+    n_rings = _read(buff, pos, '<u4').astype(numpy.int64)
+    pos = pos + 4
+
+    # read rings of all polygons at once; first, the first ring of
+    # each polygon, then the second ring, etc.
+    ids = numpy.arange(n)
+    ring_poly = []
+    ring_pos = []
+    ring_count = []
+    for k in range(n_rings.max()):
+        idx = ids[n_rings > k]
+        p = pos[idx]
+        if (p + 4 > end[idx]).any():
+            return None
+        count = _read(buff, p, '<u4').astype(numpy.int64)
+        ring_poly.append(idx)
+        ring_pos.append(p + 4)
+        ring_count.append(count)
+        pos[idx] = p + 4 + 8 * ndim * count
+
+    if (pos != end).any():
+        return None
+
+    offsets = numpy.zeros(n + 1, dtype=numpy.int64)
+    numpy.cumsum(n_rings, out=offsets[1:])
+    if ring_poly:
+        # order rings by polygon, the order of rings of a polygon is kept
+        order = numpy.argsort(numpy.concatenate(ring_poly), kind='stable')
+        ring_pos = numpy.concatenate(ring_pos)[order]
+        ring_count = numpy.concatenate(ring_count)[order]
+    else:
+        ring_pos = ring_count = numpy.zeros(0, dtype=numpy.int64)
+    coords, ring_offsets = _read_coords(buff, ring_pos, ring_count, ndim)
+    return coords, ring_offsets, offsets
+
+
+def _read_coords(buff, pos, count, ndim):
+    """
+    Read coordinates of packed geometries.
+
+    Tuple of coordinates array and offsets array is returned.
+
+    :param buff: Buffer with WKB data.
+    :param pos: Position of first coordinate of each geometry.
+    :param count: Number of points of each geometry.
+    :param ndim: Number of dimensions of coordinates.
+    """
+    offsets = numpy.zeros(len(count) + 1, dtype=numpy.int64)
+    numpy.cumsum(count, out=offsets[1:])
+
+    # position of each coordinate value in the buffer
+    m = offsets[-1] * ndim
+    k = numpy.arange(m) - numpy.repeat(offsets[:-1] * ndim, count * ndim)
+    cpos = numpy.repeat(pos, count * ndim) + 8 * k
+    coords = _read(buff, cpos, '<f8').reshape(-1, ndim)
+    return coords, offsets
+
+
+def _read(buff, pos, dtype):
+    """
+    Read values of given type at positions of a buffer.
+
+    The positions do not have to be aligned to the size of the type.
+
+    :param buff: Buffer of bytes.
+    :param pos: Array of positions in the buffer.
+    :param dtype: Type of values.
+    """
+    dtype = numpy.dtype(dtype)
+    size = dtype.itemsize
+    view = as_strided(buff, shape=(len(buff) - size + 1, size), strides=(1, 1))
+    data = view[pos.ravel()]
+    return data.view(dtype).reshape(pos.shape).astype(dtype.newbyteorder('='))
+
+
+_DECODERS = {
+    WKB_POINT: _decode_points,
+    WKB_LINE_STRING: _decode_lines,
+    WKB_POLYGON: _decode_polygons,
+}
+
+
+def _header(n, geom_type, ndim, srid, count=False):
+    """
+    Create array of headers of geometries.
+
+    :param n: Number of geometries.
+    :param geom_type: WKB geometry type code.
+    :param ndim: Number of dimensions of coordinates.
+    :param srid: Optional SRID of geometries.
+    :param count: Add number of items field if true.
+    """
+    fields = [('order', 'u1'), ('type', '<u4')]
+    if srid is not None:
+        fields.append(('srid', '<u4'))
+    if count:
+        fields.append(('count', '<u4'))
+
+    header = numpy.zeros(n, dtype=fields)
+    header['order'] = 1
+    header['type'] = geom_type | (WKB_Z if ndim == 3 else 0) \
+        | (0 if srid is None else WKB_SRID)
+    if srid is not None:
+        header['srid'] = srid
+    return header
+
+
+def _join(header, coords, offsets, hex=False):
+    """
+    Join headers of geometries and coordinates into WKB data.
+
+    Array of WKB binary strings is returned.
+
+    :param header: Array of headers of geometries.
+    :param coords: Array of coordinates of `(m, ndim)` shape.
+    :param offsets: Array of offsets of geometries.
+    :param hex: Create hex strings if true.
+    """
+    n = len(header)
+    hsize = header.dtype.itemsize
+    csize = coords.shape[1] * 8
+
+    # start of each geometry data in the buffer
+    start = hsize * numpy.arange(n + 1) + csize * offsets
+    buff = numpy.empty(start[-1], dtype=numpy.uint8)
+    _write(buff, start[:-1], header)
+
+    ids = numpy.repeat(numpy.arange(n), numpy.diff(offsets))
+    cstart = hsize * (ids + 1) + csize * numpy.arange(len(coords))
+    _write(buff, cstart, numpy.ascontiguousarray(coords, dtype='<f8'))
+    return _split(buff, start, hex)
+
+
+def _write(buff, pos, data):
+    """
+    Write items of an array at positions of a buffer.
+
+    :param buff: Buffer of bytes.
+    :param pos: Array of positions in the buffer.
+    :param data: Array of items, i.e. headers or coordinates.
+    """
+    data = numpy.ascontiguousarray(data)
+    size = data.itemsize * (data.size // max(len(data), 1))
+    data = data.view(numpy.uint8).reshape(len(pos), size)
+    buff[pos[:, None] + numpy.arange(size)] = data
+
+
+def _split(buff, start, hex):
+    """
+    Split buffer into WKB binary strings or hex strings.
+
+    :param buff: Buffer of bytes.
+    :param start: Start of each geometry in the buffer.
+    :param hex: Create hex strings if true.
+    """
+    if hex:
+        data = buff.tobytes().hex().upper()
+        start = 2 * start
+    else:
+        data = buff.tobytes()
+    result = numpy.empty(len(start) - 1, dtype=object)
+    result[:] = [data[s:e] for s, e in zip(start[:-1], start[1:])]
+    return result
+
+
+# vim: sw=4:et:ai
@@ -0,0 +1,483 @@
+#
+# GeoCoon - GIS data analysis library based on Pandas and Shapely
+#
+# Copyright (C) 2014 by Artur Wroblewski <wrobell@pld-linux.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Conversion of packed coordinate arrays to WKT format.
+
+The WKT data is created with NumPy for all geometries at once. The digits
+of coordinates are calculated with integer arithmetic and the text of
+geometries is written into single buffer of characters.
+
+The numbers are formatted with the shortest fixed point representation,
+which reads back to the same value. Shapely might round the numbers
+instead.
+"""
+
+import numpy
+
+# maximum number of coordinates formatted at once
+CHUNK_SIZE = 2 ** 18
+
+# maximum integer, which is exactly represented by float number
+MAX_INT = 2 ** 53
+
+# powers of ten, which are exactly represented by float numbers
+POW10 = 10.0 ** numpy.arange(23)
+
+
+def encode_points(coords, precision=None):
+    """
+    Create WKT data of points.
+
+    Array of WKT strings is returned.
+
+    :param coords: Array of coordinates of `(ndim, n)` shape.
+    :param precision: Optional number of decimal places.
+    """
+    ndim, n = coords.shape
+    table = [_prefix('POINT', ndim) + '(', ')']
+    first = numpy.zeros(n, dtype=numpy.int64)
+    last = numpy.ones(n, dtype=numpy.int64)
+    offsets = numpy.arange(n + 1)
+    return _encode(coords.T, offsets, first, last, table, precision)
+
+
+def encode_lines(coords, offsets, precision=None):
+    """
+    Create WKT data of packed line strings.
+
+    Array of WKT strings is returned. The data of empty line strings is
+    empty string.
+
+    :param coords: Array of coordinates of `(m, ndim)` shape.
+    :param offsets: Array of offsets of line strings.
+    :param precision: Optional number of decimal places.
+    """
+    table = ['', ', ', _prefix('LINESTRING', coords.shape[1]) + '(', ')']
+    m = len(coords)
+    prefix = numpy.zeros(m, dtype=numpy.int64)
+    suffix = numpy.ones(m, dtype=numpy.int64)
+    _mark(prefix, offsets[:-1], 2)
+    _mark(suffix, offsets[1:] - 1, 3)
+    return _encode(coords, offsets, prefix, suffix, table, precision)
+
+
+def encode_polygons(coords, ring_offsets, offsets, precision=None):
+    """
+    Create WKT data of packed polygons.
+
+    Array of WKT strings is returned. The data of empty polygons is empty
+    string.
+
+    :param coords: Array of coordinates of `(m, ndim)` shape.
+    :param ring_offsets: Array of offsets of rings.
+    :param offsets: Array of offsets of polygons.
+    :param precision: Optional number of decimal places.
+    """
+    table = [
+        '', ', ', _prefix('POLYGON', coords.shape[1]) + '((', '(', '), ',
+        '))',
+    ]
+    m = len(coords)
+    prefix = numpy.zeros(m, dtype=numpy.int64)
+    suffix = numpy.ones(m, dtype=numpy.int64)
+    _mark(prefix, ring_offsets[:-1], 3)
+    _mark(suffix, ring_offsets[1:] - 1, 4)
+    # first ring of a polygon and last ring of a polygon
+    _mark(prefix, ring_offsets[offsets[:-1]], 2)
+    _mark(suffix, ring_offsets[offsets[1:]] - 1, 5)
+    return _encode(
+        coords, ring_offsets[offsets], prefix, suffix, table, precision
+    )
+
+
+def format_values(values, precision=None):
+    """
+    Format array of float numbers.
+
+    The numbers are formatted with the shortest fixed point
+    representation, which reads back to the same value. If precision is
+    specified, then the numbers are rounded to the number of decimal
+    places and trailing zeros are removed.
+
+    Array of strings is returned.
+
+    :param values: Array of float numbers.
+    :param precision: Optional number of decimal places.
+    """
+    values = numpy.asarray(values, dtype=numpy.float64)
+    chars, mask = _format_chars(values.ravel(), precision)
+    text, start = _compact(chars, mask)
+    result = numpy.empty(values.size, dtype=object)
+    result[:] = [text[s:e] for s, e in zip(start[:-1], start[1:])]
+    return result.reshape(values.shape)
+
+
+def _encode(coords, offsets, prefix, suffix, table, precision):
+    """
+    Create WKT data of packed geometries.
+
+    The text of each coordinate is preceded by a prefix and followed by
+    a suffix, i.e. geometry type name or a separator.
+
+    Array of WKT strings is returned.
+
+    :param coords: Array of coordinates of `(m, ndim)` shape.
+    :param offsets: Array of offsets of geometries.
+    :param prefix: Index of prefix of each coordinate in the table.
+    :param suffix: Index of suffix of each coordinate in the table.
+    :param table: List of prefixes and suffixes.
+    :param precision: Optional number of decimal places.
+    """
+    n = len(offsets) - 1
+    result = numpy.empty(n, dtype=object)
+    tchars, tmask = _text_chars(table)
+
+    i = 0
+    while i < n:
+        # format coordinates of at least one geometry at a time
+        j = numpy.searchsorted(offsets, offsets[i] + CHUNK_SIZE, 'right') - 1
+        j = min(max(j, i + 1), n)
+        s, e = offsets[i], offsets[j]
+        c = coords[s:e]
+        m, ndim = c.shape
+
+        chars, mask = _format_chars(c.ravel(), precision)
+        width = chars.shape[1]
+        chars = chars.reshape(m, ndim, width)
+        mask = mask.reshape(m, ndim, width)
+
+        # each row is: prefix, values separated with space and suffix
+        space = numpy.full((m, ndim, 1), ord(' '), dtype=numpy.uint8)
+        smask = numpy.ones((m, ndim, 1), dtype=bool)
+        smask[:, -1] = False
+        chars = numpy.concatenate([chars, space], axis=2).reshape(m, -1)
+        mask = numpy.concatenate([mask, smask], axis=2).reshape(m, -1)
+        chars = numpy.hstack([tchars[prefix[s:e]], chars, tchars[suffix[s:e]]])
+        mask = numpy.hstack([tmask[prefix[s:e]], mask, tmask[suffix[s:e]]])
+
+        text, start = _compact(chars, mask)
+        bounds = start[offsets[i:j + 1] - s]
+        result[i:j] = [text[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+        i = j
+
+    return result
+
+
+def _format_chars(values, precision):
+    """
+    Format array of float numbers into matrix of characters.
+
+    Tuple of characters matrix and mask matrix of valid characters is
+    returned.
+
+    :param values: Array of float numbers.
+    :param precision: Optional number of decimal places.
+    """
+    k = len(values)
+    # adding zero converts negative zero to zero
+    values = values + 0.0
+    a = numpy.abs(values)
+
+    # find digits `q` and number of decimal places `p`, i.e. the value
+    # is `q / 10 ** p`
+    q, p = _shortest(a)
+    if precision is not None:
+        # round numbers, which have more decimal places than required;
+        # exact ties are rounded by Python
+        idx = numpy.flatnonzero((p < 0) | (p > precision))
+        ai = a[idx]
+        qi, r = _scale(ai, min(precision, 22))
+        found = (ai < MAX_INT) & (ai * POW10[min(precision, 22)] < 2 ** 62) \
+            & (precision <= 22) & (numpy.abs(r) != 0.5)
+        q[idx] = qi
+        p[idx] = numpy.where(found, precision, -1)
+
+    valid = p >= 0
+    q[~valid] = 0
+    p[~valid] = 0
+
+    # remove trailing zeros
+    idx = numpy.flatnonzero((p > 0) & (q % 10 == 0))
+    while len(idx):
+        q[idx] //= 10
+        p[idx] -= 1
+        idx = idx[(p[idx] > 0) & (q[idx] % 10 == 0)]
+
+    # the characters are: sign, digits of integer part, decimal point and
+    # digits of fraction part; the digits matrix is used for both parts
+    n_cols = max(19, p.max(initial=0) + 1)
+    digits = _digits(q, n_cols)
+    exp = numpy.arange(n_cols - 1, -1, -1)
+    n_int = numpy.maximum(_count_digits(q) - p, 1)
+
+    sign = numpy.full((k, 1), ord('-'), dtype=numpy.uint8)
+    point = numpy.full((k, 1), ord('.'), dtype=numpy.uint8)
+    chars = numpy.hstack([sign, digits, point, digits])
+    mask = numpy.hstack([
+        ((values < 0) & (q > 0))[:, None],
+        (exp >= p[:, None]) & (exp < (p + n_int)[:, None]),
+        (p > 0)[:, None],
+        exp < p[:, None],
+    ])
+    mask[~valid] = False
+    width = chars.shape[1]
+
+    # values, which cannot be represented by integer digits, are
+    # formatted by Python
+    idx = numpy.flatnonzero(~valid)
+    if len(idx):
+        text = [_format_value(v, precision) for v in values[idx]]
+        fchars, fmask = _text_chars(text)
+        if fchars.shape[1] > width:
+            extra = fchars.shape[1] - width
+            chars = numpy.pad(chars, ((0, 0), (0, extra)))
+            mask = numpy.pad(mask, ((0, 0), (0, extra)))
+        chars[idx, :fchars.shape[1]] = fchars
+        mask[idx, :fchars.shape[1]] = fmask
+
+    return chars, mask
+
+
+def _digits(q, n_cols):
+    """
+    Create matrix of decimal digits characters of non-negative integers.
+
+    :param q: Array of integers less than `10 ** 19`.
+    :param n_cols: Number of columns of the matrix, at least 19.
+    """
+    chars = numpy.full((len(q), n_cols), ord('0'), dtype=numpy.uint8)
+    # split the integers into parts of 9 digits, so the digits are
+    # calculated with fast 32-bit integer arithmetic
+    parts = q // 10 ** 18, (q // 10 ** 9) % 10 ** 9, q % 10 ** 9
+    end = n_cols
+    for part, size in zip(reversed(parts), (9, 9, 1)):
+        part = part.astype(numpy.uint32)
+        for i in range(end - 1, end - size - 1, -1):
+            part, d = numpy.divmod(part, numpy.uint32(10))
+            chars[:, i] += d.astype(numpy.uint8)
+        end -= size
+    return chars
+
+
+def _count_digits(q):
+    """
+    Count decimal digits of non-negative integers.
+
+    :param q: Array of integers less than `10 ** 19`.
+    """
+    power = 10 ** numpy.arange(19, dtype=numpy.int64)
+    e = numpy.floor(numpy.log10(numpy.maximum(q, 1))).astype(numpy.int64)
+    e = numpy.clip(e, 0, 18)
+    # fix rounding errors of logarithm
+    e[q < power[e]] -= 1
+    e[(e < 18) & (q >= power[numpy.minimum(e + 1, 18)])] += 1
+    return e + 1
+
+
+def _shortest(a):
+    """
+    Find the shortest fixed point representation of non-negative float
+    numbers, which reads back to the same values.
+
+    Tuple of array of digits `q` and array of number of decimal places
+    `p` is returned, i.e. a float number is `q / 10 ** p`. The number of
+    decimal places is -1 for numbers, which cannot be represented with
+    64-bit integer digits.
+
+    :param a: Array of non-negative float numbers.
+    """
+    k = len(a)
+    q = numpy.zeros(k, dtype=numpy.int64)
+    p = numpy.where(a == 0, 0, -1)
+
+    idx = numpy.flatnonzero((a > 0) & (a < MAX_INT))
+    ai = a[idx]
+    # decimal exponent of the numbers, fixed for rounding errors of
+    # logarithm
+    e = numpy.floor(numpy.log10(ai)).astype(numpy.int64)
+    e[10.0 ** e > ai] -= 1
+    e[10.0 ** (e + 1) <= ai] += 1
+
+    # binary search of number of significant digits; if the digits read
+    # back to the same value, then more digits do as well and 17 digits
+    # are always enough
+    lo = numpy.ones(len(idx), dtype=numpy.int64)
+    hi = numpy.full(len(idx), 17)
+    for i in range(5):
+        d = (lo + hi) // 2
+        found = _read_back(ai, d - 1 - e)
+        hi = numpy.where(found, d, hi)
+        lo = numpy.where(found, lo, d + 1)
+
+    pf = hi - 1 - e
+    qf, _ = _scale(ai, numpy.clip(pf, 0, 22))
+    pf[(pf < 0) | (pf > 22)] = -1
+
+    q[idx] = qf
+    p[idx] = pf
+    return q, p
+
+
+def _read_back(a, p):
+    """
+    Check if digits of float numbers with `p` decimal places read back to
+    the same values.
+
+    :param a: Array of non-negative float numbers.
+    :param p: Number of decimal places.
+    """
+    valid = (p >= 0) & (p <= 22)
+    p = numpy.clip(p, 0, 22)
+    scale = POW10[p]
+
+    # the check is exact for integer digits up to MAX_INT
+    product = a * scale
+    q = numpy.rint(product)
+    found = (q < MAX_INT) & (q / scale == a)
+
+    # use exact product if the digits are large or rounding of inexact
+    # product might be wrong
+    close = numpy.abs(product - q) >= 0.5 - numpy.spacing(product)
+    idx = numpy.flatnonzero(
+        valid & ~found & ((q >= MAX_INT) | close) & (product < 2 ** 62)
+    )
+    if len(idx):
+        a = a[idx]
+        scale = scale[idx]
+        q, r = _scale(a, p[idx])
+        # the digits read back to the same value if the difference is
+        # less than half of float number spacing
+        limit = 0.5 * (1 - 1e-9) * numpy.spacing(a) * scale
+        found[idx] = numpy.where(
+            q < MAX_INT, q / scale == a, numpy.abs(r) < limit
+        )
+    return valid & found
+
+
+def _scale(a, p):
+    """
+    Multiply non-negative float numbers by power of ten and round the
+    result to the nearest integer.
+
+    The product is calculated exactly using Dekker's algorithm, so
+    integers larger than `2 ** 53` are rounded correctly.
+
+    Tuple of array of integers and array of differences between the
+    products and the integers is returned.
+
+    :param a: Array of non-negative float numbers.
+    :param p: Power of ten up to 22.
+    """
+    scale = POW10[p]
+    with numpy.errstate(invalid='ignore', over='ignore'):
+        hi = a * scale
+        a_hi, a_lo = _split(a)
+        s_hi, s_lo = _split(scale)
+        lo = ((a_hi * s_hi - hi) + a_hi * s_lo + a_lo * s_hi) + a_lo * s_lo
+
+        valid = numpy.isfinite(hi) & (hi < 2 ** 62)
+        hi = numpy.where(valid, hi, 0)
+        lo = numpy.where(valid, lo, 0)
+
+        q = numpy.rint(hi)
+        r = (hi - q) + lo
+        q = q.astype(numpy.int64) + numpy.rint(r).astype(numpy.int64)
+        r = r - numpy.rint(r)
+    return q, r
+
+
+def _split(a):
+    """
+    Split float numbers into high and low parts of 26 bits.
+
+    :param a: Array of float numbers.
+    """
+    c = 134217729.0 * a
+    hi = c - (c - a)
+    return hi, a - hi
+
+
+def _format_value(value, precision):
+    """
+    Format float number with Python.
+
+    :param value: Float number.
+    :param precision: Optional number of decimal places.
+    """
+    text = numpy.format_float_positional(value, precision, trim='-')
+    return '0' if text == '-0' else text
+
+
+def _text_chars(text):
+    """
+    Convert list of strings into matrix of characters.
+
+    Tuple of characters matrix and mask matrix of valid characters is
+    returned.
+
+    :param text: List of strings.
+    """
+    width = max(map(len, text), default=0)
+    data = ''.join(t.ljust(width) for t in text).encode('ascii')
+    chars = numpy.frombuffer(data, dtype=numpy.uint8)
+    chars = chars.reshape(len(text), width)
+    size = numpy.array([len(t) for t in text])
+    mask = numpy.arange(width) < size[:, None]
+    return chars, mask
+
+
+def _compact(chars, mask):
+    """
+    Join valid characters of each row of characters matrix into text.
+
+    Tuple of text and start of each row in the text is returned.
+
+    :param chars: Characters matrix.
+    :param mask: Mask matrix of valid characters.
+    """
+    text = chars[mask].tobytes().decode('ascii')
+    start = numpy.zeros(len(chars) + 1, dtype=numpy.int64)
+    numpy.cumsum(mask.sum(axis=1), out=start[1:])
+    return text, start
+
+
+def _mark(data, idx, value):
+    """
+    Set value of items of array at indexes, which are within the array.
+
+    :param data: Array of values.
+    :param idx: Array of indexes.
+    :param value: New value.
+    """
+    idx = idx[(idx >= 0) & (idx < len(data))]
+    data[idx] = value
+
+
+def _prefix(name, ndim):
+    """
+    Create prefix of WKT data of geometries.
+
+    :param name: Geometry type name.
+    :param ndim: Number of dimensions of coordinates.
+    """
+    return name + (' Z ' if ndim == 3 else ' ')
+
+
+# vim: sw=4:et:ai
@@ -44,7 +44,10 @@ frames with Shapely GIS geometries.
     ],
     keywords='gis',
     license='GPL',
-    install_requires = ['shapely >= 1.3', 'pandas >= 0.14.0'],
+    install_requires = ['shapely >= 1.8', 'pandas >= 0.14.0', 'numpy'],
+    extras_require={
+        'arrow': ['pyarrow'], 'cache': ['redis'], 'proj': ['pyproj']
+    },
     test_suite='nose.collector',
 )
 